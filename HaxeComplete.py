@@ -14,9 +14,11 @@ import stat
 import re
 import codecs
 import glob
+import fnmatch
 import hashlib
 import shutil
 import functools
+import threading
 
 # Information about where the plugin is running from
 plugin_file = __file__
@@ -37,13 +39,29 @@ try: # Python 3
     from .features.haxelib import *
 
     # Import the helper functions and regex helpers
-    from .features.haxe_helper import runcmd, show_quick_panel, cache, parse_sig, get_env
+    from .features.haxe_helper import runcmd, show_quick_panel, parse_sig, get_env
+    from .features.haxe_helper import filter_completions, completion_entries, item_hint
     from .features.haxe_helper import spaceChars, wordChars, importLine, packageLine
-    from .features.haxe_helper import compactFunc, compactProp, libLine, classpathLine, typeDecl
-    from .features.haxe_helper import libFlag, skippable, inAnonymous, extractTag
+    from .features.haxe_helper import libLine, classpathLine, typeDecl
+    from .features.haxe_helper import libFlag, skippable, identChars, inAnonymous, extractTag
     from .features.haxe_helper import variables, functions, functionParams, paramDefault
     from .features.haxe_helper import isType, comments, haxeVersion, haxeFileRegex, controlStruct
     from .features.haxe_errors import highlight_errors, extract_errors
+    from .features.haxe_server import strip_connect
+    from .features.haxe_server_supervisor import ServerSupervisor, ServerPool
+    from .features.haxe_complete_worker import CompletionRequest, CompletionWorker
+    from .features.haxe_complete_cache import CompletionCache
+    from .features.haxe_display_parser import parse_display
+    from .features.haxe_stats import stats as completionStats, clock
+    from .features.haxe_flambe import FlambeFlags
+    from .features.haxe_hxml import HxmlParser
+    from .features.haxe_project_xml import ProjectParser, platform_defines, expat as project_expat
+    from .features.haxe_build_registry import BuildRegistry
+    from .features.haxe_ident_index import IdentifierIndex
+    from .features.haxe_type_graph import TypeGraph
+    from .features import haxe_display_rpc as display_rpc
+    from .features.haxe_type_index import TypeIndex, tree_fingerprint, file_stat
+    from .features.haxe_type_index import read_types_cache, write_types_cache, scan_parallel
 
 except (ValueError): # Python 2
 
@@ -52,17 +70,38 @@ except (ValueError): # Python 2
     from features.haxelib import *
 
     # Import the helper functions and regex helpers
-    from features.haxe_helper import runcmd, show_quick_panel, cache, parse_sig, get_env
+    from features.haxe_helper import runcmd, show_quick_panel, parse_sig, get_env
+    from features.haxe_helper import filter_completions, completion_entries, item_hint
     from features.haxe_helper import spaceChars, wordChars, importLine, packageLine
-    from features.haxe_helper import compactFunc, compactProp, libLine, classpathLine, typeDecl
-    from features.haxe_helper import libFlag, skippable, inAnonymous, extractTag
+    from features.haxe_helper import libLine, classpathLine, typeDecl
+    from features.haxe_helper import libFlag, skippable, identChars, inAnonymous, extractTag
     from features.haxe_helper import variables, functions, functionParams, paramDefault
     from features.haxe_helper import isType, comments, haxeVersion, haxeFileRegex, controlStruct
     from features.haxe_errors import highlight_errors, extract_errors
+    from features.haxe_server import strip_connect
+    from features.haxe_server_supervisor import ServerSupervisor, ServerPool
+    from features.haxe_complete_worker import CompletionRequest, CompletionWorker
+    from features.haxe_complete_cache import CompletionCache
+    from features.haxe_display_parser import parse_display
+    from features.haxe_stats import stats as completionStats, clock
+    from features.haxe_flambe import FlambeFlags
+    from features.haxe_hxml import HxmlParser
+    from features.haxe_project_xml import ProjectParser, platform_defines, expat as project_expat
+    from features.haxe_build_registry import BuildRegistry
+    from features.haxe_ident_index import IdentifierIndex
+    from features.haxe_type_graph import TypeGraph
+    from features import haxe_display_rpc as display_rpc
+    from features.haxe_type_index import TypeIndex, tree_fingerprint, file_stat
+    from features.haxe_type_index import read_types_cache, write_types_cache, scan_parallel
 
 # For running background tasks
 
 from subprocess import Popen, PIPE
+
+try:
+    from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+except ImportError: # ST2
+    ThreadPoolExecutor = None
 try:
   STARTUP_INFO = subprocess.STARTUPINFO()
   STARTUP_INFO.dwFlags |= subprocess.STARTF_USESHOWWINDOW
@@ -166,9 +205,9 @@ inst = None
 documentationStore = {}
 
 class BuildCache:
-    def __init__(self, path, raw, build, target):
+    def __init__(self, path, source, build, target):
         self.path = path
-        self.raw = raw
+        self.source = source
         self.build = build
         self.target = target
 
@@ -250,12 +289,35 @@ class HaxeBuild :
         self.openfl = False
         self.lime = False
         self.cwd = None
+        # (build file, --next index), None for builds not read from a file
+        self.key = None
 
     def __eq__(self,other) :
-        return self.__dict__ == other.__dict__
+        if self is other :
+            return True
+        if not isinstance( other , HaxeBuild ) or self.key is None :
+            return False
+        return self.key == other.key
+
+    def __ne__(self,other) :
+        return not self.__eq__( other )
+
+    def __hash__(self) :
+        if self.key is None :
+            return id( self )
+        return hash( self.key )
 
-    def __cmp__(self,other) :
-        return self.__dict__ == other.__dict__
+    def signature(self) :
+        # what the build file says, to tell if a build was modified
+        return ( self.main , self.target , self.output , self.cwd ,
+            [ tuple( a ) for a in self.args ] , self.classpaths ,
+            [ l.name for l in self.libs if l is not None ] )
+
+    def cache_key(self) :
+        # the build and what it says, unlike its id, which a new build
+        # can get once this one is collected
+        sig = self.signature()
+        return ( self.key , sig[:4] + tuple( tuple( s ) for s in sig[4:] ) )
 
     def is_valid(self) :
         if self.hxml is not None and self.target is None and self.yaml is None and self.nmml is None :
@@ -322,29 +384,35 @@ class HaxeBuild :
         if cwd is None :
             cwd = os.path.dirname( self.hxml )
 
-        if self.libClasses is None or self.libPacks is None :
-            classes = []
-            packs = []
-            cp = []
+        jobs = []
+        for path in self.classpaths :
+            jobs.append( ( os.path.join( cwd , path ) , None ) )
 
+        scanLibs = self.libClasses is None or self.libPacks is None
+        if scanLibs :
             for lib in self.libs :
                 if lib is None :
                     continue
-                c, p = HaxeComplete.inst.extract_types(
-                    os.path.join( cwd , lib.path ),
-                    cache_name = '%s_%s.cache' % (lib.name, lib.version) )
-                classes.extend( c )
-                packs.extend( p )
+                jobs.append( ( os.path.join( cwd , lib.path ) ,
+                    '%s_%s.cache' % (lib.name, lib.version) ) )
+
+        results = HaxeComplete.inst.extract_types_parallel( jobs )
+
+        classes = []
+        packs = []
 
+        for c, p in results[ len(self.classpaths): ] :
+            classes.extend( c )
+            packs.extend( p )
+
+        if scanLibs :
             self.libClasses = classes;
             self.libPacks = packs;
 
         classes = []
         packs = []
-        cp = self.classpaths
 
-        for path in cp :
-            c, p = HaxeComplete.inst.extract_types( os.path.join( cwd , path ) )
+        for c, p in results[ :len(self.classpaths) ] :
             classes.extend( c )
             packs.extend( p )
 
@@ -449,17 +517,11 @@ class HaxeComplete( sublime_plugin.EventListener ):
 
     #folder = ""
     #buildArgs = []
-    currentBuild = None
     selectingBuild = False
-    builds = []
     haxe_settings_file = 'Preferences.sublime-settings'
 
-    currentCompletion = {
-        "inp" : None,
-        "outp" : None
-    }
-
     classpathExclude = ['.git','_std']
+    buildFilePatterns = ["*.hxml","*.nmml","*.xml","*.hxp","*.lime","flambe.yaml"]
     classpathDepth = 2
 
     stdPaths = []
@@ -467,71 +529,197 @@ class HaxeComplete( sublime_plugin.EventListener ):
     #stdClasses = ["Void","Float","Int","UInt","Null","Bool","Dynamic","Iterator","Iterable","ArrayAccess"]
     stdClasses = []
     stdCompletes = []
+    typeIndexes = {}
+    typeIndexesLock = threading.Lock()
+    identIndexes = {}
+    typeGraphs = {}
 
     visibleCompletionList = [] # This will contain the list of visible completions, if there is one.
 
     panel = None
     serverMode = False
-    serverProc = None
-    serverPort = 6000
 
     compilerVersion = 2
+    compilerVersionName = None
     inited = False
 
+    initExecutor = None
+    discoveryExecutor = None
+    compilerReady = None
+    typesReady = None
+
     def __init__(self):
         #print("init haxecomplete")
         HaxeComplete.inst = self
         self.build_cache = {}
+        self.discoveryCache = {}
+        self.flambeFlags = FlambeFlags( self.on_flambe_flags )
+        self.hxmlParser = HxmlParser()
+        self.projectParser = ProjectParser()
         self.force_display_completion = False
         self.type_completion_only = False
-        self.selected_build_id_map = {}
+        self.buildRegistry = BuildRegistry()
+        # (haxe path, "display" or "build") -> ServerPool
+        self.serverPools = {}
+        self.serverPoolsLock = threading.Lock()
+        self.warmedUp = set()
+        # window of the builds being discovered on this thread
+        self.context = threading.local()
+        self.pendingDiscovery = set()
+        # the hxml and project parsers read one build file at a time
+        self.discoveryLock = threading.Lock()
+        self.completionWorker = CompletionWorker()
+        self.completionCache = CompletionCache()
+
+    def window_state( self , view = None ) :
+        win = None
+        if view is not None :
+            win = view.window()
+
+        window_id = getattr( self.context , "window_id" , None )
+        if win is not None :
+            window_id = win.id()
+        elif window_id is None :
+            win = sublime.active_window()
+            if win is not None :
+                window_id = win.id()
+
+        return self.buildRegistry.window( window_id )
+
+    @property
+    def builds( self ) :
+        return self.window_state().builds
+
+    @builds.setter
+    def builds( self , builds ) :
+        self.window_state().builds = builds
+
+    @property
+    def currentBuild( self ) :
+        return self.window_state().current
+
+    @currentBuild.setter
+    def currentBuild( self , build ) :
+        self.window_state().current = build
 
     def __del__(self) :
+        self.completionWorker.cancel_all()
+        if self.initExecutor is not None :
+            self.initExecutor.shutdown( wait = False )
+            self.discoveryExecutor.shutdown( wait = False )
         self.stop_server()
 
 
-    def extract_types( self , path , depth = 0 , cache_name = None ) :
+    def get_type_index( self , path ) :
+        path = os.path.normpath( path )
+
+        with self.typeIndexesLock :
+            index = self.typeIndexes.get( path )
+            if index is None :
+                index = TypeIndex( path )
+                if self.use_type_index_cache() :
+                    index.load()
+                self.typeIndexes[ path ] = index
+
+        return index
+
+    def get_ident_index( self , root ) :
+        # identifiers of the .hx files under root, see IdentifierIndex
+        root = os.path.normpath( root )
+
+        with self.typeIndexesLock :
+            index = self.identIndexes.get( root )
+            if index is None :
+                index = IdentifierIndex( root )
+                if self.use_type_index_cache() :
+                    index.load()
+                self.identIndexes[ root ] = index
+
+        return index
+
+    def get_type_graph( self , roots ) :
+        # inheritance graph of the types under roots, see TypeGraph
+        roots = tuple( sorted( os.path.normpath( r ) for r in roots ) )
+
+        with self.typeIndexesLock :
+            graph = self.typeGraphs.get( roots )
+            if graph is None :
+                graph = TypeGraph( roots )
+                if self.use_type_index_cache() :
+                    graph.load()
+                self.typeGraphs[ roots ] = graph
+
+        return graph
+
+    def use_type_index_cache( self ) :
+        view = sublime.active_window().active_view()
+        return view is None or view.settings().get('haxe_use_cache', True)
+
+    def extract_types_parallel( self , jobs ) :
+        # jobs are (path, cache_name) pairs, results keep their order
+        pool_size = 1
+        view = sublime.active_window().active_view()
+        if view is not None and int(sublime.version()) >= 3000 :
+            pool_size = view.settings().get('haxe_scan_pool_size', 4)
+
+        def scan( path , cache_name ) :
+            return self.extract_types( path , cache_name = cache_name )
+
+        def progress( done , total ) :
+            sublime.status_message(
+                "Haxe : scanning types %d/%d" % ( done , total ) )
+
+        try :
+            return scan_parallel( jobs , scan , pool_size , progress )
+        finally :
+            sublime.status_message( "" )
+
+    def extract_types( self , path , depth = 0 , cache_name = None , index = None ) :
 
         classes = []
         packs = []
         hasClasses = False
 
-        if cache_name is not None:
-            view = sublime.active_window().active_view()
-            if view.settings().get('haxe_use_cache', True):
-                cache_str = cache(cache_name)
-                if cache_str is not None:
-                    spl = cache_str.split(';')
-                    classes = spl[0].split(',')
-                    packs = spl[1].split(',')
-                    return classes, packs
+        fingerprint = None
+        if cache_name is not None and self.use_type_index_cache():
+            fingerprint = tree_fingerprint( [path] , self.classpathExclude )
+            cached = read_types_cache( cache_name , fingerprint )
+            if cached is not None:
+                return cached
 
         #print(path)
         if not os.path.exists( path ) :
             print('Warning: path %s doesn´t exists.'%path);
             return classes, packs
 
+        if index is None :
+            # scans of the same classpath share the seen files of its
+            # index until saved, run them one at a time
+            index = self.get_type_index( path )
+            with index.scan_lock :
+                classes, packs = self.extract_types( path , depth , index = index )
+                if self.use_type_index_cache() :
+                    index.save()
+
+            if fingerprint is not None:
+                write_types_cache( cache_name , fingerprint , classes , packs )
+
+            return classes, packs
+
         for fullpath in glob.glob( os.path.join(path,"*.hx") ) :
             f = os.path.basename(fullpath)
 
             cl, ext = os.path.splitext( f )
 
             if cl not in HaxeComplete.stdClasses:
-                s = codecs.open( os.path.join( path , f ) , "r" , "utf-8" , "ignore" )
-                src = comments.sub( "" , s.read() )
-
-                clPack = "";
-                for ps in packageLine.findall( src ) :
-                    clPack = ps
+                clPack, decls = index.get( fullpath )
 
                 if clPack == "" :
                     packDepth = 0
                 else:
                     packDepth = len(clPack.split("."))
 
-                for decl in typeDecl.findall( src ):
-                    t = decl[1]
-                    params = decl[2]
+                for t, params in decls:
 
                     if( packDepth == depth ) : # and t == cl or cl == "StdTypes"
                         if t == cl or cl == "StdTypes":
@@ -550,7 +738,7 @@ class HaxeComplete( sublime_plugin.EventListener ):
 
                 if os.path.isdir( os.path.join( path , f ) ) and f not in self.classpathExclude :
                     packs.append( f )
-                    subclasses,subpacks = self.extract_types( os.path.join( path , f ) , depth + 1 )
+                    subclasses,subpacks = self.extract_types( os.path.join( path , f ) , depth + 1 , index = index )
                     for cl in subclasses :
                         classes.append( f + "." + cl )
 
@@ -558,17 +746,54 @@ class HaxeComplete( sublime_plugin.EventListener ):
         classes.sort()
         packs.sort()
 
-        if cache_name is not None:
-            view = sublime.active_window().active_view()
-            if view.settings().get('haxe_use_cache', True):
-                cache_str = ';'.join((','.join(classes), ','.join(packs)))
-                cache(cache_name, cache_str)
-
         return classes, packs
 
     def on_post_save( self , view ) :
         if view.score_selector(0,'source.hxml') > 0:
             self.clear_build(view)
+            self.buildRegistry.clear_views()
+            # read the build again and warm the server up with it
+            win = view.window()
+            if self.discoveryExecutor is not None and win is not None :
+                for v in [ win.active_view() ] + win.views() :
+                    if v is not None and v.file_name() is not None and \
+                            v.score_selector(0,'source.haxe.2') > 0 :
+                        self.submit_discovery( v )
+                        break
+
+        fn = view.file_name()
+        if fn is not None and [ p for p in self.buildFilePatterns
+                if fnmatch.fnmatch( os.path.basename( fn ) , p ) ] :
+            # included hxml files aren't part of the folder signatures
+            self.discoveryCache = {}
+
+        if fn is not None and os.path.basename( fn ) == "flambe.yaml" :
+            self.flambeFlags.refresh( fn )
+
+        if fn is not None and view.score_selector(0,'source.haxe.2') > 0 :
+            self.invalidate_file( view , fn )
+
+            for index in list( self.identIndexes.values() ) :
+                if index.contains( fn ) :
+                    index.update( fn )
+
+    def on_flambe_flags( self , yaml ) :
+        # builds read with the previous flags are stale, called from the
+        # thread of FlambeFlags
+        def clear() :
+            self.discoveryCache = {}
+        sublime.set_timeout( clear , 0 )
+
+    def on_modified( self , view ) :
+        fn = view.file_name()
+        if fn is None or view.score_selector(0,'source.haxe.2') == 0 :
+            return
+
+        # cached completions past the edit are stale
+        sel = view.sel()
+        if len(sel) > 0 :
+            pos = min( r.begin() for r in sel )
+            self.completionCache.invalidate( fn , pos )
 
     def on_activated( self , view ) :
         return self.on_open_file( view )
@@ -591,11 +816,58 @@ class HaxeComplete( sublime_plugin.EventListener ):
         self.init_plugin( view )
         # HaxeProjects.determine_type()
 
-        self.extract_build_args( view )
-        self.get_build( view )
-        self.generate_build( view )
+        if self.discoveryExecutor is not None :
+            self.submit_discovery( view )
+        else :
+            self.discover_builds( view )
         highlight_errors( view )
 
+    def discover_builds( self , view ) :
+        # the build files are read here, possibly on the discovery thread,
+        # the window state only changes on the main thread
+        win = view.window()
+        if win is None :
+            return
+
+        with self.discoveryLock :
+            builds , folder , project_folder = self.collect_builds( view )
+
+        def apply() :
+            if view.window() is None :
+                return
+
+            self.context.window_id = view.window().id()
+            try :
+                self.apply_builds( view , builds , folder , project_folder )
+                self.get_build( view )
+                self.warm_up( view )
+            finally :
+                self.context.window_id = None
+
+            self.generate_build( view )
+
+        sublime.set_timeout( apply , 0 )
+
+    def on_close( self , view ) :
+        self.buildRegistry.forget_view( view.id() )
+
+    def submit_discovery( self , view ) :
+        # runs once the compiler is known, without waiting for the std
+        # types, at most once at a time per view
+        vid = view.id()
+        if vid in self.pendingDiscovery :
+            return
+        self.pendingDiscovery.add( vid )
+
+        def discover() :
+            try :
+                wait_futures( [ self.compilerReady ] )
+                self.discover_builds( view )
+            finally :
+                self.pendingDiscovery.discard( vid )
+
+        self.discoveryExecutor.submit( discover )
+
     def on_pre_save( self , view ) :
         if view.score_selector(0,'source.haxe.2') == 0 :
             return []
@@ -655,7 +927,13 @@ class HaxeComplete( sublime_plugin.EventListener ):
         self.extract_build_args( view , True , all_views )
 
 
+    def nme_defines( self ) :
+        # conditions of project files are checked against the target
+        return platform_defines( HaxeBuild.nme_target[1].split() ,
+            HaxeBuild.nme_target[2] )
+
     def find_nmml( self, folder ) :
+        builds = []
         nmmls = glob.glob( os.path.join( folder , "*.nmml" ) )
         nmmls += glob.glob( os.path.join( folder , "*.xml" ) )
         nmmls += glob.glob( os.path.join( folder , "*.hxp" ) )
@@ -666,64 +944,60 @@ class HaxeComplete( sublime_plugin.EventListener ):
             if not os.path.exists( build ) :
                 continue
 
-            f = codecs.open( build , "r+", "utf-8" , "ignore" )
-            raw = f.read()
+            is_hxp = build.endswith("hxp")
+            raw = None
+
+            if is_hxp :
+                source = file_stat( build )
+            elif project_expat is not None :
+                # unchanged files give back the same ProjectInfo
+                source = self.projectParser.parse( build , self.nme_defines() )
+                if source is None :
+                    continue
+            else :
+                f = codecs.open( build , "r+", "utf-8" , "ignore" )
+                raw = source = f.read()
+                f.close()
 
             if build in self.build_cache and \
-                    self.build_cache[build].raw == raw:
+                    self.build_cache[build].source == source:
                 currentBuild = self.build_cache[build].build
                 if currentBuild.main is not None :
-                    self.add_build( currentBuild )
+                    builds.append( currentBuild )
                 continue
 
             currentBuild = HaxeBuild()
+            currentBuild.key = ( build , 0 )
             currentBuild.hxml = build
             currentBuild.nmml = build
             currentBuild.openfl = build.endswith("xml")
             currentBuild.lime = build.endswith("lime")
             buildPath = os.path.dirname(build)
 
-            self.build_cache[build] = BuildCache(build, raw, currentBuild, None)
+            self.build_cache[build] = BuildCache(build, source, currentBuild, None)
 
             outp = "NME"
-            is_hxp = build.endswith("hxp")
             if is_hxp:
                 currentBuild.main = 'hxp'
                 outp = 'Lime/OpenFl'
                 currentBuild.lime = True
-
-            lines = raw.splitlines()
-            for l in lines:
-                if len(l) > 200:
-                    continue
-                if is_hxp:
-                    continue
-                m = extractTag.search(l)
-                if not m is None:
-                    #print(m.groups())
-                    tag = m.group(1)
-                    name = m.group(3)
-                    if (tag == "app"):
-                        currentBuild.main = name
-                        currentBuild.args.append( ("-main" , name) )
-                        mFile = re.search("\\b(file|title)=\"([a-z0-9_-]+)\"", l, re.I)
-                        if not mFile is None:
-                            outp = mFile.group(2)
-                    elif (tag == "haxelib"):
-                        currentBuild.libs.append( HaxeLib.get( name ) )
-                        currentBuild.args.append( ("-lib" , name) )
-                    elif (tag == "haxedef"):
-                        currentBuild.args.append( ("-D", name) )
-                    elif (tag == "classpath" or tag == "source"):
-                        currentBuild.classpaths.append( os.path.join( buildPath , name ) )
-                        currentBuild.args.append( ("-cp" , os.path.join( buildPath , name ) ) )
-                else: # NME 3.2
-                    mPath = re.search("\\bpath=\"([a-z0-9_-]+)\"", l, re.I)
-                    if not mPath is None:
-                        #print(mPath.groups())
-                        path = mPath.group(1)
-                        currentBuild.classpaths.append( os.path.join( buildPath , path ) )
-                        currentBuild.args.append( ("-cp" , os.path.join( buildPath , path ) ) )
+            elif raw is None :
+                info = source
+                if info.main is not None :
+                    currentBuild.main = info.main
+                    currentBuild.args.append( ("-main" , info.main) )
+                if info.output is not None :
+                    outp = info.output
+                for name in info.haxelibs :
+                    currentBuild.libs.append( HaxeLib.get( name ) )
+                    currentBuild.args.append( ("-lib" , name) )
+                for name in info.haxedefs :
+                    currentBuild.args.append( ("-D", name) )
+                for cp in info.classpaths :
+                    currentBuild.classpaths.append( cp )
+                    currentBuild.args.append( ("-cp" , cp ) )
+            else :
+                outp = self.read_nmml_lines( currentBuild , raw , buildPath , outp )
 
             outp = os.path.join( folder , outp )
 
@@ -741,9 +1015,47 @@ class HaxeComplete( sublime_plugin.EventListener ):
             currentBuild.args.append( ("-"+currentBuild.target, outp) )
 
             if currentBuild.main is not None :
-                self.add_build( currentBuild )
+                builds.append( currentBuild )
+
+        return builds
+
+    def read_nmml_lines( self , currentBuild , raw , buildPath , outp ) :
+        # line based reading, for Pythons without expat
+        lines = raw.splitlines()
+        for l in lines:
+            if len(l) > 200:
+                continue
+            m = extractTag.search(l)
+            if not m is None:
+                #print(m.groups())
+                tag = m.group(1)
+                name = m.group(3)
+                if (tag == "app"):
+                    currentBuild.main = name
+                    currentBuild.args.append( ("-main" , name) )
+                    mFile = re.search("\\b(file|title)=\"([a-z0-9_-]+)\"", l, re.I)
+                    if not mFile is None:
+                        outp = mFile.group(2)
+                elif (tag == "haxelib"):
+                    currentBuild.libs.append( HaxeLib.get( name ) )
+                    currentBuild.args.append( ("-lib" , name) )
+                elif (tag == "haxedef"):
+                    currentBuild.args.append( ("-D", name) )
+                elif (tag == "classpath" or tag == "source"):
+                    currentBuild.classpaths.append( os.path.join( buildPath , name ) )
+                    currentBuild.args.append( ("-cp" , os.path.join( buildPath , name ) ) )
+            else: # NME 3.2
+                mPath = re.search("\\bpath=\"([a-z0-9_-]+)\"", l, re.I)
+                if not mPath is None:
+                    #print(mPath.groups())
+                    path = mPath.group(1)
+                    currentBuild.classpaths.append( os.path.join( buildPath , path ) )
+                    currentBuild.args.append( ("-cp" , os.path.join( buildPath , path ) ) )
+
+        return outp
 
     def find_yaml( self, folder ) :
+        builds = []
         yamls = glob.glob( os.path.join( folder , "flambe.yaml") )
 
         for build in yamls :
@@ -753,13 +1065,13 @@ class HaxeComplete( sublime_plugin.EventListener ):
                 continue
 
             currentBuild = HaxeBuild()
+            currentBuild.key = ( build , 0 )
             currentBuild.hxml = build
             currentBuild.yaml = build
             currentBuild.cwd = os.path.dirname( build )
             currentBuild.output = "Flambe"
 
-            res, err = runcmd(
-                ["flambe","--config" , build, "haxe-flags"] )
+            res, err = self.flambeFlags.get( build )
             lines = res.split('\n')
 
             i, n = 0, len(lines)
@@ -771,154 +1083,33 @@ class HaxeComplete( sublime_plugin.EventListener ):
                         currentBuild.libs.append(lib)
                 i += 1
 
-            self.add_build( currentBuild )
+            builds.append( currentBuild )
+
+        return builds
 
 
     def read_hxml( self, build ) :
         #print("Reading build " + build );
 
-        def _read_hxml( build, builds ) :
-            buildPath = os.path.dirname(build);
-
-            spl = build.split("@")
-            if( len(spl) == 2 ) :
-                buildPath = spl[0]
-                build = os.path.join( spl[0] , spl[1] )
-
-            if not os.path.exists( build ) :
-                return builds
+        parser = self.hxmlParser
+        parser.targets = HaxeBuild.targets
 
-            if builds:
-                currentBuild = builds[-1]
-            else:
-                currentBuild = HaxeBuild()
-                currentBuild.hxml = build
-                currentBuild.cwd = buildPath
-                builds.append(currentBuild)
-
-            #print( currentBuild )
-
-            with codecs.open( build , "r+" , "utf-8" , "ignore" ) as f:
-                lines = f.readlines()
-                while lines:
-                    l = lines.pop(0)
-                    l = l.strip()
-
-                    if l.startswith("#") : # a comment
-                        pass
-
-                    elif l.startswith("--next") :
-                        currentBuild = HaxeBuild()
-                        currentBuild.hxml = build
-                        currentBuild.cwd = buildPath
-                        builds.append(currentBuild)
-
-                    elif l.startswith("-main") :
-                        spl = l.split(" ", 1)
-                        if len( spl ) == 2 :
-                            currentBuild.main = spl[1]
-                            currentBuild.args.append( ( spl[0] , spl[1] ) )
-                        else :
-                            sublime.status_message( "Invalid build.hxml : no Main class" )
-
-                    elif l.startswith("-lib") :
-                        spl = l.split(" ", 1)
-                        if len( spl ) == 2 :
-                            lib = HaxeLib.get( spl[1] )
-                            currentBuild.libs.append( lib )
-                            currentBuild.args.append( spl )
-                        else :
-                            sublime.status_message( "Invalid build.hxml : lib not found" )
-
-                    elif [l for flag in [ "cmd" , "-macro" ] if l.startswith( "-" + flag )] :
-                        spl = l.split(" ", 1)
-                        currentBuild.args.append( ( spl[0] , spl[1] ) )
-
-                    #elif l.startswith("--connect") and HaxeComplete.inst.serverMode :
-                    #   currentBuild.args.append( ( "--connect" , str(self.serverPort) ))
-
-                    elif [l for flag in [
-                        "D" ,
-                        "swf-version" ,
-                        "swf-header",
-                        "debug" ,
-                        "-no-traces" ,
-                        "-flash-use-stage" ,
-                        "-gen-hx-classes" ,
-                        "-remap" ,
-                        "-no-inline" ,
-                        "-no-opt" ,
-                        "-php-prefix" ,
-                        "-js-namespace" ,
-                        "-dead-code-elimination" ,
-                        "-remap" ,
-                        "-php-front" ,
-                        "-php-lib",
-                        "dce" ,
-                        "-js-modern" ,
-                        "swf-lib"
-                    ] if l.startswith( "-"+flag )]:
-                        currentBuild.args.append( l.split(" ", 1) )
-
-                    elif [l for flag in [ "resource" , "xml" , "java-lib" , "net-lib" ] if l.startswith( "-"+flag )] :
-                        spl = l.split(" ", 1)
-                        outp = os.path.join( buildPath , spl[1] )
-                        currentBuild.args.append( (spl[0] , outp) )
-
-                    #print(HaxeBuild.targets)
-                    elif [l for flag in HaxeBuild.targets if l.startswith( "-" + flag + " " )] :
-                        spl = l.split(" ", 1)
-                        #outp = os.path.join( folder , spl[1] )
-                        outp = spl[1]
-                        #currentBuild.args.append( ("-"+spl[0], outp) )
-                        currentBuild.target = spl[0][1:]
-                        currentBuild.output = outp
-                        currentBuild.args.append( ( spl[0] , outp ) )
-
-                    elif l.startswith( "--interp" ) :
-                        currentBuild.target = "--interp"
-                        currentBuild.output = ""
-                        currentBuild.args.append( ( "--interp", ) )
-
-                    elif l.startswith( "--run" ) :
-                        spl = l.split(" ", 1)
-                        #outp = os.path.join( folder , spl[1] )
-                        outp = spl[1]
-
-                        currentBuild.target = "--run"
-                        currentBuild.output = outp
-                        currentBuild.main = outp
-                        currentBuild.args.append( ( "--run" , outp ) )
-                        while lines:
-                            l = lines.pop(0).strip()
-                            if (not l) or l.startswith("#") : # an empty line or a comment
-                                continue
-                            currentBuild.args.append( (l,) )
-
-                    elif l.startswith("-cp "):
-                        cp = l.split(" ", 1)
-                        #view.set_status( "haxe-status" , "Building..." )
-                        classpath = cp[1]
-                        absClasspath = classpath#os.path.join( buildPath , classpath )
-                        currentBuild.classpaths.append( absClasspath )
-                        currentBuild.args.append( ("-cp" , absClasspath ) )
-
-                    elif l.endswith(".hxml"):
-                        _read_hxml(os.path.join(currentBuild.cwd, l), builds)
-
-                    elif re.match(r'[A-Za-z0-9_\.]+', l): # a haxe class
-                        currentBuild.args.append( (l,) )
-
-                    elif l:
-                        sublime.status_message("unknown compiler argument: " + l)
-
-                        # maybe there is a new compiler argument that we don't know,
-                        # so let's add the argument anyway
-                        currentBuild.args.append( (l,) )
-
-            return builds
-
-        builds = _read_hxml(build, [])
+        builds = []
+        for i, b in enumerate( parser.parse( build ) ) :
+            currentBuild = HaxeBuild()
+            currentBuild.key = ( build , i )
+            currentBuild.hxml = b.hxml
+            currentBuild.cwd = b.cwd
+            currentBuild.main = b.main
+            currentBuild.target = b.target
+            currentBuild.output = b.output
+            currentBuild.args = b.args
+            currentBuild.classpaths = b.classpaths
+            currentBuild.libs = [ HaxeLib.get( l ) for l in b.libs ]
+            builds.append( currentBuild )
+
+        for w in parser.warnings :
+            sublime.status_message( w )
 
         for build in builds:
             if len(build.classpaths) == 0:
@@ -928,31 +1119,67 @@ class HaxeComplete( sublime_plugin.EventListener ):
         return [build for build in builds if build.is_valid()]
 
     def add_build( self , build ) :
+        build = self.buildRegistry.intern( build )
+
         if build in self.builds :
             self.builds.remove( build )
 
         self.builds.insert( 0, build )
 
     def find_hxml( self, folder ) :
+        builds = []
         hxmls = glob.glob( os.path.join( folder , "*.hxml" ) )
 
         for build in hxmls:
-            for b in self.read_hxml( build ):
-                self.add_build( b )
+            builds.extend( self.read_hxml( build ) )
+
+        return builds
 
 
     def find_build_file( self , folder ) :
-        self.find_hxml(folder)
-        self.find_nmml(folder)
-        self.find_yaml(folder)
+        # the builds of a folder are reused until the folder or one of
+        # its build files changes, project file conditions depend on the
+        # NME target
+        key = ( folder , HaxeBuild.nme_target )
+        folderStat = file_stat( folder )
+        cached = self.discoveryCache.get( key )
+
+        if cached is not None and cached[0] == folderStat and \
+                [ file_stat( f ) for f in cached[1] ] == cached[2] :
+            return cached[3]
+
+        files = []
+        for pattern in self.buildFilePatterns :
+            files.extend( glob.glob( os.path.join( folder , pattern ) ) )
+        stats = [ file_stat( f ) for f in files ]
+
+        found = self.find_hxml( folder ) + self.find_nmml( folder ) + \
+            self.find_yaml( folder )
+
+        self.discoveryCache[ key ] = ( folderStat , files , stats , found )
+        return found
 
     def extract_build_args( self , view ,
             forcePanel = False , all_views = False ) :
         #print("extract build args")
-        self.builds = []
+        with self.discoveryLock :
+            builds , folder , project_folder = self.collect_builds( view )
+        self.apply_builds( view , builds , folder , project_folder ,
+            forcePanel , all_views )
+
+    def collect_builds( self , view ) :
+        # reads the builds of a view without touching the window state, so
+        # it can run on the discovery thread, returns them with the folder
+        # of the view and its project folder
+        builds = []
+
+        def add_build( build ) :
+            build = self.buildRegistry.intern( build )
+            if build in builds :
+                builds.remove( build )
+            builds.insert( 0, build )
 
         fn = view.file_name()
-        settings = view.settings()
         win = view.window()
         folder = None
         file_folder = None
@@ -983,7 +1210,7 @@ class HaxeComplete( sublime_plugin.EventListener ):
                         build = os.path.join( proj_path , build )
 
                 for b in self.read_hxml( build ) :
-                    self.add_build( b )
+                    add_build( b )
 
         else :
 
@@ -1004,7 +1231,16 @@ class HaxeComplete( sublime_plugin.EventListener ):
                     crawl_folders.append( f )
 
             for f in crawl_folders :
-                self.find_build_file( f )
+                for b in self.find_build_file( f ) :
+                    add_build( b )
+
+        return builds , folder , project_folder
+
+    def apply_builds( self , view , builds , folder , project_folder ,
+            forcePanel = False , all_views = False ) :
+        # main thread only
+        win = view.window()
+        self.builds = builds
 
         if len(self.builds) == 1:
             if forcePanel :
@@ -1043,14 +1279,18 @@ class HaxeComplete( sublime_plugin.EventListener ):
             sublime.status_message("Please select your build")
             show_quick_panel( view.window() , buildsView , lambda i : self.set_current_build(view, int(i), forcePanel, all_views) , sublime.MONOSPACE_FONT )
 
-        elif settings.has("haxe-build-id"):
-            self.set_current_build( view , int(settings.get("haxe-build-id")), forcePanel )
+        elif self.build_index( self.build_key( view ) ) is not None :
+            self.set_current_build( view , self.build_index( self.build_key( view ) ) , forcePanel )
 
         else:
             build_id = 0
             if project_folder is not None:
-                if project_folder in self.selected_build_id_map:
-                    build_id = self.selected_build_id_map[project_folder]
+                key = self.window_state( view ).selected.get( project_folder )
+                if key is None :
+                    key = self.saved_project_build( win , project_folder )
+
+                if self.build_index( key ) is not None :
+                    build_id = self.build_index( key )
                 else:
                     for i in range(0, len(self.builds)):
                         if project_folder in self.builds[i].hxml:
@@ -1058,6 +1298,40 @@ class HaxeComplete( sublime_plugin.EventListener ):
                             break
             self.set_current_build(view, build_id, forcePanel)
 
+    def build_key( self , view ) :
+        # the build of a view, also saved in its settings for next sessions
+        build = self.buildRegistry.view_build( view.id() )
+        if build is not None :
+            return build.key
+
+        key = view.settings().get( "haxe-build-key" )
+        if key is not None :
+            return tuple( key )
+
+        return None
+
+    def build_index( self , key ) :
+        if key is None :
+            return None
+
+        for i, b in enumerate( self.builds ) :
+            if b.key == key :
+                return i
+
+        return None
+
+    def saved_project_build( self , win , project_folder ) :
+        if win is None :
+            return None
+
+        for v in win.views() :
+            fn = v.file_name()
+            if fn is not None and project_folder + os.sep in fn and \
+                    v.settings().has( "haxe-build-key" ) :
+                return tuple( v.settings().get( "haxe-build-key" ) )
+
+        return None
+
 
     def set_current_build( self , view , id , forcePanel ,
             all_views = False ) :
@@ -1067,6 +1341,10 @@ class HaxeComplete( sublime_plugin.EventListener ):
         if id >= len(self.builds) :
             id = 0
 
+        build = None
+        if len(self.builds) > 0 :
+            build = self.builds[id]
+
         win = view.window()
         project_folder = None
         if forcePanel:
@@ -1075,21 +1353,26 @@ class HaxeComplete( sublime_plugin.EventListener ):
                 for f in win_folders:
                     if f + os.sep in view.file_name() :
                         project_folder = f
-            if project_folder is not None:
-                self.selected_build_id_map[project_folder] = id
+            if project_folder is not None and build is not None:
+                self.window_state( view ).selected[project_folder] = build.key
 
+        views = [ view ]
         if all_views and win is not None and project_folder is not None:
+            views = []
             for v in win.views():
                 if v.score_selector(0,'source.haxe.2') == 0:
                     continue
                 if project_folder + os.sep not in v.file_name():
                     continue
-                v.settings().set( "haxe-build-id" , id )
-        else:
-            view.settings().set( "haxe-build-id" , id )
+                views.append( v )
 
-        if len(self.builds) > 0 :
-            self.currentBuild = self.builds[id]
+        for v in views :
+            self.buildRegistry.set_view_build( v.id() , build )
+            if build is not None and build.key is not None :
+                v.settings().set( "haxe-build-key" , list( build.key ) )
+
+        if build is not None :
+            self.currentBuild = build
             view.set_status( "haxe-build" , self.currentBuild.to_string() )
         else:
             #self.currentBuild = None
@@ -1121,9 +1404,7 @@ class HaxeComplete( sublime_plugin.EventListener ):
                     if HaxeBuild.nme_target and \
                             bc.target != HaxeBuild.nme_target:
                         bc.target = HaxeBuild.nme_target
-                        args = self.extract_nme_completion_args(view)
-                        if args:
-                            self.currentBuild.args = args
+                        self.update_nme_args( view , self.currentBuild )
 
 
     def select_nme_target( self, i, view ):
@@ -1142,22 +1423,34 @@ class HaxeComplete( sublime_plugin.EventListener ):
             bc = self.build_cache[self.currentBuild.nmml]
             bc.target = HaxeBuild.nme_target
 
-        args = self.extract_nme_completion_args(view)
-        if args:
-            self.currentBuild.args = args
+        self.update_nme_args( view , self.currentBuild )
 
+    def update_nme_args( self , view , build ) :
+        # `haxelib run lime display` is slow, run it off the main thread
+        # when possible and set the args of the build once done
+        def update() :
+            args = self.extract_nme_completion_args( view , build )
+            if args :
+                def apply() :
+                    build.args = args
+                sublime.set_timeout( apply , 0 )
+
+        if self.discoveryExecutor is not None :
+            self.discoveryExecutor.submit( update )
+        else :
+            update()
 
-    def extract_nme_completion_args(self, view):
+    def extract_nme_completion_args(self, view, build):
         lib = 'nme'
-        if self.currentBuild.lime:
+        if build.lime:
             lib = 'lime'
-        elif self.currentBuild.openfl:
+        elif build.openfl:
             lib = 'openfl'
         target = HaxeBuild.nme_target[1].split(" ")[0]
 
         res, err = runcmd( [
             view.settings().get("haxelib_path" , "haxelib"),
-            'run', lib, 'display', self.currentBuild.nmml, target] )
+            'run', lib, 'display', build.nmml, target] )
 
         if err :
             return None
@@ -1219,7 +1512,11 @@ class HaxeComplete( sublime_plugin.EventListener ):
 
         return self.panel
 
-    def get_toplevel_completion( self , src , src_dir , build ) :
+    def get_toplevel_completion( self , src , src_dir , build ,
+            type_completion_only = None ) :
+        if type_completion_only is None :
+            type_completion_only = self.type_completion_only
+
         cl = []
         comps = [("trace","trace"),("this","this"),("super","super"),("else","else")]
 
@@ -1332,7 +1629,7 @@ class HaxeComplete( sublime_plugin.EventListener ):
                 if cm not in comps:
                     comps.append( cm )
 
-        if self.type_completion_only:
+        if type_completion_only:
             comps = []
 
         for c in cl :
@@ -1369,7 +1666,7 @@ class HaxeComplete( sublime_plugin.EventListener ):
             if cm not in comps and tarPkg is None or (top not in targetPackages) or (top == tarPkg) : #( build.target is None or (top not in HaxeBuild.targets) or (top == build.target) ) :
                 comps.append( cm )
 
-        if not self.type_completion_only:
+        if not type_completion_only:
             for p in packs :
                 cm = (p + "\tpackage",p)
                 if cm not in comps :
@@ -1379,10 +1676,7 @@ class HaxeComplete( sublime_plugin.EventListener ):
 
     def clear_build( self , view ) :
         self.currentBuild = None
-        self.currentCompletion = {
-            "inp" : None,
-            "outp" : None
-        }
+        self.completionCache.clear()
 
     def get_build( self , view ) :
 
@@ -1392,6 +1686,11 @@ class HaxeComplete( sublime_plugin.EventListener ):
         if win is None or fn is None :
             return
 
+        build = self.buildRegistry.view_build( view.id() )
+        if build is not None :
+            view.set_status( "haxe-build" , build.to_string() )
+            return build
+
         if fn is not None and self.currentBuild is None and view.score_selector(0,"source.haxe.2") > 0 :
 
             src_dir = os.path.dirname( fn )
@@ -1485,8 +1784,11 @@ class HaxeComplete( sublime_plugin.EventListener ):
 
         # Use the build server if available
         buildServerMode = view.settings().get('haxe_build_server_mode', True)
-        if self.serverMode and buildServerMode :
-            cmd += ["--haxe-server", str(HaxeComplete.inst.serverPort)]
+        server = self.server_available( view , "build" )
+        if not buildServerMode :
+            server = None
+        if server is not None :
+            cmd += ["--haxe-server", str(server[1])]
 
         cmdArgs = {
             "cmd": cmd,
@@ -1499,7 +1801,7 @@ class HaxeComplete( sublime_plugin.EventListener ):
         if int(sublime.version()) >= 3000:
             cmdArgs["syntax"] = "Packages/Haxe/Support/HaxeResults.hidden-tmLanguage"
 
-        view.window().run_command("exec", cmdArgs)
+        self.exec_build( view , cmdArgs , server )
         return ("" , [], "" )
 
     def init_plugin( self , view ) :
@@ -1509,28 +1811,10 @@ class HaxeComplete( sublime_plugin.EventListener ):
 
         self.inited = True
 
-        HaxeLib.scan( view )
-
         settings = view.settings()
         self.haxe_settings = sublime.load_settings(self.haxe_settings_file)
-        haxepath = settings.get("haxe_path","haxe")
-
-        #init selected_build_id_map
-        win = view.window()
-        if win is not None :
-            for v in win.views():
-                project_folder = None
-                win_folders = win.folders()
-                if not v.settings().has('haxe-build-id'):
-                    continue
 
-                for f in win_folders:
-                    if f + os.sep in v.file_name() :
-                        project_folder = f
-
-                if project_folder is not None:
-                    self.selected_build_id_map[project_folder] = \
-                        int(v.settings().get('haxe-build-id'))
+        self.completionCache.size = settings.get('haxe_completion_cache_size', 32)
 
         nme_target_idx = 0
         try:
@@ -1553,6 +1837,26 @@ class HaxeComplete( sublime_plugin.EventListener ):
             pass
         HaxeBuild.flambe_target = HaxeBuild.flambe_targets[flambe_target_idx]
 
+        if ThreadPoolExecutor is not None and int(sublime.version()) >= 3000 :
+            # don't freeze the editor while haxelib and haxe are queried
+            self.initExecutor = ThreadPoolExecutor( max_workers = 1 )
+            # builds are discovered while the std types are scanned
+            self.discoveryExecutor = ThreadPoolExecutor( max_workers = 1 )
+            self.compilerReady = self.initExecutor.submit(
+                self.init_compiler , view )
+            self.typesReady = self.initExecutor.submit(
+                self.init_std_types , view )
+            self.show_init_progress( view )
+        else :
+            self.init_compiler( view )
+            self.init_std_types( view )
+
+    def init_compiler( self , view ) :
+        HaxeLib.scan( view )
+
+        settings = view.settings()
+        haxepath = settings.get("haxe_path","haxe")
+
         out, err = runcmd( [haxepath, "-main", "Nothing", "-v", "--no-output"] )
 
         _, versionOut = runcmd([haxepath, "-v"])
@@ -1563,15 +1867,9 @@ class HaxeComplete( sublime_plugin.EventListener ):
 
         ver = re.search(haxeVersion , versionOut)
 
-        HaxeComplete.stdClasses = []
-        HaxeComplete.stdPackages = []
-
-        use_cache = view.settings().get('haxe_use_cache', True)
-        cached_std = None
-        cache_filename = None
-
         if ver is not None :
             self.compilerVersion = float(ver.group(3))
+            self.compilerVersionName = ver.group(2)
 
             if self.compilerVersion >= 3 :
                 HaxeBuild.targets.append("swf8")
@@ -1580,73 +1878,257 @@ class HaxeComplete( sublime_plugin.EventListener ):
 
             self.serverMode = float(ver.group(3)) * 100 >= 209
 
+        buildServerMode = settings.get('haxe_build_server_mode', True)
+        completionServerMode = settings.get('haxe_completion_server_mode',True)
+
+        self.serverMode = self.serverMode and (buildServerMode or completionServerMode)
+
+        self.start_server( view )
+
+    def init_std_types( self , view ) :
+        stdClasses = []
+        stdPackages = []
+
+        use_cache = view.settings().get('haxe_use_cache', True)
+        cached_std = None
+        cache_filename = None
+
+        if self.compilerVersionName is not None :
             if use_cache:
-                cache_filename = 'haxe_%s.cache' % ver.group(2)
-                cached_std = cache(cache_filename)
+                cache_filename = 'haxe_%s.cache' % self.compilerVersionName
+                std_fingerprint = tree_fingerprint(
+                    [ p for p in HaxeComplete.stdPaths
+                        if len(p) > 1 and os.path.isdir(p) ] ,
+                    self.classpathExclude )
+                cached_std = read_types_cache( cache_filename , std_fingerprint )
             if cached_std is not None:
-                cp = cached_std.split(';')
-                HaxeComplete.stdClasses.extend( cp[0].split(',') )
-                HaxeComplete.stdPackages.extend( cp[1].split(',') )
+                stdClasses.extend( cached_std[0] )
+                stdPackages.extend( cached_std[1] )
 
         if cached_std is None:
-            for p in HaxeComplete.stdPaths :
+            jobs = []
+            for p in sorted( HaxeComplete.stdPaths ) :
                 #print("std path : "+p)
                 if len(p) > 1 and os.path.exists(p) and os.path.isdir(p):
-                    classes, packs = self.extract_types( p )
-                    HaxeComplete.stdClasses.extend( classes )
-                    HaxeComplete.stdPackages.extend( packs )
+                    jobs.append( ( p , None ) )
+
+            for classes, packs in self.extract_types_parallel( jobs ) :
+                stdClasses.extend( classes )
+                stdPackages.extend( packs )
 
             if cache_filename is not None and use_cache:
-                cached_std = ';'.join(
-                    (','.join(HaxeComplete.stdClasses),
-                    ','.join(HaxeComplete.stdPackages)))
-                cache(cache_filename, cached_std)
+                write_types_cache( cache_filename , std_fingerprint ,
+                    stdClasses , stdPackages )
 
-        buildServerMode = settings.get('haxe_build_server_mode', True)
-        completionServerMode = settings.get('haxe_completion_server_mode',True)
+        HaxeComplete.stdClasses = stdClasses
+        HaxeComplete.stdPackages = stdPackages
 
-        self.serverMode = self.serverMode and (buildServerMode or completionServerMode)
+    def show_init_progress( self , view , i = 0 ) :
+        if self.typesReady.done() :
+            view.erase_status( "haxe-init" )
+            return
 
-        self.start_server( view )
+        if self.compilerReady.done() :
+            text = "Haxe : indexing std types"
+        else :
+            text = "Haxe : starting"
+        view.set_status( "haxe-init" , text + "." * ( i % 4 ) )
 
-    def start_server( self , view = None ) :
-        #self.stop_server()
-        if self.serverMode and self.serverProc is None :
-            try:
-                # env = os.environ.copy()
-                merged_env = get_env(True)
+        sublime.set_timeout( lambda : self.show_init_progress( view , i + 1 ) , 250 )
 
-                if view is not None :
-                    haxepath = view.settings().get("haxe_path" , "haxe")
+    def compiler_ready( self ) :
+        # the compiler version is known and the servers started, run_haxe
+        # doesn't wait for it: it compiles without the server until then
+        return self.compilerReady is None or self.compilerReady.done()
 
-                self.serverPort+=1
-                cmd = [haxepath , "--wait" , str(self.serverPort) ]
-                print("Starting Haxe server on port "+str(self.serverPort))
+    def types_ready( self ) :
+        return self.typesReady is None or self.typesReady.done()
 
-                #self.serverProc = Popen(cmd, env=env , startupinfo=STARTUP_INFO)
-                self.serverProc = Popen(cmd, env = merged_env, startupinfo=STARTUP_INFO)
-                self.serverProc.poll()
+    def start_server( self , view = None ) :
+        if not self.serverMode :
+            return
 
-            except(OSError, ValueError) as e:
-                err = u'Error starting Haxe server %s: %s' % (" ".join(cmd), e)
-                sublime.error_message(err)
+        haxepath = "haxe"
+        settings = sublime.load_settings("Haxe.sublime-settings")
+        if view is not None :
+            settings = view.settings()
+            haxepath = settings.get("haxe_path" , "haxe")
+
+        # completion and builds get their own servers, as a server handles
+        # one request at a time and builds can take a while
+        counts = {}
+        if settings.get('haxe_completion_server_mode', True) :
+            counts["display"] = settings.get("haxe_completion_servers", 1)
+        if settings.get('haxe_build_server_mode', True) :
+            counts["build"] = settings.get("haxe_build_servers", 1)
+
+        # completion threads can get here at the same time
+        with self.serverPoolsLock :
+            for kind in counts :
+                if ( haxepath , kind ) not in self.serverPools :
+                    pool = ServerPool( counts[kind] ,
+                        lambda : self.make_server_supervisor( haxepath , settings , kind ) )
+                    self.serverPools[( haxepath , kind )] = pool
+                    pool.start()
+
+    def make_server_supervisor( self , haxepath , settings , kind ) :
+        merged_env = get_env(True)
+
+        def spawn( port ) :
+            cmd = [haxepath , "--wait" , str(port) ]
+            print("Starting Haxe server on port "+str(port))
+            return Popen(cmd, env = merged_env, startupinfo=STARTUP_INFO)
+
+        def log( msg ) :
+            print( msg )
+
+        def warm_up( port ) :
+            sublime.set_timeout( lambda : self.warm_up_window(
+                sublime.active_window() ) , 0 )
+
+        # the server is started and restarted in the background, requests
+        # are compiled without it until it answers
+        return ServerSupervisor( spawn ,
+            pool_size = settings.get("haxe_server_pool_size", 2) ,
+            ping_interval = settings.get("haxe_server_ping_interval", 10) ,
+            ping_timeout = settings.get("haxe_server_ping_timeout", 5) ,
+            log = log , on_ready = warm_up if kind == "display" else None ,
+            memory_limit = settings.get("haxe_server_memory_limit", 4096) * 1024 * 1024 ,
+            request_timeout = settings.get("haxe_server_request_timeout", 60) )
 
     def stop_server( self ) :
+        with self.serverPoolsLock :
+            pools = list( self.serverPools.values() )
+            self.serverPools = {}
 
-        if self.serverProc is not None :
-            self.serverProc.terminate()
-            self.serverProc.kill()
-            self.serverProc.wait()
+        for pool in pools :
+            pool.stop()
 
-        self.serverProc = None
-        del self.serverProc
+    def server_available( self , view , kind ) :
+        # (supervisor, port, client) of a running server for `kind`
+        # requests ("display" or "build"), if any
+        if not self.serverMode :
+            return None
 
+        haxepath = view.settings().get("haxe_path" , "haxe")
+        pool = self.serverPools.get( ( haxepath , kind ) )
+        if pool is None :
+            # a project using another compiler gets its own servers
+            self.start_server( view )
+            return None
+        return pool.available()
 
-    def run_haxe( self, view , display = None, haxe_args = None) :
+    def warm_up_window( self , win ) :
+        if win is None :
+            return
 
-        self.init_plugin( view )
+        views = [ win.active_view() ] + win.views()
+        for v in views :
+            if v is not None and v.file_name() is not None and \
+                    v.score_selector(0,'source.haxe.2') > 0 :
+                self.warm_up( v )
+                return
+
+    def warm_up( self , view ) :
+        # types the build in the completion server in the background, so
+        # the first completion doesn't pay for a cold server
+        if not view.settings().get( "haxe_server_warm_up" , True ) :
+            return
 
         build = self.get_build( view )
+        if build is None or build.main is None or build.yaml is not None :
+            return
+
+        server = self.server_available( view , "display" )
+        if server is None :
+            return
+
+        key = ( "warm-up" , server[1] , id( build ) )
+        if key in self.warmedUp :
+            return
+        self.warmedUp.add( key )
+
+        cwd = build.cwd
+        if cwd is None :
+            cwd = os.path.dirname( build.hxml )
+
+        main = None
+        rel = build.main.replace( "." , os.sep ) + ".hx"
+        for cp in build.classpaths + [ "" ] :
+            path = os.path.join( cwd , cp , rel )
+            if os.path.isfile( path ) :
+                main = path
+                break
+        if main is None :
+            return
+
+        display_arg = main + "@0"
+        if self.compilerVersion >= 3.2 :
+            display_arg += "@position"
+
+        # the same defines as completion requests, to share their cache
+        args = [ "--cwd" , cwd , "--display" , display_arg ,
+            "-D" , "st_display" , "--no-output" ]
+        for a in build.args :
+            args.extend( a )
+
+        supervisor, port, client = server
+        # sent again to the server that replaces this one when recycled
+        supervisor.warm_args = args
+
+        def run( request ) :
+            token = supervisor.begin()
+            try :
+                return client.request( args , None , request.track )
+            finally :
+                supervisor.end( token )
+
+        def done( request , result ) :
+            if result is not None and result[2] :
+                # the build doesn't compile yet, warm up again next time
+                self.warmedUp.discard( key )
+
+        self.completionWorker.submit( CompletionRequest(
+            key , None , 0 , run , done , background = True ) )
+
+    def server_usage( self ) :
+        # (kind, port, rss, cpu, restarts, recycles) of every server
+        usage = []
+        for ( haxepath , kind ) , pool in sorted( self.serverPools.items() ) :
+            for supervisor in pool.supervisors :
+                port, rss, cpu = supervisor.usage()
+                usage.append( ( kind , port , rss , cpu ,
+                    supervisor.restarts , supervisor.recycles ) )
+        return usage
+
+    def exec_build( self , view , cmdArgs , server ) :
+        # a build sent to a server keeps it busy until haxe_exec releases
+        # it, when the build finishes, is killed or fails to start, so
+        # pings don't time out meanwhile
+        if server is not None :
+            HaxeExecCommand.nextServerBuild = ( server[0] , server[0].begin() )
+        try :
+            view.window().run_command( "haxe_exec" , cmdArgs )
+        finally :
+            # the command didn't run
+            pending = HaxeExecCommand.nextServerBuild
+            HaxeExecCommand.nextServerBuild = None
+            if pending is not None :
+                pending[0].end( pending[1] )
+
+
+    def run_haxe( self, view , display = None, haxe_args = None) :
+
+        self.init_plugin( view )
+        ready = self.compiler_ready()
+
+        # requests sent from other threads carry the build, resolved on
+        # the main thread
+        build = None
+        if display is not None :
+            build = display.get( "build" )
+        if build is None :
+            build = self.get_build( view )
         settings = view.settings()
 
         autocomplete = display is not None
@@ -1663,6 +2145,7 @@ class HaxeComplete( sublime_plugin.EventListener ):
 
         comps = []
         args = []
+        stdin = None
 
 
         cwd = build.cwd
@@ -1674,13 +2157,25 @@ class HaxeComplete( sublime_plugin.EventListener ):
         buildServerMode = settings.get('haxe_build_server_mode', True)
         completionServerMode = settings.get('haxe_completion_server_mode',True)
 
-        if self.serverMode and (
+        rpc = autocomplete and ready and \
+            self.use_json_rpc( view , display["mode"] )
+
+        connected = False
+        server = None
+        if not ready :
+            pass
+        elif autocomplete :
+            server = self.server_available( view , "display" )
+        else :
+            server = self.server_available( view , "build" )
+        if server is not None and (
                     ( completionServerMode and autocomplete ) or
                     ( buildServerMode and not autocomplete )
                 ) and (
                     not display or 'serverMode' not in display or
                     display['serverMode'] ):
-            args.append(("--connect" , str(HaxeComplete.inst.serverPort)))
+            args.append(("--connect" , str(server[1])))
+            connected = True
         args.append(("--cwd" , cwd ))
         #args.append( ("--times" , "-v" ) )
 
@@ -1689,16 +2184,28 @@ class HaxeComplete( sublime_plugin.EventListener ):
             #args.append( ("--times" , "-v" ) )
         else:
 
-            display_arg = display["filename"] + "@" + str( display["offset"] )
-            if display["mode"] is not None :
-                display_arg += "@" + display["mode"]
+            if display["filename"] == fn and display.get("stdin", True) and \
+                    self.use_display_stdin( view ) :
+                # the compiler reads the unsaved buffer from stdin
+                stdin = view.substr(sublime.Region(0, view.size()))
+
+            if rpc :
+                display_arg = display_rpc.display_request( display["mode"] ,
+                    display["filename"] , display["offset"] , stdin )
+            else :
+                display_arg = display["filename"] + "@" + str( display["offset"] )
+                if display["mode"] is not None :
+                    display_arg += "@" + display["mode"]
 
             args.append( ("--display", display_arg ) )
             args.append( ("-D", "st_display" ) )
 
+            if stdin is not None :
+                args.append( ("-D", "display-stdin") )
+
             if build.yaml is not None :
                 # Call out to `flambe haxe-flags` for Flambe completion
-                res, err = runcmd( ["flambe","--config" , build.yaml, "haxe-flags"] )
+                res, err = self.flambeFlags.get( build.yaml )
                 if err :
                     print("Flambe completion error: " + err)
                 else:
@@ -1741,17 +2248,58 @@ class HaxeComplete( sublime_plugin.EventListener ):
 
             env = get_env()
 
-            view.window().run_command("haxe_exec", {
+            self.exec_build( view , {
                 "cmd": encoded_cmd,
                 "working_dir": cwd,
                 "file_regex": haxeFileRegex,
                 "env" : env
-            })
+            } , server if connected else None )
             return ("" , [], "" )
 
 
         # print(" ".join(cmd))
-        res, err = runcmd( cmd, "" )
+        # background completions can be cancelled while the compiler runs
+        request = display.get("request")
+        track = None
+        if request is not None :
+            track = request.track
+
+        timings = display.get("timings")
+        ownTimings = timings is None
+        if ownTimings :
+            timings = completionStats.begin( display["mode"] )
+
+        def finish( result ) :
+            if ownTimings :
+                completionStats.end( timings )
+            return result
+
+        out = None
+        if connected :
+            supervisor = server[0]
+            token = supervisor.begin()
+        try :
+            if connected and settings.get('haxe_server_socket', True) :
+                # talk to the server directly instead of spawning `haxe --connect`
+                with timings.span( "server" ) :
+                    out = server[2].request( strip_connect( cmd )[1:] ,
+                        stdin , track )
+                if out is None and request is not None and request.cancelled :
+                    out = ("", "", False)
+                elif out is None :
+                    # server unreachable, compile without it
+                    supervisor.report( "dropped a request" )
+                    cmd = strip_connect( cmd )
+
+            if out is None :
+                with timings.span( "runcmd" ) :
+                    # the exit code isn't known, errors are found in err
+                    out = runcmd( cmd, stdin or "", track ) + ( False , )
+        finally :
+            if connected :
+                supervisor.end( token )
+
+        res, err, failed = out
 
         if not autocomplete :
             self.panel_output( view , " ".join(cmd) )
@@ -1763,7 +2311,6 @@ class HaxeComplete( sublime_plugin.EventListener ):
         hints = []
         fields = []
         msg = ""
-        tree = None
         pos = None
 
         commas = 0
@@ -1772,125 +2319,71 @@ class HaxeComplete( sublime_plugin.EventListener ):
 
         mode = display["mode"]
 
-        if int(sublime.version()) >= 3000 :
-            x = "<root>"+err+"</root>"
-        else :
-            x = "<root>"+err.encode("ASCII",'ignore')+"</root>"
-
-        try :
-            tree = ElementTree.XML(x);
+        with timings.span( "parse" ) :
+            if rpc :
+                response, err = display_rpc.parse_reply( err or res )
+            elif int(sublime.version()) >= 3000 :
+                response = parse_display( err )
+            else :
+                response = parse_display( err.encode("ASCII",'ignore') )
 
-        except Exception as e :
-            print(e)
+        if response.error is not None :
+            print(response.error)
             print("invalid xml")
 
-        if tree is not None :
-            for i in tree.getiterator("type") :
-                hint = i.text.strip()
-                params, ret = parse_sig(hint)
-
-                if mode == "type":
-                    hint = ret
-                    if params:
-                        hint = ','.join(params)
-                        hint = '(%s):%s' % (hint, ret)
-                    return hint
-
-                msg = "";
-
-                if params is not None and commas >= len(params) :
-                    if commas == 0 or hint == "Dynamic" :
-                        msg = hint + ": No autocompletion available"
-                        #view.window().run_command("hide_auto_complete")
-                        #comps.append((")",""))
-                    else :
-                        msg =  "Too many arguments."
-                else :
-                    if params is None:
-                        pass
-                    else:
-                        hints = params[commas:]
-                        #print(hints)
-                        if len(hints) == 0 :
-                            msg = "Void"
-                        else :
-                            msg = ", ".join(hints)
-
-            status = msg
-
-            # This will attempt to get the full name of what we're trying to complete.
-            # E.g. we type in self.blarg.herp(), this will get "self.blarg".
-            fn_name = self.get_current_fn_name(view, view.sel()[0].end())
-
-            pos = tree.findtext("pos")
-            li = tree.find("list")
-
-            if li is None:
-                li = tree.find("il")
-
-            if li is not None :
-
-                pos = li.findtext("pos")
-
-                for i in li.getiterator("i"):
-                    name = i.get("n")
-                    if name is None:
-                        name = i.text
+        for hint in response.types :
+            params, ret = parse_sig(hint)
 
-                    t = i.find("t")
-                    if t is not None:
-                        sig = t.text
-                    else:
-                        sig = i.get("t")
+            if mode == "type":
+                hint = ret
+                if params:
+                    hint = ','.join(params)
+                    hint = '(%s):%s' % (hint, ret)
+                return finish( hint )
 
-                    # if sig is None:
-                    #     sig = i.get("p")
+            msg = "";
 
-                    d = i.find("d")
-                    if d is not None:
-                        doc = d.text
-                    else:
-                        doc = "No Doc"
-
-                    #if doc is None: doc = "No documentation found."
-                    insert = name
-                    hint = name
-                    doc_data = { 'hint' : name , 'doc' : doc }
-                    documentationStore[fn_name + "." + name] = doc_data
+            if params is not None and commas >= len(params) :
+                if commas == 0 or hint == "Dynamic" :
+                    msg = hint + ": No autocompletion available"
+                    #view.window().run_command("hide_auto_complete")
+                    #comps.append((")",""))
+                else :
+                    msg =  "Too many arguments."
+            else :
+                if params is None:
+                    pass
+                else:
+                    hints = params[commas:]
+                    #print(hints)
+                    if len(hints) == 0 :
+                        msg = "Void"
+                    else :
+                        msg = ", ".join(hints)
 
-                    if sig is not None :
+        status = msg
 
-                        params, ret = parse_sig(sig)
-                        fields.append((name, params, ret))
+        pos = response.pos
+        listStart = clock()
 
-                        if params is not None :
-                            cm = name
-                            hint = name + "( " + " , ".join( params ) + " )\t" + ret
-                            doc_data['hint'] = hint # update before compacting
+        if response.has_list :
 
-                            if len(hint) > 40: # compact arguments
-                                hint = compactFunc.sub("(...)", hint);
-                            insert = cm
-                        else :
-                            hint = name + "\t" + ret
-                            doc_data['hint'] = hint
-                    else :
-                        if re.match("^[A-Z]",name ) :
-                            hint = name + "\tclass"
-                        else :
-                            hint = name + "\tpackage"
-                        doc_data['hint'] = hint
+            pos = response.list_pos
 
-                    #if doc is not None :
-                    #   hint += "\t" + doc
-                    #   print(doc)
+            # This will attempt to get the full name of what we're trying to complete.
+            # E.g. we type in self.blarg.herp(), this will get "self.blarg".
+            if response.items :
+                fn_name = self.get_current_fn_name(view, view.sel()[0].end())
 
-                    if len(hint) > 40: # compact return type
-                        m = compactProp.search(hint)
-                        if not m is None:
-                            hint = compactProp.sub(": " + m.group(1), hint)
+            for item in response.items :
+                # the signature is parsed and the hint built once shown,
+                # see completion_entries
+                documentationStore[fn_name + "." + item.name] = item
+                comps.append( item )
+                if item.sig is not None :
+                    fields.append( item )
 
-                    comps.append( ( hint, insert ) )
+        timings.add( "list" , clock() - listStart )
 
         if len(hints) == 0 and len(comps) == 0:
             err = re.sub( u"\(display(.*)\)" ,"",err)
@@ -1908,15 +2401,19 @@ class HaxeComplete( sublime_plugin.EventListener ):
 
             extract_errors( err, cwd )
             highlight_errors( view, 5000 )
+        elif failed :
+            # the server flagged errors next to a partial result
+            extract_errors( err, cwd )
+            highlight_errors( view, 5000 )
 
         # print(comps)
         if mode == "type":
-            return None # this should have returned earlier
+            return finish( None ) # this should have returned earlier
 
         if mode == "position":
-            return pos
+            return finish( pos )
 
-        return ( err, comps, status, hints, fields )
+        return finish( ( err, comps, status, hints, fields ) )
 
     def on_query_completions(self, view, prefix, locations):
         
@@ -1951,15 +2448,57 @@ class HaxeComplete( sublime_plugin.EventListener ):
             if view.file_name().endswith(".hxsl") :
                 comps = self.get_hxsl_completions( view , offset )
             else :
-                comps,hints = self.get_haxe_completions( view , offset )
+                comps,hints = self.get_haxe_completions( view , offset ,
+                    async_request=True , prefix=prefix )
 
         return comps
 
 
+    def use_json_rpc( self , view , mode ) :
+        # Haxe 4 has a JSON-RPC display protocol with typed replies
+        return display_rpc.supports( self.compilerVersion , mode ) and \
+            view.settings().get('haxe_display_json_rpc', True)
+
+    def invalidate_file( self , view , fn ) :
+        # lets completion servers drop the modules of a saved file
+        # instead of checking every file at each request
+        if not self.use_json_rpc( view , None ) :
+            return
+
+        servers = []
+        pool = self.serverPools.get( ( view.settings().get("haxe_path" , "haxe") , "display" ) )
+        if pool is not None :
+            for supervisor in pool.supervisors :
+                server = supervisor.available()
+                if server is not None :
+                    servers.append( server[1] )
+
+        if not servers :
+            return
+
+        args = [ "--display" , display_rpc.invalidate_arg( fn ) ]
+
+        def invalidate() :
+            for client in servers :
+                client.request( args )
+
+        t = threading.Thread( target = invalidate )
+        t.daemon = True
+        t.start()
+
+    def use_display_stdin( self , view ) :
+        # Haxe 4 can read the display file from stdin (-D display-stdin)
+        return self.compilerVersion >= 4 and \
+            view.settings().get('haxe_display_stdin', True)
+
     def save_temp_file( self , view , force=False ) :
         if not view.is_dirty() and not force:
             return None
 
+        if not force and self.use_display_stdin( view ):
+            # run_haxe sends the buffer through stdin, leave the file alone
+            return None
+
         fn = view.file_name()
 
         tdir = os.path.dirname(fn)
@@ -2021,7 +2560,56 @@ class HaxeComplete( sublime_plugin.EventListener ):
         return fn_name
 
 
-    def get_haxe_completions( self , view , offset , ignoreTopLevel=False ):
+    def use_async_completion( self , view ) :
+        # the API can't be used from other threads before Sublime Text 3
+        return int(sublime.version()) >= 3000 and \
+            view.settings().get('haxe_async_completion', True)
+
+    def request_completion( self , view , key , offset , before ,
+            prefix_hash , compute ) :
+        def done( request , outp ) :
+            sublime.set_timeout(
+                lambda : self.on_completion_ready( view , request , outp ) , 0 )
+
+        request = CompletionRequest(
+            key , key[0] , view.change_count() , compute , done )
+        request.view_id = view.id()
+        request.offset = offset
+        request.before = before
+        request.prefix_hash = prefix_hash
+        self.completionWorker.submit( request )
+
+    def on_completion_ready( self , view , request , outp ) :
+        if request.cancelled or outp is None :
+            return
+
+        self.completionCache.put( request.key , request.change_count ,
+            request.prefix_hash , outp )
+
+        # reopen the popup if the caret is still on the requested completion
+        win = view.window()
+        if win is None or win.active_view() is None or \
+                win.active_view().id() != request.view_id :
+            return
+
+        sel = view.sel()
+        if len(sel) == 0 :
+            return
+
+        caret = sel[0].end()
+        offset = request.offset
+        if caret < offset or \
+                view.substr(sublime.Region(max(0, offset-64), offset)) != request.before or \
+                not identChars.match( view.substr(sublime.Region(offset, caret)) ) :
+            return
+
+        view.run_command( "haxe_display_completion" , {
+            "type_completion" : request.key[4],
+            "hide" : True
+        } )
+
+    def get_haxe_completions( self , view , offset , ignoreTopLevel=False ,
+            async_request=False , prefix="" ):
         # print("OFFSET");
         # print(offset);
         src = view.substr(sublime.Region(0, view.size()))
@@ -2115,34 +2703,74 @@ class HaxeComplete( sublime_plugin.EventListener ):
         #if toplevelComplete and (inControlStruct or completeChar not in "(,") :
         #    return comps,hints
 
-        inp = (fn,offset,commas,src[0:offset-1],mode,self.type_completion_only)
-        if (self.currentCompletion["inp"] is None or
-                inp != self.currentCompletion["inp"]) :
+        type_completion_only = self.type_completion_only
+
+        show_timings = view.settings().get('haxe_completion_timings_status', False)
+
+        def compute( request = None ) :
             ret = ''
             status = ''
             hints = []
             haxeComps = []
+            outComps = comps
+            timings = completionStats.begin( mode )
 
-            if not self.type_completion_only:
-                temp = self.save_temp_file( view )
+            if not type_completion_only:
+                with timings.span( "save_temp" ) :
+                    temp = self.save_temp_file( view )
                 byte_offset = len(codecs.encode(src[0:offset], "utf-8"))
-                ret , haxeComps , status , hints , _ = self.run_haxe( view , { "filename" : fn , "offset" : byte_offset , "commas" : commas , "mode" : mode })
-                self.clear_temp_file( view , temp )
+                ret , haxeComps , status , hints , _ = self.run_haxe( view , { "filename" : fn , "offset" : byte_offset , "commas" : commas , "mode" : mode , "request" : request , "timings" : timings })
+                with timings.span( "clear_temp" ) :
+                    self.clear_temp_file( view , temp )
 
+            # compiler completions only until the std types are indexed
             if (toplevelComplete and len(haxeComps) == 0 or
-                    self.type_completion_only):
-                haxeComps = self.get_toplevel_completion(
-                    src , src_dir , self.get_build( view ) )
+                    type_completion_only) and self.types_ready():
+                with timings.span( "toplevel" ) :
+                    haxeComps = self.get_toplevel_completion(
+                        src , src_dir , self.get_build( view ) ,
+                        type_completion_only )
 
             if (toplevelComplete or completeChar not in "(," or
-                    self.type_completion_only):
-                comps = haxeComps
+                    type_completion_only):
+                outComps = haxeComps
 
-            self.currentCompletion["outp"] = (ret,comps,status,hints)
-        else :
-            ret, comps, status , hints = self.currentCompletion["outp"]
+            completionStats.end( timings )
+            if show_timings :
+                text = timings.breakdown()
+                sublime.set_timeout(
+                    lambda : view.set_status( "haxe-timings" , text ) , 0 )
 
-        self.currentCompletion["inp"] = inp
+            return (ret,outComps,status,hints)
+
+        def prefix_hash() :
+            return hashlib.md5(
+                codecs.encode(src[0:offset-1], "utf-8")).hexdigest()
+
+        buildKey = None
+        build = self.get_build( view )
+        if build is not None :
+            buildKey = build.cache_key()
+        key = (fn,offset,commas,mode,type_completion_only,buildKey)
+        change_count = view.change_count()
+        outp = self.completionCache.get( key , change_count , prefix_hash )
+        if outp is None :
+            if async_request and self.use_async_completion( view ) :
+                # answer later, the popup is reopened when results arrive
+                self.request_completion( view , key , offset ,
+                    src[max(0, offset-64):offset] , prefix_hash() , compute )
+                return [],[]
+
+            outp = compute()
+            self.completionCache.put( key , change_count , prefix_hash() , outp )
+
+        ret, comps, status , hints = outp
+
+        # the fields after a dot don't change while an identifier is typed,
+        # narrow the cached list instead of asking the compiler again
+        if mode is None and completeChar == "." and prefix :
+            comps = filter_completions( comps , prefix )
+        comps = completion_entries( comps )
 
         #print(ret)
         #print(status)
@@ -2219,7 +2847,7 @@ class HaxeShowDocumentation( sublime_plugin.TextCommand ) :
 
         doc_data = documentationStore[fn_name]
 
-        hint = doc_data['hint'].split("\t")
+        hint = item_hint( doc_data ).split("\t")
 
         if( hint[1] == 'class' ) :
             hint_text = hint[1] + " " + hint[0]
@@ -2232,8 +2860,8 @@ class HaxeShowDocumentation( sublime_plugin.TextCommand ) :
 
         documentation_lines = []
 
-        if doc_data['doc'] is not None :
-            documentation_lines = doc_data['doc'].split("\n")
+        if doc_data.doc is not None :
+            documentation_lines = doc_data.doc.split("\n")
         else :
             documentation_lines = ["","No documentation.",""]
 
@@ -2259,21 +2887,57 @@ class HaxeShowDocumentation( sublime_plugin.TextCommand ) :
 
 
 class HaxeExecCommand(ExecCommand):
+    # (supervisor, token) of the server the next build is sent to, set
+    # by HaxeComplete.exec_build right before running the command
+    nextServerBuild = None
+    serverBuild = None
+    serverProc = None
+
+    def release_server(self, proc = None):
+        # ends the server request of the build, only if it belongs to
+        # `proc` when given
+        if self.serverBuild is None :
+            return
+        if proc is not None and proc is not self.serverProc :
+            return
+        supervisor, token = self.serverBuild
+        self.serverBuild = None
+        self.serverProc = None
+        supervisor.end( token )
+
     def finish(self, *args, **kwargs):
-        super(HaxeExecCommand, self).finish(*args, **kwargs)
-        outp = self.output_view.substr(sublime.Region(0, self.output_view.size()))
-        hc = HaxeComplete.inst
-        extract_errors(
-            outp, self.output_view.settings().get("result_base_dir") )
-        highlight_errors( self.window.active_view() )
-
-    def run(self, cmd = [],  shell_cmd = None, file_regex = "", line_regex = "", working_dir = "",
+        try :
+            super(HaxeExecCommand, self).finish(*args, **kwargs)
+            outp = self.output_view.substr(sublime.Region(0, self.output_view.size()))
+            extract_errors(
+                outp, self.output_view.settings().get("result_base_dir") )
+            highlight_errors( self.window.active_view() )
+        finally :
+            proc = None
+            if args :
+                proc = args[0]
+            self.release_server( proc )
+
+    def run(self, **kwargs):
+        # a new build replaces the running one
+        self.release_server()
+        if not kwargs.get("kill", False) :
+            self.serverBuild = HaxeExecCommand.nextServerBuild
+            HaxeExecCommand.nextServerBuild = None
+
+        try :
+            self.start_build(**kwargs)
+        finally :
+            if self.serverProc is None :
+                # the build didn't start, nothing will finish it
+                self.release_server()
+
+    def start_build(self, cmd = [],  shell_cmd = None, file_regex = "", line_regex = "", working_dir = "",
             encoding = None, env = {}, quiet = False, kill = False,
             word_wrap = True,
             # Catches "path" and "shell"
             **kwargs):
 
-
         if int(sublime.version()) >= 3080:
             # clear the text_queue
             self.text_queue_lock.acquire()
@@ -2376,6 +3040,7 @@ class HaxeExecCommand(ExecCommand):
             else :
 
                 self.proc = AsyncProcess([c.encode(sys.getfilesystemencoding()) for c in cmd], merged_env, self, **kwargs)
+            self.serverProc = self.proc
         except err_type as e:
             self.append_data(None, str(e) + "\n")
             self.append_data(None, "[cmd:  " + str(cmd) + "]\n")
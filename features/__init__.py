@@ -23,6 +23,7 @@ from .haxe_fix_module import HaxeFixModule
 from .haxe_refactor import HaxeRefactor
 from .haxe_promote_var import HaxePromoteVar, HaxePromoteVarEdit
 from .haxe_usage import HaxeUsage
+from .haxe_stats import HaxeCompletionStats
 from .haxe_helper import *
 from .haxe_errors import *
 
@@ -0,0 +1,78 @@
+import threading
+
+
+class WindowBuilds(object):
+
+    def __init__(self):
+        self.builds = []
+        self.current = None
+        # project folder -> key of the build selected for it
+        self.selected = {}
+
+
+class BuildRegistry(object):
+    """
+    Builds known to the plugin.
+
+    Every window has its own list of builds and current build, but a
+    build is shared by all windows through its key, (build file, --next
+    index), so the types indexed for it survive window switches. Views
+    are mapped to the key of their build.
+    """
+
+    def __init__(self):
+        self.windows = {}
+        self.builds = {}
+        self.views = {}
+        self.lock = threading.Lock()
+
+    def window(self, window_id):
+        with self.lock:
+            state = self.windows.get(window_id)
+            if state is None:
+                state = self.windows[window_id] = WindowBuilds()
+            return state
+
+    def intern(self, build):
+        """
+        Returns the registered build with the key of `build`, unless the
+        build file changed it, in which case `build` replaces it.
+        """
+        if build.key is None:
+            return build
+
+        with self.lock:
+            known = self.builds.get(build.key)
+            if known is not None and (
+                    known is build or known.signature() == build.signature()):
+                return known
+
+            self.builds[build.key] = build
+            return build
+
+    def get(self, key):
+        with self.lock:
+            return self.builds.get(key)
+
+    def set_view_build(self, view_id, build):
+        with self.lock:
+            if build is None or build.key is None:
+                self.views.pop(view_id, None)
+            else:
+                self.views[view_id] = build.key
+
+    def view_build(self, view_id):
+        with self.lock:
+            key = self.views.get(view_id)
+            if key is None:
+                return None
+            return self.builds.get(key)
+
+    def forget_view(self, view_id):
+        with self.lock:
+            self.views.pop(view_id, None)
+
+    def clear_views(self):
+        # views pick their build again, from their saved key
+        with self.lock:
+            self.views = {}
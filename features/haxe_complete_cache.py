@@ -0,0 +1,63 @@
+import threading
+
+
+class CompletionCache(object):
+    """
+    Bounded LRU cache of completion results.
+
+    Keys start with (filename, offset, ...). Each entry remembers the
+    buffer change count and a hash of the source before the offset: an
+    unchanged change count is a hit right away, otherwise the prefix hash
+    decides whether the entry is still valid.
+    """
+
+    def __init__(self, size=32):
+        self.size = size
+        self.entries = {}
+        self.tick = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, change_count, prefix_hash):
+        # prefix_hash is a callable, only called on a change count mismatch
+        with self.lock:
+            entry = self.entries.get(key)
+
+        if entry is not None and entry[0] != change_count:
+            if entry[1] == prefix_hash():
+                entry[0] = change_count
+            else:
+                entry = None
+                with self.lock:
+                    self.entries.pop(key, None)
+
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.tick += 1
+            entry[2] = self.tick
+            return entry[3]
+
+    def put(self, key, change_count, prefix_hash, value):
+        with self.lock:
+            self.tick += 1
+            self.entries[key] = [change_count, prefix_hash, self.tick, value]
+
+            while len(self.entries) > self.size:
+                oldest = min(self.entries, key=lambda k: self.entries[k][2])
+                del self.entries[oldest]
+
+    def invalidate(self, filename, pos=None):
+        # drop the entries of `filename` past `pos`, or all of them
+        with self.lock:
+            for key in list(self.entries.keys()):
+                if key[0] == filename and (pos is None or key[1] > pos):
+                    del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries = {}
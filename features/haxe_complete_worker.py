@@ -0,0 +1,136 @@
+import threading
+import traceback
+
+
+class CompletionRequest(object):
+    """
+    A completion computed off the UI thread.
+
+    `run(request)` is called on the worker thread and its result is handed
+    to `done(request, result)`, unless the request got cancelled meanwhile.
+    Compiler processes and sockets register an abort callback with `track`
+    so that cancelling a request also stops the work it started.
+
+    `background` requests, like server warm-ups, run only when no other
+    request is pending and are cancelled by any other request.
+    """
+
+    def __init__(self, key, filename, change_count, run, done,
+                 background=False):
+        self.key = key
+        self.filename = filename
+        self.change_count = change_count
+        self.run = run
+        self.done = done
+        self.background = background
+        self.cancelled = False
+        self.lock = threading.Lock()
+        self.aborts = []
+
+    def track(self, abort):
+        with self.lock:
+            if not self.cancelled:
+                self.aborts.append(abort)
+                return
+
+        abort()
+
+    def cancel(self):
+        with self.lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            aborts = self.aborts
+            self.aborts = []
+
+        for abort in aborts:
+            try:
+                abort()
+            except Exception:
+                pass
+
+
+class CompletionWorker(object):
+    """
+    Runs completion requests one at a time on a background thread.
+
+    There is at most one request per file: a newer request for the same
+    file replaces the pending one and cancels the running one, unless both
+    ask for the same completion.
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.pending = []
+        self.running = None
+        self.thread = None
+
+    def submit(self, request):
+        with self.cond:
+            running = self.running
+            if running is not None and running.background and \
+                    not request.background and running.key != request.key:
+                running.cancel()
+            elif running is not None and not running.cancelled and \
+                    running.filename == request.filename:
+                if running.key == request.key:
+                    return running
+                if request.change_count >= running.change_count:
+                    running.cancel()
+
+            pending = []
+            for r in self.pending:
+                if r.filename != request.filename:
+                    pending.append(r)
+                elif r.key == request.key:
+                    return r
+                else:
+                    r.cancel()
+            if request.background:
+                pending.append(request)
+            else:
+                # ahead of background requests
+                i = len(pending)
+                while i > 0 and pending[i - 1].background:
+                    i -= 1
+                pending.insert(i, request)
+            self.pending = pending
+
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.loop)
+                self.thread.daemon = True
+                self.thread.start()
+
+            self.cond.notify()
+
+        return request
+
+    def cancel_all(self):
+        with self.cond:
+            for r in self.pending:
+                r.cancel()
+            self.pending = []
+            if self.running is not None:
+                self.running.cancel()
+
+    def loop(self):
+        while True:
+            with self.cond:
+                while not self.pending:
+                    self.cond.wait()
+                request = self.pending.pop(0)
+                self.running = request
+
+            result = None
+            try:
+                if not request.cancelled:
+                    result = request.run(request)
+            except Exception:
+                traceback.print_exc()
+                request.cancel()
+
+            with self.cond:
+                self.running = None
+
+            if not request.cancelled:
+                request.done(request, result)
@@ -29,6 +29,7 @@ class HaxeCreateType( sublime_plugin.WindowCommand ):
 
         if len(builds) == 0 :
             HaxeComplete_inst().extract_build_args(view)
+            builds = HaxeComplete_inst().builds
 
         if len(paths) == 0 :
             paths.append(fn)
@@ -0,0 +1,284 @@
+import sys
+
+try:
+    from xml.parsers import expat
+except ImportError:  # ST2
+    expat = None
+
+from xml.etree import ElementTree
+
+if sys.version_info < (3,):
+    # the vendored builder is Python 2 only
+    try:
+        from elementtree import SimpleXMLTreeBuilder
+        ElementTree.XMLTreeBuilder = SimpleXMLTreeBuilder.TreeBuilder
+    except ImportError:
+        pass
+
+
+def parse_sig(sig):
+    params = []
+    spl = sig.split(" -> ")
+    pars = 0
+    currentType = []
+
+    for t in spl:
+        currentType.append(t)
+        # only the depth at the end of each part matters
+        pars += t.count("(") + t.count("{") + t.count("<") - \
+            t.count(")") - t.count("}") - t.count(">")
+
+        if pars == 0:
+            params.append(
+                " -> ".join(currentType).replace('(', '').replace(')', ''))
+            currentType = []
+
+    ret = 'haxe-sublime-bundle-bug'
+    if params:
+        ret = params.pop()
+
+    if not params:
+        params = None
+    elif len(params) == 1 and params[0] == "Void":
+        params = []
+
+    return params, ret
+
+
+class DisplayItem(object):
+    """
+    An entry of a <list> or <il> display response. `sig` and `doc` are
+    kept as sent by the compiler: the signature is only parsed, and the
+    hint built, for the items actually shown.
+    """
+
+    __slots__ = ('name', 'kind', 'sig', 'doc', 'hint', 'has_sig', 'parsed')
+
+    def __init__(self, name=None, kind=None, sig=None, doc='No Doc'):
+        self.name = name
+        self.kind = kind
+        self.sig = sig
+        self.doc = doc
+        self.hint = None
+        self.has_sig = False
+        self.parsed = None
+
+    def signature(self):
+        """
+        Returns (params, ret) of `sig` as parse_sig does, or None without
+        a signature.
+        """
+        if self.sig is None:
+            return None
+        if self.parsed is None:
+            self.parsed = parse_sig(self.sig)
+        return self.parsed
+
+
+class DisplayResponse(object):
+
+    def __init__(self):
+        self.types = []
+        self.pos = None
+        self.has_list = False
+        self.list_pos = None
+        self.items = []
+        self.error = None
+
+
+class DisplayParser(object):
+    """
+    Parser of the compiler display output (the XML written to stderr by
+    `--display`), built on expat callbacks. Feed it the output and call
+    `close` to get the DisplayResponse.
+
+    Only the shapes used by completion are collected: <type> hints, the
+    top <pos>, and the <i> entries of the first <list> or <il>. Text is
+    only buffered for those elements.
+    """
+
+    def __init__(self):
+        self.response = DisplayResponse()
+        self.depth = 0
+        self.item = None
+        self.list_depth = 0
+        self.list_done = False
+        self.root_pos_done = False
+        self.list_pos_done = False
+        self.capture = None
+        self.capture_depth = 0
+        self.text = []
+
+        self.parser = expat.ParserCreate()
+        self.parser.buffer_text = True
+        self.parser.StartElementHandler = self.on_start
+        self.parser.EndElementHandler = self.on_end
+        self.parser.CharacterDataHandler = self.on_data
+
+        self.feed('<root>')
+
+    def feed(self, data):
+        if self.response.error is not None:
+            return
+
+        try:
+            self.parser.Parse(data, False)
+        except expat.ExpatError as e:
+            self.response.error = e
+
+    def close(self):
+        self.feed('</root>')
+        if self.response.error is None:
+            try:
+                self.parser.Parse('', True)
+            except expat.ExpatError as e:
+                self.response.error = e
+
+        return self.response
+
+    def start_capture(self, name):
+        self.capture = name
+        self.capture_depth = self.depth
+        self.text = []
+
+    def on_start(self, name, attrs):
+        self.depth += 1
+        depth = self.depth
+
+        if self.capture is not None and depth > self.capture_depth:
+            # text after the first child isn't part of the element text
+            self.capture = None
+            if self.item is not None and self.item.name is None:
+                self.item.name = ''.join(self.text) or None
+
+        item = self.item
+
+        if depth == 2:
+            if name in ('list', 'il') and not self.list_done:
+                self.response.has_list = True
+                self.list_depth = depth
+                self.list_done = True
+            elif name == 'pos' and not self.root_pos_done:
+                self.start_capture(name)
+            elif name == 'type':
+                self.start_capture(name)
+        elif self.list_depth:
+            if name == 'i' and item is None:
+                self.item = DisplayItem(
+                    attrs.get('n'), attrs.get('k'), attrs.get('t'))
+                if self.item.name is None:
+                    self.start_capture(name)
+            elif item is not None and depth == self.item_depth + 1 and \
+                    name in ('t', 'd'):
+                self.start_capture(name)
+            elif name == 'pos' and depth == self.list_depth + 1 and \
+                    not self.list_pos_done:
+                self.start_capture(name)
+        elif name == 'type':
+            self.start_capture(name)
+
+        if name == 'i' and self.item is not None and item is None:
+            self.item_depth = depth
+
+    def on_data(self, data):
+        if self.capture is not None:
+            self.text.append(data)
+
+    def on_end(self, name):
+        depth = self.depth
+        self.depth -= 1
+
+        text = None
+        if self.capture is not None and depth == self.capture_depth:
+            text = ''.join(self.text) or None
+            self.capture = None
+
+        response = self.response
+        item = self.item
+
+        if name == 'type':
+            response.types.append((text or '').strip())
+        elif name == 'pos':
+            if depth == 2 and not self.root_pos_done:
+                response.pos = text
+                self.root_pos_done = True
+            elif depth == self.list_depth + 1 and not self.list_pos_done:
+                response.list_pos = text
+                self.list_pos_done = True
+        elif item is not None and depth == self.item_depth + 1:
+            if name == 't' and not item.has_sig:
+                item.sig = text
+                item.has_sig = True
+            elif name == 'd' and item.doc == 'No Doc':
+                item.doc = text
+        elif name == 'i' and item is not None and depth == self.item_depth:
+            if item.name is None:
+                item.name = text
+            response.items.append(item)
+            self.item = None
+        elif depth == self.list_depth:
+            self.list_depth = 0
+
+
+def iter_elements(elem, tag):
+    if hasattr(elem, 'iter'):
+        return elem.iter(tag)
+    return elem.getiterator(tag)
+
+
+def parse_display_tree(text):
+    response = DisplayResponse()
+
+    try:
+        tree = ElementTree.XML('<root>' + text + '</root>')
+    except Exception as e:
+        response.error = e
+        return response
+
+    for i in iter_elements(tree, 'type'):
+        response.types.append((i.text or '').strip())
+
+    response.pos = tree.findtext('pos')
+
+    li = tree.find('list')
+    if li is None:
+        li = tree.find('il')
+
+    if li is not None:
+        response.has_list = True
+        response.list_pos = li.findtext('pos')
+
+        for i in iter_elements(li, 'i'):
+            name = i.get('n')
+            if name is None:
+                name = i.text
+
+            t = i.find('t')
+            if t is not None:
+                sig = t.text
+            else:
+                sig = i.get('t')
+
+            d = i.find('d')
+            if d is not None:
+                doc = d.text
+            else:
+                doc = 'No Doc'
+
+            response.items.append(DisplayItem(name, i.get('k'), sig, doc))
+
+    return response
+
+
+def parse_display(text):
+    """
+    Returns the DisplayResponse of the display output `text`. The expat
+    parser is only faster than ElementTree on Python 2, Python 3 has a C
+    accelerated ElementTree (see tests/bench_display_parser.py).
+    """
+    if expat is None or sys.version_info[0] >= 3:
+        return parse_display_tree(text)
+
+    parser = DisplayParser()
+    parser.feed(text)
+    return parser.close()
@@ -0,0 +1,261 @@
+"""
+Client of the JSON-RPC display protocol of Haxe 4 (`--display <json>`).
+
+Replies are converted to the DisplayResponse of the XML protocol, so
+completion handles both the same way.
+"""
+
+import codecs
+import json
+import threading
+
+try:  # Python 3
+    from .haxe_display_parser import DisplayItem, DisplayResponse
+except (ValueError):  # Python 2
+    from haxe_display_parser import DisplayItem, DisplayResponse
+
+# display modes of the XML protocol and the methods replacing them,
+# `usage` keeps the XML protocol as Find Usages parses its output
+METHODS = {
+    None: 'display/completion',
+    'toplevel': 'display/completion',
+    'type': 'display/hover',
+    'position': 'display/definition',
+}
+
+MIN_VERSION = 4
+
+_ids = [0]
+_ids_lock = threading.Lock()
+
+
+def supports(compiler_version, mode):
+    return compiler_version >= MIN_VERSION and mode in METHODS
+
+
+def request_arg(method, params):
+    """
+    Returns the argument of `--display` for a JSON-RPC request.
+    """
+    with _ids_lock:
+        _ids[0] += 1
+        id = _ids[0]
+
+    return json.dumps({
+        'jsonrpc': '2.0', 'id': id, 'method': method, 'params': params})
+
+
+def display_arg(mode, filename, offset, signature=False):
+    """
+    `offset` is in characters, unlike the byte offsets of the XML
+    protocol. `signature` asks for the signature of the called function
+    instead of a completion list.
+    """
+    method = METHODS[mode]
+    params = {'file': filename, 'offset': offset}
+    if signature and method == 'display/completion':
+        method = 'display/signatureHelp'
+    elif method == 'display/completion':
+        params['wasAutoTriggered'] = True
+    return request_arg(method, params)
+
+
+def invalidate_arg(filename):
+    return request_arg('server/invalidate', {'file': filename})
+
+
+def source_before(path, byte_offset, contents=None):
+    # the text before a byte offset, the XML protocol counts bytes and
+    # the JSON-RPC one characters
+    if contents is None:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read(byte_offset)
+        except (IOError, OSError):
+            return None
+    else:
+        data = codecs.encode(contents, 'utf-8')[:byte_offset]
+    return data.decode('utf-8', 'ignore')
+
+
+def display_request(mode, filename, byte_offset, contents=None):
+    """
+    Returns the `--display` argument replacing `filename@byte_offset@mode`,
+    `contents` being the unsaved text of the file, if any. Field
+    completion right after `(` or `,` asks for the signature of the call.
+    """
+    before = source_before(filename, byte_offset, contents)
+    if before is None:
+        return display_arg(mode, filename, byte_offset)
+
+    signature = mode is None and before.rstrip()[-1:] in ('(', ',')
+    return display_arg(mode, filename, len(before), signature)
+
+
+def type_name(path):
+    return path.get('typeName') or path.get('moduleName') or ''
+
+
+def print_type(t):
+    """
+    Prints a JsonType the way the XML protocol does, e.g.
+    `a : Int -> ?b : String -> Void` for functions.
+    """
+    if not t:
+        return 'Unknown'
+
+    kind = t.get('kind')
+    args = t.get('args')
+
+    if kind in ('TInst', 'TEnum', 'TType', 'TAbstract'):
+        name = type_name(args['path'])
+        params = args.get('params')
+        if params:
+            name += '<' + ', '.join(print_type(p) for p in params) + '>'
+        return name
+
+    if kind == 'TFun':
+        return print_fun(args.get('args', []), args.get('ret'))
+
+    if kind == 'TAnonymous':
+        fields = ['%s : %s' % (f['name'], print_type(f.get('type')))
+                  for f in (args or {}).get('fields', [])]
+        return '{ ' + ', '.join(fields) + ' }'
+
+    if kind == 'TDynamic':
+        if args:
+            return 'Dynamic<%s>' % print_type(args)
+        return 'Dynamic'
+
+    return 'Unknown'
+
+
+def print_fun(fun_args, ret):
+    parts = []
+    for a in fun_args:
+        t = print_type(a.get('t'))
+        if ' -> ' in t:
+            t = '(' + t + ')'
+        name = a.get('name')
+        if name:
+            t = '%s : %s' % (name, t)
+        if a.get('opt'):
+            t = '?' + t
+        parts.append(t)
+
+    if not parts:
+        parts.append('Void')
+
+    parts.append(print_type(ret))
+    return ' -> '.join(parts)
+
+
+def completion_item(item):
+    # DisplayItem of a CompletionItem, None for kinds without a name
+    kind = item.get('kind')
+    args = item.get('args') or {}
+
+    if kind in ('ClassField', 'EnumField', 'EnumAbstractField'):
+        field = args.get('field') or {}
+        return DisplayItem(field.get('name'), kind,
+                           print_type(field.get('type')),
+                           field.get('doc') or 'No Doc')
+
+    if kind == 'Local':
+        return DisplayItem(args.get('name'), kind,
+                           print_type(args.get('type')))
+
+    if kind == 'Type':
+        # a CompletionModuleType, named directly
+        return DisplayItem(args.get('name'), kind, None,
+                           args.get('doc') or 'No Doc')
+
+    if kind == 'Module':
+        path = args.get('path') or {}
+        return DisplayItem(type_name(path), kind, None,
+                           args.get('doc') or 'No Doc')
+
+    if kind == 'Package':
+        pack = args.get('path', args)
+        if isinstance(pack, dict):
+            pack = (pack.get('pack') or [''])[-1]
+        return DisplayItem(pack, kind)
+
+    name = args.get('name') if isinstance(args, dict) else None
+    if name:
+        return DisplayItem(name, kind)
+
+    return None
+
+
+def location(loc):
+    # a Location as the <pos> text of the XML protocol
+    start = loc['range']['start']
+    end = loc['range']['end']
+    if start['line'] == end['line']:
+        return '%s:%d: characters %d-%d' % (
+            loc['file'], start['line'] + 1,
+            start['character'], end['character'])
+    return '%s:%d: lines %d-%d' % (
+        loc['file'], start['line'] + 1, start['line'] + 1, end['line'] + 1)
+
+
+def parse_reply(text):
+    """
+    Returns the DisplayResponse of a JSON-RPC reply and the compiler
+    messages, as the XML protocol reports them, for errors.
+    """
+    response = DisplayResponse()
+
+    reply = None
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith('{'):
+            try:
+                reply = json.loads(line)
+                break
+            except ValueError:
+                pass
+
+    if reply is None:
+        response.error = 'invalid JSON-RPC reply'
+        return response, text
+
+    if 'error' in reply:
+        error = reply['error'] or {}
+        messages = []
+        for data in error.get('data') or []:
+            if isinstance(data, dict):
+                data = data.get('message')
+            if data:
+                messages.append(data)
+        if not messages:
+            messages.append(error.get('message', ''))
+        return response, '\n'.join(messages)
+
+    result = (reply.get('result') or {}).get('result')
+    if result is None:
+        return response, ''
+
+    if isinstance(result, list):
+        # display/definition
+        if result:
+            response.pos = location(result[0])
+    elif 'items' in result:
+        response.has_list = True
+        for item in result['items']:
+            item = completion_item(item)
+            if item is not None and item.name:
+                response.items.append(item)
+    elif 'signatures' in result:
+        signatures = result['signatures']
+        if signatures:
+            s = signatures[result.get('activeSignature') or 0]
+            response.types.append(print_fun(s.get('args', []), s.get('ret')))
+    elif 'item' in result:
+        # display/hover
+        t = result['item'].get('type')
+        if t is not None:
+            response.types.append(print_type(t))
+
+    return response, ''
@@ -0,0 +1,74 @@
+import threading
+
+try:  # Python 3
+    from .haxe_helper import runcmd
+    from .haxe_type_index import file_stat
+except (ValueError):  # Python 2
+    from haxe_helper import runcmd
+    from haxe_type_index import file_stat
+
+
+class FlambeFlags(object):
+    """
+    Output of `flambe haxe-flags` per flambe.yaml, keyed on the stat of
+    the yaml: the flags don't depend on the selected target. Flambe is
+    slow to start, so a stale result is returned while a fresh one is
+    computed in the background, `on_refresh` is called with the yaml path
+    once it is ready, from that background thread.
+    """
+
+    def __init__(self, on_refresh=None):
+        self.on_refresh = on_refresh
+        self.entries = {}
+        self.refreshing = set()
+        self.lock = threading.Lock()
+
+    def run(self, yaml):
+        return runcmd(["flambe", "--config", yaml, "haxe-flags"])
+
+    def key(self, yaml):
+        return file_stat(yaml)
+
+    def get(self, yaml):
+        """
+        Returns the (out, err) of `flambe haxe-flags` for `yaml`, running
+        it only the first time.
+        """
+        key = self.key(yaml)
+
+        with self.lock:
+            entry = self.entries.get(yaml)
+
+        if entry is None:
+            out = self.run(yaml)
+            with self.lock:
+                self.entries[yaml] = (key, out)
+            return out
+
+        if entry[0] != key:
+            self.refresh(yaml)
+
+        return entry[1]
+
+    def refresh(self, yaml):
+        with self.lock:
+            if yaml in self.refreshing:
+                return
+            self.refreshing.add(yaml)
+
+        def work():
+            try:
+                key = self.key(yaml)
+                out = self.run(yaml)
+                with self.lock:
+                    self.entries[yaml] = (key, out)
+            finally:
+                with self.lock:
+                    self.refreshing.discard(yaml)
+
+            if self.on_refresh is not None:
+                self.on_refresh(yaml)
+
+        t = threading.Thread(target=work)
+        t.daemon = True
+        t.start()
@@ -12,6 +12,12 @@ import shlex
 import re
 
 
+try:  # Python 3
+    from .haxe_display_parser import DisplayItem, parse_sig
+except (ValueError):  # Python 2
+    from haxe_display_parser import DisplayItem, parse_sig
+
+
 def HaxeComplete_inst():
     try:  # Python 3
         from ..HaxeComplete import HaxeComplete
@@ -31,6 +37,7 @@ classpathLine = re.compile("Classpath : (.*)")
 typeDecl = re.compile("(class|interface|enum|typedef|abstract)\s+([A-Z][a-zA-Z0-9_]*)\s*(<[a-zA-Z0-9_,]+>)?" , re.M )
 libFlag = re.compile("-lib\s+(.*?)")
 skippable = re.compile("^[a-zA-Z0-9_\s]*$")
+identChars = re.compile("^[a-zA-Z0-9_]*$")
 inAnonymous = re.compile("[{,]\s*([a-zA-Z0-9_\"\']+)\s*:\s*$" , re.M | re.U )
 extractTag = re.compile("<([a-z0-9_-]+).*\s(name|main|path)=\"([a-z0-9_./-]+)\"", re.I)
 extractTagName = re.compile("<([a-z0-9_-]+).*\s", re.I)
@@ -150,38 +157,99 @@ def get_env(copy_os_env=False):
     return env
 
 
-def parse_sig(sig):
-    params = []
-    spl = sig.split(" -> ")
-    pars = 0;
-    currentType = [];
+def fuzzy_rank(name, typed):
+    # sort key of `name` for the `typed` prefix, None if it doesn't match
+    if name.startswith(typed):
+        return (0, len(name))
+
+    lname = name.lower()
+    ltyped = typed.lower()
 
-    for t in spl :
-        currentType.append( t )
-        for ch in t:
-            if ch in "({<" :
-                pars += 1
-            if ch in ")}>" :
-                pars -= 1
+    if lname.startswith(ltyped):
+        return (1, len(name))
+
+    idx = lname.find(ltyped)
+    if idx != -1:
+        return (2, idx, len(name))
+
+    pos = -1
+    gaps = 0
+    for ch in ltyped:
+        found = lname.find(ch, pos + 1)
+        if found == -1:
+            return None
+        gaps += found - pos - 1
+        pos = found
 
-        if pars == 0 :
-            params.append(
-                " -> ".join(currentType).replace('(', '').replace(')', ''))
-            currentType = []
+    return (3, gaps, len(name))
+
+
+def item_hint(item):
+    # hint of a DisplayItem, built the first time it is shown
+    if item.hint is not None:
+        return item.hint
+
+    name = item.name
+    sig = item.signature()
+    if sig is None:
+        if re.match("^[A-Z]", name):
+            item.hint = name + "\tclass"
+        else:
+            item.hint = name + "\tpackage"
+    else:
+        params, ret = sig
+        if params is not None:
+            item.hint = name + "( " + " , ".join(params) + " )\t" + ret
+        else:
+            item.hint = name + "\t" + ret
 
-    ret = 'haxe-sublime-bundle-bug'
-    if params:
-        ret = params.pop()
+    return item.hint
 
-    if not params:
-        params = None
-    elif len(params) == 1 and params[0] == "Void" :
-        params = []
 
-    return params, ret
+def item_completion(item):
+    # (trigger, contents) of a DisplayItem, with long hints compacted
+    hint = item_hint(item)
+    sig = item.signature()
+
+    if len(hint) > 40 and sig is not None and sig[0] is not None:
+        # compact arguments
+        hint = compactFunc.sub("(...)", hint)
+
+    if len(hint) > 40:  # compact return type
+        m = compactProp.search(hint)
+        if m is not None:
+            hint = compactProp.sub(": " + m.group(1), hint)
+
+    return (hint, item.name)
+
+
+def completion_entries(comps):
+    # completions as Sublime Text takes them, DisplayItems being kept
+    # until they are shown
+    return [item_completion(c) if isinstance(c, DisplayItem) else c
+            for c in comps]
+
+
+def filter_completions(comps, typed):
+    if not typed:
+        return comps
+
+    ranked = []
+    for i, comp in enumerate(comps):
+        if isinstance(comp, DisplayItem):
+            name = comp.name
+        else:
+            name = comp[1]
+        rank = fuzzy_rank(name, typed)
+        if rank is not None:
+            ranked.append((rank, i, comp))
+
+    ranked.sort()
+    return [comp for rank, i, comp in ranked]
 
 
-def runcmd( args, input=None ):
+def runcmd( args, input=None, track=None ):
+    # track, if given, receives a callback that kills the process
     merged_env = get_env(True)
 
     try:
@@ -189,6 +257,8 @@ def runcmd( args, input=None ):
             p = Popen(args, env=merged_env, stdout=PIPE, stderr=PIPE, stdin=PIPE, startupinfo=STARTUP_INFO)
         else:
             p = Popen([a.encode(sys.getfilesystemencoding()) for a in args], env=merged_env, stdout=PIPE, stderr=PIPE, stdin=PIPE, startupinfo=STARTUP_INFO)
+        if track is not None :
+            track(p.kill)
         if isinstance(input, unicode) :
             input = input.encode('utf-8')
         out, err = p.communicate(input=input)
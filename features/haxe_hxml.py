@@ -0,0 +1,332 @@
+"""
+Parser of hxml build files.
+
+It doesn't depend on Sublime Text, so it can be used and benchmarked
+outside of it:
+
+    from haxe_hxml import HxmlParser
+    builds = HxmlParser().parse('build.hxml')
+"""
+
+import codecs
+import os
+import re
+
+className = re.compile(r'[A-Za-z0-9_\.]+')
+
+QUOTES = '"\''
+
+# flags passed to the compiler as is, with the number of arguments
+PASS_FLAGS = {
+    '-D': 1, '--define': 1,
+    '-swf-version': 1, '--swf-version': 1,
+    '-swf-header': 1, '--swf-header': 1,
+    '-swf-lib': 1, '--swf-lib': 1,
+    '-dce': 1, '--dce': 1,
+    '--remap': 1,
+    '--php-prefix': 1,
+    '--php-front': 1,
+    '--php-lib': 1,
+    '--js-namespace': 1,
+    '--debug': 0, '-debug': 0,
+    '--no-traces': 0,
+    '--flash-use-stage': 0,
+    '--gen-hx-classes': 0,
+    '--no-inline': 0,
+    '--no-opt': 0,
+    '--js-modern': 0,
+    '--dead-code-elimination': 0,
+    '--no-output': 0,
+    '--times': 0,
+    '-v': 0, '--verbose': 0,
+}
+
+# flags taking the rest of the line as their argument
+LINE_FLAGS = ['-cmd', '--cmd', '--macro']
+
+# flags whose argument is a path relative to the hxml
+PATH_FLAGS = [
+    '-resource', '--resource',
+    '-xml', '--xml',
+    '-java-lib', '--java-lib',
+    '-net-lib', '--net-lib',
+]
+
+
+def unquote(s):
+    if len(s) >= 2 and s[0] in QUOTES and s[-1] == s[0]:
+        return s[1:-1]
+    return s
+
+
+def tokenize(line):
+    """
+    Splits a line into (token, rest) pairs, `rest` being the raw text
+    after the token. Quoted parts are kept in a single token, without
+    their quotes.
+    """
+    tokens = []
+    i, n = 0, len(line)
+
+    while i < n:
+        while i < n and line[i] in ' \t':
+            i += 1
+        if i == n:
+            break
+
+        buf = []
+        quote = None
+        while i < n:
+            c = line[i]
+            if quote is not None:
+                if c == quote:
+                    quote = None
+                else:
+                    buf.append(c)
+            elif c in QUOTES:
+                quote = c
+            elif c in ' \t':
+                break
+            else:
+                buf.append(c)
+            i += 1
+
+        tokens.append((''.join(buf), line[i:].strip()))
+
+    return tokens
+
+
+class HxmlBuild(object):
+
+    def __init__(self, hxml, cwd):
+        self.hxml = hxml
+        self.cwd = cwd
+        self.main = None
+        self.target = None
+        self.output = None
+        self.args = []
+        self.libs = []
+        self.classpaths = []
+
+    def copy(self, hxml):
+        build = HxmlBuild(hxml, self.cwd)
+        build.main = self.main
+        build.target = self.target
+        build.output = self.output
+        build.args = list(self.args)
+        build.libs = list(self.libs)
+        build.classpaths = list(self.classpaths)
+        return build
+
+
+class HxmlParser(object):
+    """
+    Reads hxml files into HxmlBuild objects, one per --next section.
+
+    Files are tokenized once per stat and the tokens are reused, nested
+    includes are followed and include cycles reported in `warnings`.
+    """
+
+    def __init__(self, targets=None):
+        if targets is None:
+            targets = ['js', 'cpp', 'swf', 'neko', 'php', 'java', 'cs',
+                       'x', 'python']
+        self.targets = targets
+        self.files = {}
+        self.warnings = []
+
+        self.handlers = {
+            '--next': (0, self.on_next),
+            '--each': (0, self.on_each),
+            '-main': (1, self.on_main), '--main': (1, self.on_main),
+            '-lib': (1, self.on_lib), '--library': (1, self.on_lib),
+            '-cp': (1, self.on_cp), '--class-path': (1, self.on_cp),
+            '--cwd': (1, self.on_cwd), '-C': (1, self.on_cwd),
+            '--interp': (0, self.on_interp),
+        }
+        for flag, arity in PASS_FLAGS.items():
+            self.handlers[flag] = (arity, self.on_pass)
+        for flag in LINE_FLAGS:
+            self.handlers[flag] = ('line', self.on_pass)
+        for flag in PATH_FLAGS:
+            self.handlers[flag] = (1, self.on_path)
+
+    def read_lines(self, path):
+        # tokenized lines of `path`, comments and blank lines removed
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        stat = (st.st_mtime, st.st_size)
+
+        cached = self.files.get(path)
+        if cached is not None and cached[0] == stat:
+            return cached[1]
+
+        lines = []
+        with codecs.open(path, 'r', 'utf-8', 'ignore') as f:
+            for l in f:
+                l = l.strip()
+                if l and not l.startswith('#'):
+                    lines.append((l, tokenize(l)))
+
+        self.files[path] = (stat, lines)
+        return lines
+
+    def parse(self, path):
+        """
+        Returns the HxmlBuild objects of the hxml at `path`. A path like
+        `dir@file.hxml` reads `dir/file.hxml` with `dir` as working
+        directory.
+        """
+        self.warnings = []
+        self.builds = []
+        self.each = None
+        self.stack = []
+        self.path = self.build_path = None
+
+        build_path = os.path.dirname(path)
+        spl = path.split('@')
+        if len(spl) == 2:
+            build_path = spl[0]
+            path = os.path.join(spl[0], spl[1])
+
+        if os.path.exists(path):
+            self.builds.append(HxmlBuild(path, build_path))
+            self.read(path, build_path)
+
+        return self.builds
+
+    def read(self, path, build_path):
+        key = os.path.normcase(os.path.abspath(path))
+        if key in self.stack:
+            self.warnings.append('include cycle on ' + path)
+            return
+
+        lines = self.read_lines(path)
+        if lines is None:
+            return
+
+        outer = self.path, self.build_path
+        self.stack.append(key)
+        self.path = path
+        self.build_path = build_path
+
+        try:
+            i, n = 0, len(lines)
+            while i < n:
+                if self.read_line(lines[i][1]):
+                    # --run takes everything that follows
+                    for l, _ in lines[i + 1:]:
+                        self.builds[-1].args.append((l,))
+                    break
+                i += 1
+        finally:
+            self.stack.pop()
+            self.path, self.build_path = outer
+
+    def read_line(self, tokens):
+        # returns True when the rest of the file is made of --run arguments
+        i, n = 0, len(tokens)
+
+        while i < n:
+            token, rest = tokens[i]
+            build = self.builds[-1]
+            i += 1
+
+            if token == '--run':
+                if i < n:
+                    build.main = build.output = tokens[i][0]
+                    build.target = '--run'
+                    build.args.append(('--run', tokens[i][0]))
+                    for t, _ in tokens[i + 1:]:
+                        build.args.append((t,))
+                return True
+
+            handler = self.handlers.get(token)
+            if handler is None and token.startswith('-'):
+                target = token.lstrip('-')
+                if target in self.targets and i < n:
+                    build.target = target
+                    build.output = tokens[i][0]
+                    build.args.append((token, build.output))
+                    i += 1
+                    continue
+
+            if handler is None:
+                if not token.startswith('-') and token.endswith('.hxml'):
+                    path = os.path.join(build.cwd, token)
+                    self.read(path, os.path.dirname(path))
+                elif not token.startswith('-') and className.match(token):
+                    build.args.append((token,))
+                else:
+                    # keep arguments the compiler may know about
+                    self.warnings.append(
+                        'unknown compiler argument: ' + token)
+                    if rest:
+                        build.args.append((token, unquote(rest)))
+                    else:
+                        build.args.append((token,))
+                    return False
+                continue
+
+            arity, handle = handler
+            if arity == 'line':
+                handle(build, token, unquote(rest))
+                return False
+
+            if arity == 1:
+                if i >= n:
+                    self.warnings.append('missing argument for ' + token)
+                    return False
+                handle(build, token, tokens[i][0])
+                i += 1
+            else:
+                handle(build, token, None)
+
+        return False
+
+    def new_build(self):
+        if self.each is not None:
+            build = self.each.copy(self.path)
+        else:
+            build = HxmlBuild(self.path, self.build_path)
+        self.builds.append(build)
+
+    def on_next(self, build, flag, value):
+        self.new_build()
+
+    def on_each(self, build, flag, value):
+        # what came before applies to every --next section
+        self.each = build
+        self.builds.pop()
+        self.new_build()
+
+    def on_main(self, build, flag, value):
+        build.main = value
+        build.args.append(('-main', value))
+
+    def on_lib(self, build, flag, value):
+        build.libs.append(value)
+        build.args.append(('-lib', value))
+
+    def on_cp(self, build, flag, value):
+        build.classpaths.append(value)
+        build.args.append(('-cp', value))
+
+    def on_cwd(self, build, flag, value):
+        build.cwd = os.path.join(build.cwd, value)
+
+    def on_interp(self, build, flag, value):
+        build.target = '--interp'
+        build.output = ''
+        build.args.append(('--interp',))
+
+    def on_pass(self, build, flag, value):
+        if value is None:
+            build.args.append((flag,))
+        else:
+            build.args.append((flag, value))
+
+    def on_path(self, build, flag, value):
+        build.args.append((flag, os.path.join(self.build_path, value)))
@@ -0,0 +1,238 @@
+import codecs
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+try:  # Python 3
+    from .haxe_helper import cache
+    from .haxe_parse_helper import re_comments, find_type_headers, \
+        parse_imports, parse_package
+    from .haxe_type_index import file_stat, to_bytes
+except (ValueError):  # Python 2
+    from haxe_helper import cache
+    from haxe_parse_helper import re_comments, find_type_headers, \
+        parse_imports, parse_package
+    from haxe_type_index import file_stat, to_bytes
+
+INDEX_VERSION = 2
+
+re_identifier = re.compile(r'\b[A-Za-z_]\w*\b')
+
+
+def blank_comments(src):
+    # removes comments but keeps their line breaks, so lines still match
+    return re_comments.sub(lambda mo: '\n' * mo.group(0).count('\n'), src)
+
+
+def parse_identifiers(path):
+    """
+    Returns ({identifier: [line, ...]}, declarations, imports, package)
+    for a .hx file, declarations being the [kind, name, supers] lists of
+    `find_type_headers`. Lines start at 1.
+    """
+    f = codecs.open(path, 'r', 'utf-8', 'ignore')
+    try:
+        src = blank_comments(f.read())
+    finally:
+        f.close()
+
+    words = {}
+    line = 1
+    pos = 0
+    for mo in re_identifier.finditer(src):
+        line += src.count('\n', pos, mo.start())
+        pos = mo.start()
+        lines = words.setdefault(mo.group(0), [])
+        if not lines or lines[-1] != line:
+            lines.append(line)
+
+    decls = [[kind, name, [list(s) for s in supers]]
+             for kind, name, supers in find_type_headers(src)]
+
+    return words, decls, parse_imports(src, True), parse_package(src)
+
+
+class IdentifierIndex(object):
+    """
+    Inverted index of the identifiers used by the .hx files under `root`,
+    with the lines they appear on, to find the files mentioning a name
+    without reading the tree. Comments are ignored, strings are not.
+
+    `refresh` only reads the files whose mtime or size changed, `update`
+    reads a single file, e.g. once saved. `version` is bumped by every
+    change. The index is saved in `User/Haxe.cache`, so it survives
+    restarts.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        # relative path -> (mtime, size, words, decls, imports, package)
+        self.files = {}
+        # identifier -> set of relative paths
+        self.inverted = {}
+        self.dirty = False
+        self.version = 0
+        # time of the last walk of the tree
+        self.walked = None
+        self.lock = threading.Lock()
+
+    @property
+    def cache_name(self):
+        digest = hashlib.md5(to_bytes(self.root)).hexdigest()
+        return 'idents_%s.index' % digest
+
+    def load(self):
+        data = cache(self.cache_name)
+        if data is None:
+            return
+
+        try:
+            data = json.loads(data)
+        except ValueError:
+            return
+
+        if data.get('version') != INDEX_VERSION or \
+                data.get('root') != self.root:
+            return
+
+        with self.lock:
+            self.files = {}
+            self.inverted = {}
+            for rel, entry in data.get('files', {}).items():
+                self.add(rel, tuple(entry))
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+
+            data = {
+                'version': INDEX_VERSION,
+                'root': self.root,
+                'files': dict(
+                    (rel, list(entry)) for rel, entry in self.files.items())
+            }
+            self.dirty = False
+
+        cache(self.cache_name, json.dumps(data))
+
+    def add(self, rel, entry):
+        # the lock is held
+        self.remove(rel)
+        self.files[rel] = entry
+        self.version += 1
+        for word in entry[2]:
+            rels = self.inverted.get(word)
+            if rels is None:
+                rels = self.inverted[word] = set()
+            rels.add(rel)
+
+    def remove(self, rel):
+        # the lock is held
+        entry = self.files.pop(rel, None)
+        if entry is None:
+            return
+        self.version += 1
+
+        for word in entry[2]:
+            rels = self.inverted.get(word)
+            if rels is not None:
+                rels.discard(rel)
+                if not rels:
+                    del self.inverted[word]
+
+    def update(self, path):
+        """
+        Indexes the file at `path` again, or forgets it if it's gone.
+        """
+        rel = os.path.relpath(path, self.root)
+        st = file_stat(path)
+
+        if st is None:
+            with self.lock:
+                if rel in self.files:
+                    self.remove(rel)
+                    self.dirty = True
+            return
+
+        try:
+            words, decls, imports, package = parse_identifiers(path)
+        except (IOError, OSError):
+            return
+
+        with self.lock:
+            self.add(rel, (st[0], st[1], words, decls, imports, package))
+            self.dirty = True
+
+    def refresh(self, max_age=0):
+        """
+        Walks the tree, indexing new and changed files and forgetting
+        removed ones. Only the stat of unchanged files is read. Nothing
+        is done if the tree was walked less than `max_age` seconds ago,
+        saved files being updated meanwhile. Returns whether the index
+        changed.
+        """
+        with self.lock:
+            if self.walked is not None and \
+                    time.time() - self.walked < max_age:
+                return False
+            self.walked = time.time()
+            version = self.version
+
+        seen = set()
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            for filename in filenames:
+                if not filename.endswith('.hx'):
+                    continue
+
+                path = os.path.join(dirpath, filename)
+                rel = os.path.relpath(path, self.root)
+                seen.add(rel)
+
+                with self.lock:
+                    entry = self.files.get(rel)
+                if entry is None or entry[:2] != file_stat(path):
+                    self.update(path)
+
+        with self.lock:
+            for rel in list(self.files.keys()):
+                if rel not in seen:
+                    self.remove(rel)
+                    self.dirty = True
+            return self.version != version
+
+    def contains(self, path):
+        rel = os.path.relpath(path, self.root)
+        return not rel.startswith(os.pardir)
+
+    def files_with(self, word):
+        """
+        Returns the paths of the files using the identifier `word`.
+        """
+        with self.lock:
+            rels = sorted(self.inverted.get(word, ()))
+        return [os.path.join(self.root, rel) for rel in rels]
+
+    def lines(self, word, path):
+        """
+        Returns the lines of the file at `path` using `word`.
+        """
+        rel = os.path.relpath(path, self.root)
+        with self.lock:
+            entry = self.files.get(rel)
+        if entry is None:
+            return []
+        return entry[2].get(word, [])
+
+    def declarations(self):
+        """
+        Returns (path, stat, decls, imports, package) for every file.
+        """
+        with self.lock:
+            items = sorted(self.files.items())
+        return [(os.path.join(self.root, rel), tuple(entry[:2]), entry[3],
+                 entry[4], entry[5])
+                for rel, entry in items]
@@ -106,12 +106,11 @@ class HaxeOverrideMethod(sublime_plugin.WindowCommand):
         win.run_command('undo')
 
         self.methods = []
-        for field in fields:
-            name = field[0]
-            args = field[1]
-            if args is None or name in method_names:
+        for item in fields:
+            args, ret = item.signature()
+            if args is None or item.name in method_names:
                 continue
-            self.methods.append(field)
+            self.methods.append((item.name, args, ret))
 
         options = []
         for method in self.methods:
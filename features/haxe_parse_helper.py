@@ -13,12 +13,46 @@ re_import = re.compile(r'import\s+([\w\.*]+)[^;]*;', re.MULTILINE)
 re_package = re.compile(r'package\s*([a-z0-9.]*);', re.I | re.M)
 re_type_decl = re.compile(
     r'(?:abstract|class|interface|enum|typedef)\s+(\w+)', re.M)
+re_type_header = re.compile(
+    r'\b(class|interface)\s+(\w+)(?:\s*<(?:[^<>]|<[^<>]*>)*>)?([^{;]*)\{',
+    re.M)
+re_type_params = re.compile(r'<[^<>]*>')
+re_heritage = re.compile(r'\b(extends|implements)\s+([\w\.]+)|,\s*([\w\.]+)')
 
 
 def find_class_declarations(src):
     return [mo for mo in re_class.finditer(src)]
 
 
+def find_type_headers(src):
+    """
+    Returns (kind, name, [(relation, super type), ...]) for the classes
+    and interfaces declared in `src`, relation being `extends` or
+    `implements`.
+    """
+    headers = []
+    for mo in re_type_header.finditer(src):
+        heritage = mo.group(3)
+        while True:
+            stripped = re_type_params.sub('', heritage)
+            if stripped == heritage:
+                break
+            heritage = stripped
+
+        supers = []
+        relation = 'extends'
+        for h in re_heritage.finditer(heritage):
+            if h.group(1):
+                relation = h.group(1)
+                supers.append((relation, h.group(2)))
+            else:
+                supers.append((relation, h.group(3)))
+
+        headers.append((mo.group(1), mo.group(2), supers))
+
+    return headers
+
+
 def find_comment_regions(src):
     regions = []
     for mo in re_comments.finditer(src):
@@ -0,0 +1,254 @@
+"""
+Streaming parser of NME/OpenFL/Lime project files (.nmml, .xml, .lime).
+
+It doesn't depend on Sublime Text.
+"""
+
+import os
+
+try:
+    from xml.parsers import expat
+except ImportError:  # ST2
+    expat = None
+
+
+class NotAProject(Exception):
+    pass
+
+
+class ProjectInfo(object):
+
+    def __init__(self, path):
+        self.path = path
+        self.main = None
+        self.output = None
+        self.haxelibs = []
+        self.classpaths = []
+        self.haxedefs = []
+        # every file read, with its stat, to validate cached results
+        self.files = []
+
+
+def file_stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime, st.st_size
+
+
+# defines Lime, OpenFL and NME set for a target platform
+PLATFORM_DEFINES = {
+    'flash': ['flash', 'web'],
+    'html5': ['html5', 'js', 'web'],
+    'emscripten': ['emscripten', 'cpp', 'native', 'web'],
+    'cpp': ['cpp', 'native', 'desktop'],
+    'linux': ['linux', 'cpp', 'native', 'desktop'],
+    'windows': ['windows', 'cpp', 'native', 'desktop'],
+    'mac': ['mac', 'cpp', 'native', 'desktop'],
+    'neko': ['neko', 'native', 'desktop'],
+    'hl': ['hl', 'native', 'desktop'],
+    'air': ['air', 'flash', 'desktop'],
+    'android': ['android', 'cpp', 'native', 'mobile'],
+    'ios': ['ios', 'cpp', 'native', 'mobile'],
+    'blackberry': ['blackberry', 'cpp', 'native', 'mobile'],
+    'tizen': ['tizen', 'cpp', 'native', 'mobile'],
+    'webos': ['webos', 'cpp', 'native', 'mobile'],
+}
+
+# defines set by target flags
+FLAG_DEFINES = {
+    'debug': ['debug'],
+    '64': ['HXCPP_M64'],
+    '32': ['HXCPP_M32'],
+    'simulator': ['simulator'],
+}
+
+COMMANDS = ['test', 'build', 'run', 'update', 'clean', 'display']
+
+# what the target decides, names outside of it are unknown: only the
+# command line or the environment could set them
+KNOWN = set(
+    [d for ds in PLATFORM_DEFINES.values() for d in ds] +
+    [d for ds in FLAG_DEFINES.values() for d in ds] +
+    ['release'] + COMMANDS)
+
+
+def platform_defines(flags, command=None):
+    """
+    Returns the defines holding for the target `flags` of a build, e.g.
+    `['android', '-debug']`, and `command`.
+    """
+    defines = set()
+    debug = False
+    for flag in flags:
+        name = flag.lstrip('-')
+        debug = debug or name == 'debug'
+        defines.update(PLATFORM_DEFINES.get(name, [name]))
+        defines.update(FLAG_DEFINES.get(name, []))
+    if not debug:
+        defines.add('release')
+    if command is not None:
+        defines.add(command)
+    return defines
+
+
+def check_condition(cond, defines, known=KNOWN):
+    """
+    Evaluates the `if`/`unless` attribute syntax of project files: `||`
+    between alternatives, spaces or `&&` between required terms, and
+    `!a`.
+
+    Returns None when it can't be decided, because a term is neither in
+    `defines` nor in `known`.
+    """
+    def holds(term):
+        name = term.lstrip('!')
+        if name not in defines and name not in known:
+            return None
+        return (name in defines) != term.startswith('!')
+
+    result = False
+    for alternative in cond.split('||'):
+        terms = [holds(t) for t in alternative.replace('&&', ' ').split()]
+        if not terms or False in terms:
+            continue
+        if None in terms:
+            result = None
+        else:
+            return True
+
+    return result
+
+
+class ProjectParser(object):
+    """
+    Collects the <app>, <haxelib>, <classpath>, <source> and <haxedef>
+    elements of a project file in one pass, following <include> and
+    skipping the elements whose if/unless condition doesn't hold for
+    `defines`, plus the names given to <set>, <define> and <haxedef> on
+    the way. Elements whose condition can't be decided, as it depends on
+    names neither the target nor the project set, are kept.
+
+    Parsing stops at the first element when the root isn't <project>, so
+    unrelated XML files cost almost nothing. Results are cached until one
+    of the files read changes.
+    """
+
+    def __init__(self):
+        self.cache = {}
+
+    def parse(self, path, defines=()):
+        """
+        Returns a ProjectInfo, or None if `path` isn't a project file.
+        """
+        defines = frozenset(defines)
+        cached = self.cache.get(path)
+        if cached is not None and cached[0] == defines and \
+                [(f, file_stat(f)) for f, _ in cached[2]] == cached[2]:
+            return cached[1]
+
+        info = ProjectInfo(path)
+        try:
+            self.read(path, info, set(defines), set(KNOWN), [])
+            files = info.files
+        except NotAProject:
+            info = None
+            files = [(path, file_stat(path))]
+
+        self.cache[path] = (defines, info, files)
+        return info
+
+    def read(self, path, info, defines, known, stack):
+        path = os.path.normpath(path)
+        if path in stack:
+            return
+
+        info.files.append((path, file_stat(path)))
+        folder = os.path.dirname(path)
+        root = not stack
+        stack.append(path)
+
+        # one flag per open element, False inside skipped elements
+        active = []
+        started = []
+
+        def enabled(attrs):
+            if 'if' in attrs and \
+                    check_condition(attrs['if'], defines, known) is False:
+                return False
+            if 'unless' in attrs and \
+                    check_condition(attrs['unless'], defines, known) is True:
+                return False
+            return True
+
+        def on_start(name, attrs):
+            tag = name.lower()
+
+            if not started:
+                if tag != 'project':
+                    raise NotAProject(path)
+                started.append(tag)
+
+            if tag in ('set', 'define', 'haxedef', 'unset') and \
+                    'name' in attrs:
+                # the project decides this name, even where it isn't set
+                known.add(attrs['name'])
+
+            on = (not active or active[-1]) and enabled(attrs)
+            active.append(on)
+            if not on:
+                return
+
+            if tag == 'app':
+                if 'main' in attrs:
+                    info.main = attrs['main']
+                out = attrs.get('file') or attrs.get('title')
+                if out:
+                    info.output = out
+            elif tag == 'haxelib':
+                if 'name' in attrs:
+                    info.haxelibs.append(attrs['name'])
+            elif tag == 'haxedef':
+                if 'name' in attrs:
+                    info.haxedefs.append(attrs['name'])
+                    defines.add(attrs['name'])
+            elif tag in ('set', 'define'):
+                if 'name' in attrs:
+                    defines.add(attrs['name'])
+            elif tag == 'unset':
+                if 'name' in attrs:
+                    defines.discard(attrs['name'])
+            elif tag in ('classpath', 'source'):
+                cp = attrs.get('path') or attrs.get('name')
+                if cp:
+                    info.classpaths.append(os.path.join(folder, cp))
+            elif tag == 'include' and 'path' in attrs:
+                include = os.path.join(folder, attrs['path'])
+                if os.path.isdir(include):
+                    include = os.path.join(include, 'include.xml')
+                if os.path.isfile(include):
+                    try:
+                        self.read(include, info, defines, known, stack)
+                    except NotAProject:
+                        pass
+
+        def on_end(name):
+            active.pop()
+
+        parser = expat.ParserCreate()
+        parser.StartElementHandler = on_start
+        parser.EndElementHandler = on_end
+
+        try:
+            with open(path, 'rb') as f:
+                parser.ParseFile(f)
+        except expat.ExpatError:
+            # keep what was read before the error
+            if not started:
+                raise NotAProject(path)
+        except (IOError, OSError):
+            if root:
+                raise NotAProject(path)
+        finally:
+            stack.pop()
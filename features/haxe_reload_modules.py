@@ -17,6 +17,20 @@ submods = [
     '',
     '.haxe_helper',
     '.haxe_errors',
+    '.haxe_server',
+    '.haxe_server_supervisor',
+    '.haxe_complete_worker',
+    '.haxe_complete_cache',
+    '.haxe_display_parser',
+    '.haxe_display_rpc',
+    '.haxe_type_index',
+    '.haxe_ident_index',
+    '.haxe_type_graph',
+    '.haxe_stats',
+    '.haxe_flambe',
+    '.haxe_hxml',
+    '.haxe_project_xml',
+    '.haxe_build_registry',
     '.haxe_generate_code_helper',
     '.haxe_format',
     '.haxe_hint',
@@ -0,0 +1,136 @@
+import socket
+import threading
+
+
+def parse_server_reply(data):
+    # Decode a reply of the compilation server the same way
+    # `haxe --connect` does: lines starting with \x01 go to stdout
+    # (\x01 standing for embedded newlines), a lone \x02 flags an error
+    # and everything else is written to stderr.
+    out = []
+    err = []
+    has_error = False
+
+    lines = data.split('\n')
+    if lines and lines[-1] == '':
+        lines.pop()
+
+    for line in lines:
+        if line.startswith('\x01'):
+            out.append('\n'.join(line.split('\x01')[1:]))
+        elif line == '\x02':
+            has_error = True
+        else:
+            err.append(line + '\n')
+
+    return ''.join(out), ''.join(err), has_error
+
+
+def strip_connect(cmd):
+    """
+    Returns the command line `cmd` without its `--connect <port>`
+    arguments, to run the same compilation without the server.
+    """
+    args = []
+    skip = False
+    for a in cmd:
+        if skip:
+            skip = False
+        elif a == '--connect':
+            skip = True
+        else:
+            args.append(a)
+    return args
+
+
+class HaxeServerClient(object):
+    """
+    Talks to a `haxe --wait <port>` compilation server over TCP, so
+    display requests don't need to spawn a `haxe --connect` process.
+
+    The server closes the socket after every reply, so the pool bounds
+    the number of concurrent connections rather than keeping sockets open.
+    `on_timeout` is called when a reply takes more than `timeout` seconds.
+    """
+
+    def __init__(self, port, host='127.0.0.1', pool_size=2,
+                 connect_timeout=0.5, timeout=None, on_timeout=None):
+        self.port = port
+        self.host = host
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.on_timeout = on_timeout
+        self.pool = threading.BoundedSemaphore(max(1, pool_size))
+        self.lock = threading.Lock()
+        self.sockets = []
+
+    def connect(self):
+        sock = socket.create_connection(
+            (self.host, self.port), self.connect_timeout)
+        sock.settimeout(self.timeout)
+        return sock
+
+    def request(self, args, stdin=None, track=None):
+        """
+        Sends `args` to the server and returns (out, err, has_error),
+        `has_error` being True when the server flagged a failed
+        compilation, or None when the server can't be reached or times
+        out. `track`, if given, receives a callback that aborts the request.
+        """
+        payload = '\n'.join(args)
+        if stdin is not None:
+            payload += '\x01' + stdin
+        payload = payload.encode('utf-8') + b'\x00'
+
+        with self.pool:
+            try:
+                sock = self.connect()
+            except (socket.error, socket.timeout, OSError):
+                return None
+
+            with self.lock:
+                self.sockets.append(sock)
+
+            if track is not None:
+                track(lambda: self.abort(sock))
+
+            try:
+                sock.sendall(payload)
+                chunks = []
+                while True:
+                    chunk = sock.recv(65536)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+            except socket.timeout:
+                if self.on_timeout is not None:
+                    self.on_timeout()
+                return None
+            except (socket.error, OSError):
+                return None
+            finally:
+                with self.lock:
+                    if sock in self.sockets:
+                        self.sockets.remove(sock)
+                try:
+                    sock.close()
+                except (socket.error, OSError):
+                    pass
+
+        data = b''.join(chunks).decode('utf-8', 'replace')
+        return parse_server_reply(data)
+
+    def abort(self, sock):
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+            sock.close()
+        except (socket.error, OSError):
+            pass
+
+    def close(self):
+        with self.lock:
+            sockets = self.sockets
+            self.sockets = []
+
+        for sock in sockets:
+            self.abort(sock)
@@ -0,0 +1,423 @@
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+try:  # Python 3
+    from .haxe_server import HaxeServerClient
+except (ValueError):  # Python 2
+    from haxe_server import HaxeServerClient
+
+
+def free_port(host='127.0.0.1'):
+    # let the OS pick a port nothing listens on
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+    finally:
+        sock.close()
+
+
+try:
+    PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+    CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+except (AttributeError, ValueError, OSError):  # not POSIX
+    PAGE_SIZE = 4096
+    CLOCK_TICKS = 100
+
+MB = 1024 * 1024
+
+
+def process_usage(pid):
+    """
+    Returns the (rss in bytes, cpu time in seconds) of a process, read
+    from /proc, or None where there is no /proc.
+    """
+    try:
+        with open('/proc/%d/stat' % pid) as f:
+            stat = f.read()
+    except (IOError, OSError):
+        return None
+
+    # the fields after the command name, from the state (3rd field) on
+    fields = stat[stat.rfind(')') + 2:].split()
+    try:
+        cpu = int(fields[11]) + int(fields[12])
+        rss = int(fields[21])
+    except (IndexError, ValueError):
+        return None
+
+    return rss * PAGE_SIZE, float(cpu) / CLOCK_TICKS
+
+
+def terminate(proc):
+    try:
+        proc.terminate()
+        proc.kill()
+        proc.wait()
+    except OSError:
+        pass
+
+
+class ServerSupervisor(object):
+    """
+    Runs a `haxe --wait` compilation server on a free port and keeps it
+    alive.
+
+    `spawn(port)` starts the server process. Once it answers a trivial
+    request, the server is pinged every `ping_interval` seconds; when it
+    exits or misses `max_failures` pings in a row, it is killed and
+    started again after a delay doubling from `backoff` to `max_backoff`.
+
+    `client` is None until the server answers, callers compile without
+    the server meanwhile. `on_ready(port)` is called every time a server
+    starts answering.
+
+    Callers bracket requests with `begin()` and `end(token)`; pings are
+    skipped while requests are in flight, unless one of them has been
+    running for more than `request_timeout` seconds. Requests sent
+    through `client` time out after `request_timeout` seconds too, and
+    the server is checked right away when they do. 0 disables both.
+
+    The memory and CPU use of the server are sampled at every ping. Once
+    it uses more than `memory_limit` bytes, the server is recycled when
+    idle: a replacement is started and sent `warm_args`, the last warm-up
+    request, before it takes over.
+    """
+
+    def __init__(self, spawn, host='127.0.0.1', pool_size=2,
+                 ping_interval=10, ping_timeout=5, startup_timeout=10,
+                 max_failures=3, backoff=1, max_backoff=60, log=None,
+                 on_ready=None, memory_limit=0, request_timeout=0):
+        self.spawn = spawn
+        self.host = host
+        self.pool_size = pool_size
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.startup_timeout = startup_timeout
+        self.max_failures = max_failures
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.log = log
+        self.on_ready = on_ready
+        self.memory_limit = memory_limit
+        self.request_timeout = request_timeout
+
+        self.proc = None
+        self.port = None
+        self.client = None
+        self.restarts = 0
+        self.recycles = 0
+        self.rss = None
+        self.cpu = None
+        self.sample = None
+        self.warm_args = None
+        self.events = deque(maxlen=50)
+
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = False
+        self.thread = None
+        self.requests = {}
+        self.reported = None
+
+    def start(self):
+        if self.thread is not None or self.stopped:
+            return
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """
+        Kills the server without waiting for the thread watching it, which
+        exits once its ping or startup is over. A stopped supervisor isn't
+        started again.
+        """
+        self.stopped = True
+        self.wake.set()
+        self.thread = None
+        self.kill()
+
+    def available(self):
+        """
+        Returns (port, client) of the running server, or None.
+        """
+        with self.lock:
+            if self.client is None:
+                return None
+            return self.port, self.client
+
+    def report(self, reason):
+        # a request failed, check the server now instead of at next ping
+        with self.lock:
+            if self.reported is None:
+                self.reported = reason
+        self.wake.set()
+
+    @property
+    def pending(self):
+        return len(self.requests)
+
+    def begin(self):
+        """
+        Marks a request in flight, returns the token to pass to `end`.
+        """
+        token = object()
+        with self.lock:
+            self.requests[token] = time.time()
+        return token
+
+    def end(self, token):
+        with self.lock:
+            self.requests.pop(token, None)
+
+    def overdue(self):
+        # whether a request in flight is past its deadline, the lock held
+        if not self.request_timeout:
+            return False
+        deadline = time.time() - self.request_timeout
+        return any(started < deadline for started in self.requests.values())
+
+    def timed_out(self):
+        self.report('timed out on a request after %gs' % self.request_timeout)
+
+    def make_client(self, port, on_timeout=None):
+        return HaxeServerClient(port, self.host, pool_size=self.pool_size,
+                                timeout=self.request_timeout or None,
+                                on_timeout=on_timeout)
+
+    def event(self, message):
+        self.events.append((time.time(), message))
+        if self.log is not None:
+            self.log(message)
+
+    def run(self):
+        delay = self.backoff
+        while not self.stopped:
+            started = time.time()
+            reason = self.launch()
+            if reason is None:
+                reason = self.watch()
+            if self.stopped:
+                break
+
+            # a server that was healthy for a while restarts right away
+            if time.time() - started > self.max_backoff:
+                delay = self.backoff
+
+            self.kill()
+            self.restarts += 1
+            self.event('Haxe server on port %s %s, restarting in %gs' %
+                       (self.port, reason, delay))
+
+            self.wake.wait(delay)
+            self.wake.clear()
+            delay = min(delay * 2, self.max_backoff)
+
+        # a server started while stopping
+        self.kill()
+
+    def spawn_ready(self):
+        # starts a server on a free port and waits until it answers,
+        # returns (port, process, None) or (port, None, why it didn't)
+        port = free_port(self.host)
+        try:
+            proc = self.spawn(port)
+        except (OSError, ValueError) as e:
+            return port, None, 'failed to start (%s)' % e
+
+        deadline = time.time() + self.startup_timeout
+        while not self.stopped and time.time() < deadline:
+            code = proc.poll()
+            if code is not None:
+                return port, None, 'exited on startup with code %s' % code
+
+            if self.ping(port):
+                return port, proc, None
+
+            self.wake.wait(0.1)
+            self.wake.clear()
+
+        terminate(proc)
+        if self.stopped:
+            return port, None, 'stopped'
+        return port, None, 'not answering after %gs' % self.startup_timeout
+
+    def launch(self):
+        # returns None once the server answers, else why it didn't
+        with self.lock:
+            self.reported = None
+
+        port, proc, reason = self.spawn_ready()
+        with self.lock:
+            self.port = port
+        if proc is None:
+            return reason
+
+        with self.lock:
+            self.proc = proc
+            self.client = self.make_client(port, self.timed_out)
+            self.rss = self.cpu = self.sample = None
+
+        self.event('Haxe server started on port %d' % port)
+        if self.on_ready is not None:
+            self.on_ready(port)
+        return None
+
+    def recycle(self):
+        # replaces the server, which keeps serving until the new one is
+        # warm, returns False if the new one didn't start
+        port, proc, reason = self.spawn_ready()
+        if proc is None and self.stopped:
+            return False
+        if proc is None:
+            self.event('Haxe server on port %s not recycled, '
+                       'new server %s' % (self.port, reason))
+            return False
+
+        client = self.make_client(port, self.timed_out)
+        if self.warm_args is not None and \
+                self.make_client(port).request(self.warm_args) is None:
+            terminate(proc)
+            self.event('Haxe server on port %s not recycled, new server '
+                       'failed to warm up' % self.port)
+            return False
+
+        with self.lock:
+            old = self.port, self.proc, self.client, self.rss
+            self.port = port
+            self.proc = proc
+            self.client = client
+            self.rss = self.cpu = self.sample = None
+
+        self.recycles += 1
+        self.event('Haxe server on port %s recycled at %d MB, '
+                   'now on port %d' % (old[0], old[3] // MB, port))
+
+        # let requests sent to the old server finish
+        deadline = time.time() + self.startup_timeout
+        while self.pending > 0 and not self.stopped and \
+                time.time() < deadline:
+            self.wake.wait(0.1)
+            self.wake.clear()
+
+        old[2].close()
+        terminate(old[1])
+        return True
+
+    def sample_usage(self, proc):
+        usage = process_usage(proc.pid)
+        if usage is None:
+            return
+
+        now = time.time()
+        rss, cpu = usage
+        with self.lock:
+            if self.sample is not None and now > self.sample[0]:
+                self.cpu = 100 * (cpu - self.sample[1]) / (now - self.sample[0])
+            self.sample = now, cpu
+            self.rss = rss
+
+    def usage(self):
+        """
+        Returns (port, rss in bytes, cpu percent) of the server, rss and
+        cpu being None until sampled.
+        """
+        with self.lock:
+            return self.port, self.rss, self.cpu
+
+    def watch(self):
+        # returns why the server has to be restarted, None when stopped
+        failures = 0
+        while True:
+            self.wake.wait(self.ping_interval)
+            self.wake.clear()
+            if self.stopped:
+                return None
+
+            with self.lock:
+                proc = self.proc
+                reported = self.reported
+                self.reported = None
+                # a request past its deadline may be hanging the server
+                busy = bool(self.requests) and reported is None and \
+                    not self.overdue()
+
+            code = proc.poll()
+            if code is not None:
+                return 'exited with code %s' % code
+
+            self.sample_usage(proc)
+
+            if busy:
+                continue
+
+            if self.memory_limit and self.rss is not None and \
+                    self.rss > self.memory_limit and self.recycle():
+                failures = 0
+                continue
+
+            if self.ping(self.port):
+                failures = 0
+                continue
+
+            failures += 1
+            if reported is not None:
+                return '%s and missed a ping' % reported
+            if failures >= self.max_failures:
+                return 'missed %d pings' % failures
+
+    def ping(self, port):
+        client = HaxeServerClient(port, self.host, pool_size=1,
+                                  connect_timeout=self.ping_timeout,
+                                  timeout=self.ping_timeout)
+        return client.request(['--version']) is not None
+
+    def kill(self):
+        with self.lock:
+            client = self.client
+            proc = self.proc
+            self.client = None
+            self.proc = None
+
+        if client is not None:
+            client.close()
+
+        if proc is not None:
+            terminate(proc)
+
+
+class ServerPool(object):
+    """
+    `count` supervised servers serving the same kind of requests, each
+    started and warmed on its own. Requests go to the running server
+    with the fewest requests in flight.
+    """
+
+    def __init__(self, count, make_supervisor):
+        self.supervisors = [make_supervisor() for _ in range(max(1, count))]
+
+    def start(self):
+        for supervisor in self.supervisors:
+            supervisor.start()
+
+    def stop(self):
+        for supervisor in self.supervisors:
+            supervisor.stop()
+
+    def available(self):
+        """
+        Returns (supervisor, port, client) of the least busy running
+        server, or None.
+        """
+        best = None
+        for supervisor in self.supervisors:
+            server = supervisor.available()
+            if server is None:
+                continue
+            if best is None or supervisor.pending < best[0].pending:
+                best = (supervisor,) + server
+        return best
@@ -0,0 +1,190 @@
+import json
+import threading
+import time
+from collections import deque
+
+import sublime
+import sublime_plugin
+
+try:  # Python 3
+    from .haxe_helper import cache, HaxeComplete_inst
+except (ValueError):  # Python 2
+    from haxe_helper import cache, HaxeComplete_inst
+
+clock = getattr(time, 'perf_counter', time.time)
+
+MODES = ['field', 'toplevel', 'type', 'position', 'usage']
+
+
+def percentile(values, p):
+    # nearest-rank percentile of a sorted list
+    if not values:
+        return 0
+    rank = int(round(p / 100.0 * len(values) + 0.5)) - 1
+    return values[max(0, min(rank, len(values) - 1))]
+
+
+class Span(object):
+
+    def __init__(self, timings, phase):
+        self.timings = timings
+        self.phase = phase
+        self.start = None
+
+    def __enter__(self):
+        self.start = clock()
+        return self
+
+    def __exit__(self, *args):
+        self.timings.add(self.phase, clock() - self.start)
+
+
+class Timings(object):
+    """
+    Phases of a single completion request, in the order they ran.
+    A phase that runs more than once is summed.
+    """
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.phases = []
+        self.durations = {}
+        self.start = clock()
+        self.total = None
+
+    def span(self, phase):
+        return Span(self, phase)
+
+    def add(self, phase, seconds):
+        if phase not in self.durations:
+            self.phases.append(phase)
+            self.durations[phase] = 0
+        self.durations[phase] += seconds
+
+    def breakdown(self):
+        parts = ['%s %d' % (phase, self.durations[phase] * 1000)
+                 for phase in self.phases]
+        return 'Haxe %s %dms: %s' % (
+            self.mode, (self.total or 0) * 1000, ' / '.join(parts))
+
+
+class CompletionStats(object):
+    """
+    Rolling window of the last `window` durations per (mode, phase),
+    reported as percentiles.
+    """
+
+    def __init__(self, window=200):
+        self.window = window
+        self.samples = {}
+        self.last = None
+        self.lock = threading.Lock()
+
+    def begin(self, mode):
+        return Timings(mode or 'field')
+
+    def end(self, timings):
+        timings.total = clock() - timings.start
+
+        with self.lock:
+            for phase in timings.phases + ['total']:
+                if phase == 'total':
+                    seconds = timings.total
+                else:
+                    seconds = timings.durations[phase]
+
+                key = (timings.mode, phase)
+                if key not in self.samples:
+                    self.samples[key] = deque(maxlen=self.window)
+                self.samples[key].append(seconds)
+
+            self.last = timings
+
+    def summary(self):
+        """
+        Returns a list of (mode, phase, count, p50, p95, p99) with the
+        durations in milliseconds.
+        """
+        with self.lock:
+            samples = dict((k, sorted(v)) for k, v in self.samples.items())
+
+        def order(key):
+            mode, phase = key
+            if mode in MODES:
+                mode = '%d' % MODES.index(mode)
+            return (mode, phase == 'total', phase)
+
+        rows = []
+        for key in sorted(samples.keys(), key=order):
+            values = samples[key]
+            rows.append(key + (len(values),) + tuple(
+                percentile(values, p) * 1000 for p in (50, 95, 99)))
+        return rows
+
+    def report(self, counters=()):
+        lines = ['%-10s %-14s %6s %9s %9s %9s' % (
+            'mode', 'phase', 'n', 'p50 ms', 'p95 ms', 'p99 ms')]
+
+        for row in self.summary():
+            lines.append('%-10s %-14s %6d %9.1f %9.1f %9.1f' % row)
+
+        with self.lock:
+            last = self.last
+
+        if counters:
+            lines.append('')
+            for name, n in counters:
+                lines.append('%s: %d' % (name, n))
+
+        if last is not None:
+            lines.append('')
+            lines.append('last: ' + last.breakdown())
+
+        return '\n'.join(lines)
+
+    def to_json(self, counters=()):
+        phases = {}
+        for mode, phase, n, p50, p95, p99 in self.summary():
+            phases.setdefault(mode, {})[phase] = {
+                'count': n, 'p50': p50, 'p95': p95, 'p99': p99}
+
+        return json.dumps(
+            {'phases': phases, 'counters': dict(counters)},
+            indent=4, sort_keys=True)
+
+
+stats = CompletionStats()
+
+
+class HaxeCompletionStats(sublime_plugin.TextCommand):
+
+    def run(self, edit, dump=False):
+        window = self.view.window()
+
+        completion_cache = HaxeComplete_inst().completionCache
+        counters = [
+            ('completion cache hits', completion_cache.hits),
+            ('completion cache misses', completion_cache.misses)]
+
+        for kind, port, rss, cpu, restarts, recycles in \
+                HaxeComplete_inst().server_usage():
+            name = '%s server :%s' % (kind, port)
+            if rss is not None:
+                counters.append((name + ' rss MB', rss // (1024 * 1024)))
+            if cpu is not None:
+                counters.append((name + ' cpu %', int(round(cpu))))
+            counters.append((name + ' restarts', restarts))
+            counters.append((name + ' recycles', recycles))
+
+        if dump:
+            data = stats.to_json(counters)
+            if cache('completion_stats.json', data) is not None:
+                sublime.status_message(
+                    'Haxe : completion stats saved to '
+                    'User/Haxe.cache/completion_stats.json')
+            return
+
+        panel = window.get_output_panel('haxe-stats')
+        panel.erase(edit, sublime.Region(0, panel.size()))
+        panel.insert(edit, 0, stats.report(counters) + '\n')
+        window.run_command('show_panel', {'panel': 'output.haxe-stats'})
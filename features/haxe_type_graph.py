@@ -0,0 +1,209 @@
+import hashlib
+import json
+import threading
+
+try:  # Python 3
+    from .haxe_helper import cache
+    from .haxe_parse_helper import find_type_path, join_type
+    from .haxe_type_index import to_bytes
+except (ValueError):  # Python 2
+    from haxe_helper import cache
+    from haxe_parse_helper import find_type_path, join_type
+    from haxe_type_index import to_bytes
+
+GRAPH_VERSION = 1
+
+
+def resolve_edges(decls, imports, package, type_map):
+    """
+    Returns [type path, kind, relation, super type path] edges for the
+    declarations of a file, a type without super type having a single
+    edge with None as relation and super type.
+    """
+    edges = []
+    for kind, name, supers in decls:
+        type_path = join_type(package, name)
+        if not supers:
+            edges.append([type_path, kind, None, None])
+        for relation, super_name in supers:
+            super_path = find_type_path(
+                super_name, type_map, imports, package)
+            if super_path is None:
+                super_path = join_type(package, super_name)
+            edges.append([type_path, kind, relation, super_path])
+    return edges
+
+
+class TypeGraph(object):
+    """
+    Inheritance graph of the classes and interfaces of a set of source
+    trees, with the extends and implements edges in both directions.
+
+    It is built from the declarations kept by the IdentifierIndex of
+    every tree: `sync` only resolves the files whose stat changed since
+    the last sync, or every file when the type map of the build changed,
+    and does nothing when no index changed.
+    The graph is saved in `User/Haxe.cache`, so it survives restarts.
+    """
+
+    def __init__(self, roots):
+        self.roots = sorted(roots)
+        # path -> (stat, edges)
+        self.files = {}
+        # type path -> set of (relation, super type path)
+        self.parents = {}
+        # type path -> set of (relation, sub type path)
+        self.children = {}
+        # type path -> (kind, path of the declaring file)
+        self.types = {}
+        self.type_map_digest = None
+        # (root, version) of the indexes at the last sync
+        self.synced = None
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    @property
+    def cache_name(self):
+        digest = hashlib.md5(to_bytes('\n'.join(self.roots))).hexdigest()
+        return 'graph_%s.index' % digest
+
+    def load(self):
+        data = cache(self.cache_name)
+        if data is None:
+            return
+
+        try:
+            data = json.loads(data)
+        except ValueError:
+            return
+
+        if data.get('version') != GRAPH_VERSION or \
+                data.get('roots') != self.roots:
+            return
+
+        with self.lock:
+            self.clear()
+            self.type_map_digest = data.get('type_map')
+            for path, entry in data.get('files', {}).items():
+                self.set_file(path, tuple(entry[0]), entry[1])
+            self.dirty = False
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+
+            data = {
+                'version': GRAPH_VERSION,
+                'roots': self.roots,
+                'type_map': self.type_map_digest,
+                'files': dict(
+                    (path, [list(stat), edges])
+                    for path, (stat, edges) in self.files.items())
+            }
+            self.dirty = False
+
+        cache(self.cache_name, json.dumps(data))
+
+    def clear(self):
+        # the lock is held
+        self.files = {}
+        self.parents = {}
+        self.children = {}
+        self.types = {}
+        self.dirty = True
+
+    def set_file(self, path, stat, edges):
+        # replaces the edges of a file, None removes it, the lock is held
+        old = self.files.pop(path, None)
+        if old is not None:
+            for type_path, kind, relation, super_path in old[1]:
+                if self.types.get(type_path, (None, None))[1] == path:
+                    del self.types[type_path]
+                if relation is not None:
+                    self.parents.get(type_path, set()).discard(
+                        (relation, super_path))
+                    self.children.get(super_path, set()).discard(
+                        (relation, type_path))
+
+        if edges is not None:
+            self.files[path] = (stat, edges)
+            for type_path, kind, relation, super_path in edges:
+                self.types[type_path] = (kind, path)
+                if relation is not None:
+                    self.parents.setdefault(type_path, set()).add(
+                        (relation, super_path))
+                    self.children.setdefault(super_path, set()).add(
+                        (relation, type_path))
+
+        self.dirty = True
+
+    def sync(self, indexes, type_map):
+        """
+        Updates the graph from the declarations of `indexes`, resolving
+        type names with `type_map`.
+        """
+        digest = hashlib.md5(to_bytes(
+            json.dumps(type_map, sort_keys=True))).hexdigest()
+
+        versions = [(index.root, index.version) for index in indexes]
+        with self.lock:
+            if versions == self.synced and digest == self.type_map_digest:
+                return
+
+        entries = []
+        for index in indexes:
+            entries.extend(index.declarations())
+
+        with self.lock:
+            if digest != self.type_map_digest:
+                self.clear()
+                self.type_map_digest = digest
+
+            seen = set()
+            for path, stat, decls, imports, package in entries:
+                seen.add(path)
+                known = self.files.get(path)
+                if known is not None and known[0] == stat:
+                    continue
+                self.set_file(path, stat, resolve_edges(
+                    decls, imports, package, type_map))
+
+            for path in list(self.files.keys()):
+                if path not in seen:
+                    self.set_file(path, None, None)
+
+            self.synced = versions
+
+    def walk(self, type_path, adjacency, relations):
+        found = set()
+        stack = [type_path]
+        with self.lock:
+            while stack:
+                for relation, t in adjacency.get(stack.pop(), ()):
+                    if t not in found and (
+                            relations is None or relation in relations):
+                        found.add(t)
+                        stack.append(t)
+        return found
+
+    def ancestors(self, type_path, relations=None):
+        """
+        Returns the super types of `type_path`, direct or not, following
+        the `relations` edges only if given.
+        """
+        return self.walk(type_path, self.parents, relations)
+
+    def descendants(self, type_path, relations=None):
+        """
+        Returns the types extending or implementing `type_path`, directly
+        or not.
+        """
+        return self.walk(type_path, self.children, relations)
+
+    def declaration(self, type_path):
+        """
+        Returns (kind, path of the file) of a type, or None.
+        """
+        with self.lock:
+            return self.types.get(type_path)
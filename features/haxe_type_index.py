@@ -0,0 +1,241 @@
+import codecs
+import hashlib
+import json
+import os
+import threading
+
+try:  # Python 3
+    from .haxe_helper import cache, comments, packageLine, typeDecl
+except (ValueError):  # Python 2
+    from haxe_helper import cache, comments, packageLine, typeDecl
+
+INDEX_VERSION = 1
+
+
+def file_stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime, st.st_size
+
+
+def parse_types(path):
+    # Returns (package, [(type, params), ...]) for a .hx file
+    f = codecs.open(path, "r", "utf-8", "ignore")
+    try:
+        src = comments.sub("", f.read())
+    finally:
+        f.close()
+
+    pack = ""
+    for ps in packageLine.findall(src):
+        pack = ps
+
+    return pack, [(decl[1], decl[2]) for decl in typeDecl.findall(src)]
+
+
+def to_bytes(s):
+    if isinstance(s, bytes):
+        return s
+    return s.encode('utf-8')
+
+
+def tree_fingerprint(paths, exclude=()):
+    """
+    Cheap fingerprint of the source trees at `paths`: the mtime of every
+    directory, the mtime and size of every .hx file and the content of
+    haxelib.json. Nothing else is read, so it is much cheaper than
+    scanning the trees.
+    """
+    h = hashlib.md5()
+
+    for path in sorted(paths):
+        h.update(to_bytes(path))
+
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted(d for d in dirnames if d not in exclude)
+
+            st = file_stat(dirpath)
+            h.update(to_bytes('%s:%r\n' % (dirpath, st)))
+
+            for f in sorted(filenames):
+                if f.endswith('.hx'):
+                    st = file_stat(os.path.join(dirpath, f))
+                    h.update(to_bytes('%s:%r\n' % (f, st)))
+                elif f == 'haxelib.json':
+                    try:
+                        with open(os.path.join(dirpath, f), 'rb') as j:
+                            h.update(j.read())
+                    except (IOError, OSError):
+                        pass
+
+    return h.hexdigest()
+
+
+def read_types_cache(cache_name, fingerprint):
+    # Returns the (classes, packs) saved under `fingerprint`, or None
+    data = cache(cache_name)
+    if data is None:
+        return None
+
+    head, _, body = data.partition('\n')
+    if head != fingerprint:
+        return None
+
+    spl = body.split(';')
+    if len(spl) != 2:
+        return None
+
+    return ([c for c in spl[0].split(',') if c],
+            [p for p in spl[1].split(',') if p])
+
+
+def write_types_cache(cache_name, fingerprint, classes, packs):
+    cache(cache_name, '%s\n%s;%s' % (
+        fingerprint, ','.join(classes), ','.join(packs)))
+
+
+class TypeIndex(object):
+    """
+    Types declared by the .hx files of a classpath, with the mtime and
+    size of every file. A file is only read again when its stat changed.
+
+    The index is saved in `User/Haxe.cache`, so it survives restarts.
+    A scan of the tree, from the first `get` to `save`, holds `scan_lock`.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.files = {}
+        self.seen = set()
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.scan_lock = threading.Lock()
+
+    @property
+    def cache_name(self):
+        digest = hashlib.md5(to_bytes(self.root)).hexdigest()
+        return 'types_%s.index' % digest
+
+    def load(self):
+        data = cache(self.cache_name)
+        if data is None:
+            return
+
+        try:
+            data = json.loads(data)
+        except ValueError:
+            return
+
+        if data.get('version') != INDEX_VERSION or \
+                data.get('root') != self.root:
+            return
+
+        files = {}
+        for rel, entry in data.get('files', {}).items():
+            mtime, size, pack, decls = entry
+            files[rel] = (mtime, size, pack, [tuple(d) for d in decls])
+
+        with self.lock:
+            self.files = files
+
+    def save(self):
+        with self.lock:
+            # forget the files that weren't visited since the last save
+            for rel in list(self.files.keys()):
+                if rel not in self.seen:
+                    del self.files[rel]
+                    self.dirty = True
+            self.seen = set()
+
+            if not self.dirty:
+                return
+
+            data = {
+                'version': INDEX_VERSION,
+                'root': self.root,
+                'files': dict(
+                    (rel, list(entry)) for rel, entry in self.files.items())
+            }
+            self.dirty = False
+
+        cache(self.cache_name, json.dumps(data))
+
+    def get(self, path):
+        """
+        Returns (package, [(type, params), ...]) for the file at `path`,
+        parsing it only if it is new or changed.
+        """
+        rel = os.path.relpath(path, self.root)
+        st = file_stat(path)
+
+        with self.lock:
+            self.seen.add(rel)
+            entry = self.files.get(rel)
+
+        if entry is not None and st is not None and entry[:2] == st:
+            return entry[2], entry[3]
+
+        try:
+            pack, decls = parse_types(path)
+        except (IOError, OSError):
+            pack, decls = "", []
+
+        if st is not None:
+            with self.lock:
+                self.files[rel] = (st[0], st[1], pack, decls)
+                self.dirty = True
+
+        return pack, decls
+
+
+def scan_parallel(jobs, scan, pool_size=4, progress=None):
+    """
+    Calls `scan(*job)` for every job on up to `pool_size` threads and
+    returns the results in the order of `jobs`. `progress`, if given, is
+    called with (done, total) after every job.
+    """
+    total = len(jobs)
+    results = [None] * total
+    errors = []
+    state = {'next': 0, 'done': 0}
+    lock = threading.Lock()
+
+    def work():
+        while True:
+            with lock:
+                if errors or state['next'] >= total:
+                    return
+                i = state['next']
+                state['next'] += 1
+
+            try:
+                results[i] = scan(*jobs[i])
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+                return
+
+            with lock:
+                state['done'] += 1
+                done = state['done']
+
+            if progress is not None:
+                progress(done, total)
+
+    pool_size = min(pool_size, total)
+    if pool_size <= 1:
+        work()
+    else:
+        threads = [threading.Thread(target=work) for _ in range(pool_size)]
+        for t in threads:
+            t.daemon = True
+            t.start()
+        for t in threads:
+            t.join()
+
+    if errors:
+        raise errors[0]
+
+    return results
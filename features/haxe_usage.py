@@ -1,8 +1,12 @@
 import codecs
-import fnmatch
+import json
 import os
+import shutil
 import sublime
 import sublime_plugin
+import sys
+import tempfile
+import threading
 import time
 import re
 
@@ -11,19 +15,25 @@ try:  # Python 3
     from .haxe_generate_code_helper import is_haxe_scope, get_context
     from .haxe_organize_imports import HaxeOrganizeImports
     from .haxe_parse_helper import *
+    from .haxe_complete_worker import CompletionRequest
+    from .haxe_type_index import scan_parallel
 except (ValueError):  # Python 2
     from haxe_helper import HaxeComplete_inst, get_classpaths
     from haxe_generate_code_helper import is_haxe_scope, get_context
     from haxe_organize_imports import HaxeOrganizeImports
     from haxe_parse_helper import *
+    from haxe_complete_worker import CompletionRequest
+    from haxe_type_index import scan_parallel
 
 from xml.etree import ElementTree
 
-try:
-    from elementtree import SimpleXMLTreeBuilder
-    ElementTree.XMLTreeBuilder = SimpleXMLTreeBuilder.TreeBuilder
-except ImportError as e:
-    pass  # ST3
+if sys.version_info < (3,):
+    # the vendored builder is Python 2 only
+    try:
+        from elementtree import SimpleXMLTreeBuilder
+        ElementTree.XMLTreeBuilder = SimpleXMLTreeBuilder.TreeBuilder
+    except ImportError:
+        pass
 
 result_file_regex = (
     r'^(.+):(\d+)'
@@ -45,9 +55,94 @@ def get_root_dir(filepath, package):
         os.sep.join([os.pardir] * n))))
 
 
+USAGE_MODULE = """#if macro
+import haxe.macro.Type;
+#end
+
+class %(name)s {
+#if macro
+    public static function positions() {
+        var lines = [];
+        for (name in [%(types)s]) {
+            var line = "";
+            try {
+                switch (haxe.macro.Context.getType(name)) {
+                    case TInst(t, _):
+                        var c = t.get();
+                        for (f in c.fields.get().concat(c.statics.get())) {
+                            if (f.name == %(word)s) {
+                                var p = haxe.macro.Context.getPosInfos(f.pos);
+                                line = sys.FileSystem.fullPath(p.file) +
+                                    "\\t" + p.min;
+                            }
+                        }
+                    default:
+                }
+            } catch (e:Dynamic) {}
+            lines.push(line);
+        }
+        sys.io.File.saveContent(%(output)s, lines.join("\\n"));
+    }
+#end
+}
+"""
+
+
+def haxe_string(s):
+    return json.dumps(s, ensure_ascii=False)
+
+
+def usage_module(type_paths, word, name, output):
+    """
+    Returns the source of a module `name` whose `positions()`
+    initialization macro writes where the method `word` of every type in
+    `type_paths` is declared to the file at `output`, see read_positions.
+    A type it can't find leaves an empty line instead of failing the
+    others.
+    """
+    return USAGE_MODULE % {
+        'name': name,
+        'types': ', '.join(haxe_string(t) for t in type_paths),
+        'word': haxe_string(word),
+        'output': haxe_string(output),
+    }
+
+
+def read_positions(output):
+    """
+    Returns the (path, line) of the methods found by the macro of the
+    usage module, None for the ones it didn't find, in type order. Lines
+    start at 1.
+    """
+    with codecs.open(output, 'r', 'utf-8') as f:
+        entries = f.read().split('\n')
+
+    sources = {}
+    positions = []
+    for entry in entries:
+        path, _, offset = entry.rpartition('\t')
+        if path and path not in sources:
+            try:
+                with open(path, 'rb') as f:
+                    sources[path] = f.read()
+            except (IOError, OSError):
+                sources[path] = None
+
+        if not path or sources[path] is None or not offset.isdigit():
+            positions.append(None)
+            continue
+
+        # the offset counts bytes
+        line = sources[path].count(b'\n', 0, int(offset)) + 1
+        positions.append((path, line))
+
+    return positions
+
+
 class HaxeUsage(sublime_plugin.WindowCommand):
 
     is_active = False
+    active = None
 
     def append_usage(self, path, line):
         if self.root_dir not in path:
@@ -58,7 +153,8 @@ class HaxeUsage(sublime_plugin.WindowCommand):
 
         usage = '%s:%d' % (path, line)
 
-        if usage not in self.usages:
+        if usage not in self.usage_set:
+            self.usage_set.add(usage)
             self.usages.append(usage)
             self.log(usage)
 
@@ -75,31 +171,28 @@ class HaxeUsage(sublime_plugin.WindowCommand):
             self.find_usages(0, (type_path,), field, is_static)
 
     def find_inh_types(self, type_name, back=True):
-        inh_type_map = {}
-        inh_type_map[type_name] = True
+        graph, indexes = self.get_type_graph()
 
+        inh_types = set([type_name])
         if back:
-            while type_name in self.ext_map:
-                type_name = self.ext_map[type_name]
-                inh_type_map[type_name] = True
-
-        for type_name in self.ext_map.keys():
-            lst = []
-            add = False
-            while type_name in self.ext_map:
-                lst.append(type_name)
-                type_name = self.ext_map[type_name]
-                if type_name in inh_type_map:
-                    add = True
-                    break
+            inh_types |= graph.ancestors(type_name)
 
-            if add:
-                for i in lst:
-                    inh_type_map[i] = True
+        for t in list(inh_types):
+            inh_types |= graph.descendants(t)
 
-        return [
-            k for k in inh_type_map.keys()
-            if k in self.contains_word_ext_map]
+        # only the types whose module mentions the method
+        word = self.context.word.name
+        type_paths = []
+        for t in sorted(inh_types):
+            decl = graph.declaration(t)
+            if decl is None:
+                continue
+            for index in indexes:
+                if index.contains(decl[1]) and index.lines(word, decl[1]):
+                    type_paths.append(t)
+                    break
+
+        return type_paths
 
     def find_local_or_field_usages(self):
         self.show_panel()
@@ -229,59 +322,64 @@ class HaxeUsage(sublime_plugin.WindowCommand):
     def find_method_positions(self, type_paths, word):
         # print('HU positions:', word)
 
-        filepath = os.path.join(self.root_dir, 'SublimeHaxeUsage.hx')
+        # a single module, out of the source tree, whose initialization
+        # macro looks the method up in every type: one compilation finds
+        # all the positions. Each search has its own directory and module
+        # name, another window may be searching too
         complete = HaxeComplete_inst()
+        cp = None
 
-        def find(idx, t):
-            if idx >= len(type_paths):
-                try:
-                    os.remove(filepath)
-                except OSError:
-                    pass
-
-                self.find_usages(0, type_paths, self.context.word.name)
-                return
-
-            t0 = time.time()
-
-            type_path = type_paths[idx]
-            s = (
-                'class SublimeHaxeUsage {'
-                'static var temp:%s;'
-                'static function main() {temp.%s.|;}'
-                '}'
-                ) % (type_path, word)
+        try:
+            cp = tempfile.mkdtemp(prefix='SublimeHaxeUsage_')
+            name = os.path.basename(cp)
+            filepath = os.path.join(cp, name + '.hx')
+            output = os.path.join(cp, 'positions.txt')
+            with codecs.open(filepath, 'w', 'utf-8') as f:
+                f.write(usage_module(type_paths, word, name, output))
+        except (IOError, OSError) as e:
+            if cp is not None:
+                shutil.rmtree(cp, True)
+            self.has_pos_errors = True
+            self.log('Can\'t write the usage module: %s' % e)
+            self.find_usages(0, type_paths, self.context.word.name)
+            return
 
-            sublime.status_message('Find method in \'%s\'' % type_path)
+        def find():
+            if not self.is_cancelled:
+                sublime.status_message(
+                    'Find method in %d types' % len(type_paths))
 
-            with open(filepath, 'w') as f:
-                f.write(s)
+                # the macro runs before the display request, whose result
+                # doesn't matter
+                complete.run_haxe(self.view, dict(
+                    mode='position',
+                    filename=filepath,
+                    offset=0,
+                    commas=None
+                ), [('-cp', cp), ('--macro', name + '.positions()')])
 
-            position = complete.run_haxe(self.view, dict(
-                mode='position',
-                filename=filepath,
-                offset=0,
-                commas=None
-            ))
+                try:
+                    positions = read_positions(output)
+                except (IOError, OSError):
+                    positions = []
 
-            if position:
-                self.parse_and_append_usage(position)
-            else:
-                self.has_pos_errors = True
+                for i in range(len(type_paths)):
+                    if i < len(positions) and positions[i] is not None:
+                        self.append_usage(*positions[i])
+                    else:
+                        self.has_pos_errors = True
 
-            t += time.time() - t0
-            idx += 1
+            shutil.rmtree(cp, True)
 
-            if t > 0.5:
-                t = 0
-                sublime.set_timeout(lambda: find(idx, t), 10)
+            if self.is_cancelled:
+                self.finish()
             else:
-                find(idx, t)
+                self.find_usages(0, type_paths, self.context.word.name)
 
-        sublime.set_timeout(lambda: find(0, 0), 10)
+        sublime.set_timeout(find, 10)
 
     def find_method_usages(self, type_name, is_override):
-        self.scan_hx_files(True)
+        self.scan_hx_files()
 
         # print('HU method usages:', type_name)
         self.classpaths = get_classpaths(self.view)
@@ -309,7 +407,8 @@ class HaxeUsage(sublime_plugin.WindowCommand):
             mode='usage',
             filename=filepath,
             offset=offset,
-            commas=None
+            commas=None,
+            stdin=False
         ))
 
         if usage:
@@ -374,74 +473,72 @@ class HaxeUsage(sublime_plugin.WindowCommand):
             re_type_path_usage = \
                 re_type_path_or_name_usage = re.compile(r'\b(%s)\b' % n)
 
-        for root, dirnames, filenames in os.walk(self.root_dir):
-            for filename in fnmatch.filter(filenames, '*.hx'):
-                module_filepath = os.path.join(root, filename)
-
-                with open(module_filepath) as f:
-                    src = f.read()
-
-                    comment_regions = find_comment_regions(src)
-                    comment = 0
-                    num_comments = len(comment_regions)
-
-                    line_positions = find_line_positions(src)
-                    line = 0
-                    num_lines = len(line_positions)
-
-                    re_obj = re_type_usage
-
-                    if has_namesakes:
-                        src_wo_comments = remove_comments(src)
-                        imp_map = parse_imports(src_wo_comments, True)
-                        type_name_map = parse_declared_type_names(
-                            src_wo_comments, True)
-                        package = parse_package(src_wo_comments)
-                        re_obj = re_type_path_usage
-
-                        if type_name in type_name_map:
-                            if type_package == '':
-                                if is_imported(
-                                        namesakes,
-                                        self.type_map, imp_map, False) or \
-                                        package and \
-                                        package in self.type_map[type_name]:
-                                    re_obj = None
-                            elif package == type_package:
-                                re_obj = re_type_path_or_name_usage
-                        else:
-                            if type_package == '':
-                                if is_imported(
-                                        namesakes,
-                                        self.type_map, imp_map, False) or \
-                                        package and \
-                                        package in self.type_map[type_name]:
-                                    re_obj = None
-                            elif is_imported(
-                                    (type_path,), self.type_map, imp_map):
-                                re_obj = re_type_path_or_name_usage
-                            elif not is_imported(
-                                    namesakes, self.type_map, imp_map,
-                                    False) and \
-                                    package == type_package:
-                                re_obj = re_type_path_or_name_usage
-
-                    if re_obj is None:
-                        continue
+        # only the files using the type name can refer to the type
+        for module_filepath in self.get_index().files_with(n):
+            with open(module_filepath) as f:
+                src = f.read()
+
+                comment_regions = find_comment_regions(src)
+                comment = 0
+                num_comments = len(comment_regions)
+
+                line_positions = find_line_positions(src)
+                line = 0
+                num_lines = len(line_positions)
+
+                re_obj = re_type_usage
+
+                if has_namesakes:
+                    src_wo_comments = remove_comments(src)
+                    imp_map = parse_imports(src_wo_comments, True)
+                    type_name_map = parse_declared_type_names(
+                        src_wo_comments, True)
+                    package = parse_package(src_wo_comments)
+                    re_obj = re_type_path_usage
+
+                    if type_name in type_name_map:
+                        if type_package == '':
+                            if is_imported(
+                                    namesakes,
+                                    self.type_map, imp_map, False) or \
+                                    package and \
+                                    package in self.type_map[type_name]:
+                                re_obj = None
+                        elif package == type_package:
+                            re_obj = re_type_path_or_name_usage
+                    else:
+                        if type_package == '':
+                            if is_imported(
+                                    namesakes,
+                                    self.type_map, imp_map, False) or \
+                                    package and \
+                                    package in self.type_map[type_name]:
+                                re_obj = None
+                        elif is_imported(
+                                (type_path,), self.type_map, imp_map):
+                            re_obj = re_type_path_or_name_usage
+                        elif not is_imported(
+                                namesakes, self.type_map, imp_map,
+                                False) and \
+                                package == type_package:
+                            re_obj = re_type_path_or_name_usage
+
+                if re_obj is None:
+                    continue
 
-                    for mo in re_obj.finditer(src):
-                        while comment < num_comments and \
-                                mo.end(0) > comment_regions[comment][1]:
-                            comment += 1
+                for mo in re_obj.finditer(src):
+                    while comment < num_comments and \
+                            mo.end(0) > comment_regions[comment][1]:
+                        comment += 1
 
-                        if comment < num_comments and \
-                                mo.start(0) >= comment_regions[comment][0]:
-                            continue
+                    if comment < num_comments and \
+                            mo.start(0) >= comment_regions[comment][0]:
+                        continue
 
-                        while line < num_lines and \
-                                line_positions[line] < mo.start(1):
-                            line += 1
-                        self.append_usage(module_filepath, line + 1)
+                    while line < num_lines and \
+                            line_positions[line] < mo.start(1):
+                        line += 1
+                    self.append_usage(module_filepath, line + 1)
 
         self.finish()
 
@@ -464,6 +561,10 @@ class HaxeUsage(sublime_plugin.WindowCommand):
                     'addMetadata("@:usage", "%s", %s, %s)' % (
                         tp, field, static)))
 
+        if int(sublime.version()) >= 3000:
+            self.find_usages_parallel(offset, args)
+            return
+
         num_files = len(self.hx_files)
 
         def find(idx, t):
@@ -481,7 +582,8 @@ class HaxeUsage(sublime_plugin.WindowCommand):
                 filename=f,
                 offset=offset,
                 commas=None,
-                serverMode=False),
+                serverMode=False,
+                stdin=False),
                 args)
 
             tree = self.parse_xml(usage[0])
@@ -501,10 +603,71 @@ class HaxeUsage(sublime_plugin.WindowCommand):
 
         sublime.set_timeout(lambda: find(0, 0), 10)
 
+    def find_usages_parallel(self, offset, args):
+        # one compiler per file, without the server as the @:usage
+        # metadata added by `args` must not stay in its cache
+        complete = HaxeComplete_inst()
+        view = self.view
+        files = [(f,) for f in self.hx_files]
+        pool_size = view.settings().get('haxe_usage_pool_size', 4)
+        request = self.request
+        build = complete.get_build(view)
+
+        def scan(f):
+            if self.is_cancelled:
+                return
+
+            usage = complete.run_haxe(view, dict(
+                mode='usage',
+                filename=f,
+                offset=offset,
+                commas=None,
+                serverMode=False,
+                request=request,
+                build=build,
+                stdin=False),
+                args)
+
+            if usage is not None and not self.is_cancelled:
+                sublime.set_timeout(lambda: self.add_usages(usage[0]), 0)
+
+        def progress(done, total):
+            sublime.set_timeout(lambda: sublime.status_message(
+                'Find usages: %d/%d files' % (done, total)), 0)
+
+        def search():
+            try:
+                scan_parallel(files, scan, pool_size, progress)
+            finally:
+                sublime.set_timeout(self.finish, 0)
+
+        t = threading.Thread(target=search)
+        t.daemon = True
+        t.start()
+
+    def add_usages(self, text):
+        if self.is_cancelled:
+            return
+
+        tree = self.parse_xml(text)
+        if tree is not None:
+            for i in tree.getiterator('pos'):
+                self.parse_and_append_usage(i.text)
+
+    def cancel(self):
+        self.is_cancelled = True
+        self.request.cancel()
+
     def finish(self):
         if self.usages:
             self.output_view.find_all_results()
 
+        if self.is_cancelled:
+            self.log('[Cancelled]')
+            HaxeUsage.is_active = False
+            HaxeUsage.active = None
+            return
+
         self.has_errors = self.has_errors or self.has_pos_errors
         if self.has_pos_errors:
             usage = HaxeComplete_inst().run_haxe(self.view, dict(
@@ -518,6 +681,7 @@ class HaxeUsage(sublime_plugin.WindowCommand):
         self.log('[Finished]')
 
         HaxeUsage.is_active = False
+        HaxeUsage.active = None
 
     def log(self, text):
         self.output_view.run_command(
@@ -579,7 +743,12 @@ class HaxeUsage(sublime_plugin.WindowCommand):
 
         return []
 
-    def run(self):
+    def run(self, cancel=False):
+        if cancel:
+            if HaxeUsage.active is not None:
+                HaxeUsage.active.cancel()
+            return
+
         if HaxeUsage.is_active:
             return
 
@@ -602,8 +771,12 @@ class HaxeUsage(sublime_plugin.WindowCommand):
             return
 
         HaxeUsage.is_active = True
+        HaxeUsage.active = self
+        # aborts the compilers of a cancelled search
+        self.request = CompletionRequest(None, None, 0, None, None)
         self.type_map = HaxeOrganizeImports.get_type_map(self.view)
         self.usages = []
+        self.usage_set = set()
         self.src_wo_comments = remove_comments(self.context.src)
         self.package = parse_package(self.src_wo_comments)
 
@@ -621,46 +794,56 @@ class HaxeUsage(sublime_plugin.WindowCommand):
         else:
             self.find_local_or_field_usages()
 
-    def scan_hx_files(self, gen_ext_map=False):
-        self.hx_files = []
-        if gen_ext_map:
-            self.ext_map = {}
-            self.contains_word_ext_map = {}
+    def refresh_index(self, index):
+        # saved files are indexed on save, the tree is walked again for
+        # changes made outside of the editor once in a while only
+        interval = self.view.settings().get('haxe_usage_refresh_interval', 60)
+        index.refresh(interval)
+        index.save()
+
+    def get_index(self):
+        index = HaxeComplete_inst().get_ident_index(self.root_dir)
+        self.refresh_index(index)
+        return index
+
+    def get_type_graph(self):
+        # the inheritance graph of the project and its libraries, with
+        # the identifier indexes it's built from
+        complete = HaxeComplete_inst()
+        std_paths = set(
+            os.path.normpath(p) for p in complete.__class__.stdPaths)
+
+        roots = [self.root_dir]
+        for cp in get_classpaths(self.view):
+            cp = os.path.normpath(cp)
+            if cp not in std_paths and os.path.isdir(cp):
+                roots.append(cp)
+
+        # a tree inside another one is indexed with it
+        roots = sorted(set(roots))
+        roots = [r for r in roots if not [
+            o for o in roots if o != r and r.startswith(o + os.sep)]]
+
+        indexes = []
+        for root in roots:
+            index = complete.get_ident_index(root)
+            self.refresh_index(index)
+            indexes.append(index)
+
+        # a no-op unless an index changed
+        graph = complete.get_type_graph(roots)
+        graph.sync(indexes, self.type_map)
+        graph.save()
+
+        return graph, indexes
+
+    def scan_hx_files(self):
         word = self.context.word.name
-        re_word = re.compile(r'\b%s\b' % word)
-
-        for root, dirnames, filenames in os.walk(self.root_dir):
-            for filename in fnmatch.filter(filenames, '*.hx'):
-                if filename == 'SublimeHaxeUsage.hx':
-                    continue
 
-                filepath = os.path.join(root, filename)
-
-                with open(filepath) as f:
-                    src = remove_comments(f.read())
-
-                    contains_word = re_word.search(src)
-                    if contains_word:
-                        self.hx_files.append(filepath)
-
-                    if gen_ext_map:
-                        mos = find_class_declarations(src)
-                        imp_map = parse_imports(src, True)
-                        package = parse_package(src)
-                        for mo in mos:
-                            type_path = None
-                            if mo.group(1) is not None:
-                                type_path = find_type_path(
-                                    mo.group(1), self.type_map, imp_map,
-                                    package)
-                                if contains_word:
-                                    self.contains_word_ext_map[type_path] = \
-                                        True
-                            if mo.group(2) is not None:
-                                ext_type_path = find_type_path(
-                                    mo.group(2), self.type_map, imp_map,
-                                    package)
-                                self.ext_map[type_path] = ext_type_path
+        index = self.get_index()
+        self.hx_files = [
+            f for f in index.files_with(word)
+            if not os.path.basename(f).startswith('SublimeHaxeUsage')]
 
         # print('HU files:', self.hx_files)
 
@@ -0,0 +1,73 @@
+"""
+Compares the two display parsers: the expat one and the ElementTree
+one (wrap stderr in <root>, ElementTree.XML, walk the tree).
+parse_display picks the faster of them for the running Python.
+
+Usage:
+    python tests/bench_display_parser.py [response.xml ...]
+
+Pass compiler responses recorded from `haxe --display` (the stderr
+output) to benchmark them. Without arguments, a field list shaped like
+the one of flash.display.Sprite is generated.
+"""
+
+import os
+import sys
+import timeit
+
+root_path = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, os.path.join(root_path, 'features'))
+
+from haxe_display_parser import DisplayParser, parse_display_tree
+
+
+def generate_response(num_fields=600):
+    lines = ['<list>']
+    for n in range(num_fields):
+        if n % 3:
+            sig = ('flash.display.DisplayObject -&gt; Int -&gt; '
+                   'flash.display.DisplayObject')
+        else:
+            sig = 'Float'
+        lines.append(
+            '<i n="field%d" k="%s"><t>%s</t><d>\n'
+            '\t * Documentation of field%d, '
+            'long enough to look like the real thing.\n'
+            '\t * @param child The DisplayObject instance.\n'
+            '\t</d></i>' % (n, 'method' if n % 3 else 'var', sig, n))
+    lines.append('</list>')
+    return '\n'.join(lines)
+
+
+def parse_expat(text):
+    parser = DisplayParser()
+    parser.feed(text)
+    return parser.close()
+
+
+def bench(name, text, number=20):
+    items = len(parse_display_tree(text).items)
+    assert len(parse_expat(text).items) == items
+
+    tree = min(timeit.repeat(
+        lambda: parse_display_tree(text), number=number, repeat=3))
+    expat = min(timeit.repeat(
+        lambda: parse_expat(text), number=number, repeat=3))
+
+    print('%s: %d bytes, %d items' % (name, len(text), items))
+    print('  ElementTree : %.2f ms' % (tree * 1000 / number))
+    print('  expat       : %.2f ms' % (expat * 1000 / number))
+
+
+def main(paths):
+    if not paths:
+        bench('generated', generate_response())
+        return
+
+    for path in paths:
+        with open(path) as f:
+            bench(os.path.basename(path), f.read())
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,76 @@
+"""
+Times the hxml parser on a generated multi-target build file.
+
+Usage:
+    python tests/bench_hxml_parser.py [build.hxml ...]
+
+Without arguments, a hxml of about 3000 lines with 100 --next sections
+is generated in a temporary directory.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+root_path = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, os.path.join(root_path, 'features'))
+
+from haxe_hxml import HxmlParser
+
+
+def generate_hxml(folder, sections=100, lines_per_section=30):
+    with open(os.path.join(folder, 'common.hxml'), 'w') as f:
+        f.write('-cp src\n-lib lime\n-D analyzer-optimize\n')
+
+    lines = []
+    for s in range(sections):
+        if s:
+            lines.append('--next')
+        lines.append('common.hxml')
+        lines.append('-main Main%d' % s)
+        for n in range(lines_per_section - 5):
+            if n % 3 == 0:
+                lines.append('# define %d' % n)
+            else:
+                lines.append('-D "flag_%d_%d=some value"' % (s, n))
+        lines.append('-js bin/main%d.js' % s)
+
+    path = os.path.join(folder, 'build.hxml')
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return path
+
+
+def bench(path, number=20):
+    parser = HxmlParser()
+
+    def cold():
+        parser.files = {}
+        parser.parse(path)
+
+    first = min(timeit.repeat(cold, number=number, repeat=3))
+    cached = min(timeit.repeat(
+        lambda: parser.parse(path), number=number, repeat=3))
+
+    print('%s: %d builds' % (path, len(parser.parse(path))))
+    print('  tokenize + parse : %.2f ms' % (first * 1000 / number))
+    print('  memoized tokens  : %.2f ms' % (cached * 1000 / number))
+
+
+def main(paths):
+    if paths:
+        for path in paths:
+            bench(path)
+        return
+
+    folder = tempfile.mkdtemp()
+    try:
+        bench(generate_hxml(folder))
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
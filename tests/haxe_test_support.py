@@ -0,0 +1,32 @@
+"""
+Imports the modules of the `features` folder without running its
+__init__, which needs Sublime Text, so the modules that don't use the
+Sublime API can be tested outside of it:
+
+    python -m unittest discover -s tests -p "test_*.py"
+
+Tests of modules importing `sublime` are skipped there.
+"""
+
+import importlib
+import os
+import sys
+import types
+
+root_path = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+PACKAGE = 'haxe_test_features'
+
+try:
+    import sublime
+    has_sublime = True
+except ImportError:
+    has_sublime = False
+
+
+def load_feature(name):
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [os.path.join(root_path, 'features')]
+        sys.modules[PACKAGE] = package
+    return importlib.import_module(PACKAGE + '.' + name)
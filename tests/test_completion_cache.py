@@ -0,0 +1,72 @@
+import os
+import sys
+from unittest import TestCase
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from haxe_test_support import load_feature
+
+CompletionCache = load_feature('haxe_complete_cache').CompletionCache
+
+
+class TestCompletionCache(TestCase):
+
+    def hash_of(self, value):
+        calls = []
+
+        def prefix_hash():
+            calls.append(True)
+            return value
+        prefix_hash.calls = calls
+        return prefix_hash
+
+    def test_same_change_count_hits_without_hashing(self):
+        cache = CompletionCache()
+        cache.put(('a.hx', 10), 1, 'h', 'comps')
+        prefix_hash = self.hash_of('other')
+
+        self.assertEqual(cache.get(('a.hx', 10), 1, prefix_hash), 'comps')
+        self.assertEqual(prefix_hash.calls, [])
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_edit_after_offset_keeps_entry(self):
+        cache = CompletionCache()
+        cache.put(('a.hx', 10), 1, 'h', 'comps')
+
+        self.assertEqual(cache.get(('a.hx', 10), 2, self.hash_of('h')),
+                         'comps')
+        # the new change count is remembered
+        self.assertEqual(cache.get(('a.hx', 10), 2, self.hash_of('x')),
+                         'comps')
+
+    def test_edit_before_offset_drops_entry(self):
+        cache = CompletionCache()
+        cache.put(('a.hx', 10), 1, 'h', 'comps')
+
+        self.assertIsNone(cache.get(('a.hx', 10), 2, self.hash_of('x')))
+        self.assertIsNone(cache.get(('a.hx', 10), 1, self.hash_of('h')))
+        self.assertEqual(cache.misses, 2)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = CompletionCache(size=2)
+        cache.put(('a.hx', 1), 1, 'h', 1)
+        cache.put(('a.hx', 2), 1, 'h', 2)
+        cache.get(('a.hx', 1), 1, self.hash_of('h'))
+        cache.put(('a.hx', 3), 1, 'h', 3)
+
+        self.assertEqual(cache.get(('a.hx', 1), 1, self.hash_of('h')), 1)
+        self.assertIsNone(cache.get(('a.hx', 2), 1, self.hash_of('h')))
+        self.assertEqual(cache.get(('a.hx', 3), 1, self.hash_of('h')), 3)
+
+    def test_invalidate(self):
+        cache = CompletionCache()
+        cache.put(('a.hx', 5), 1, 'h', 5)
+        cache.put(('a.hx', 20), 1, 'h', 20)
+        cache.put(('b.hx', 20), 1, 'h', 'b')
+
+        cache.invalidate('a.hx', 10)
+        self.assertEqual(cache.get(('a.hx', 5), 1, self.hash_of('h')), 5)
+        self.assertIsNone(cache.get(('a.hx', 20), 1, self.hash_of('h')))
+
+        cache.invalidate('a.hx')
+        self.assertIsNone(cache.get(('a.hx', 5), 1, self.hash_of('h')))
+        self.assertEqual(cache.get(('b.hx', 20), 1, self.hash_of('h')), 'b')
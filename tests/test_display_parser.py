@@ -0,0 +1,69 @@
+import os
+import sys
+from unittest import TestCase
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from haxe_test_support import load_feature
+
+display_parser = load_feature('haxe_display_parser')
+
+LIST = '''<list>
+<i n="addChild" k="method"><t>child : flash.display.DisplayObject -&gt; flash.display.DisplayObject</t><d>Adds a child.</d></i>
+<i n="x" k="var"><t>Float</t><d></d></i>
+<i n="Sprite"><t></t></i>
+<pos>Main.hx:3: characters 2-3</pos>
+</list>'''
+
+
+class TestDisplayParser(TestCase):
+
+    def parsers(self):
+        def expat(text):
+            parser = display_parser.DisplayParser()
+            parser.feed(text)
+            return parser.close()
+
+        parsers = [display_parser.parse_display_tree]
+        if display_parser.expat is not None:
+            parsers.append(expat)
+        return parsers
+
+    def test_list(self):
+        for parse in self.parsers():
+            response = parse(LIST)
+            self.assertIsNone(response.error)
+            self.assertTrue(response.has_list)
+            self.assertEqual(response.list_pos, 'Main.hx:3: characters 2-3')
+            self.assertEqual([i.name for i in response.items],
+                             ['addChild', 'x', 'Sprite'])
+
+            item = response.items[0]
+            self.assertEqual(item.kind, 'method')
+            self.assertEqual(item.doc, 'Adds a child.')
+            self.assertIsNone(item.parsed)
+            self.assertEqual(item.signature(), (
+                ['child : flash.display.DisplayObject'],
+                'flash.display.DisplayObject'))
+
+    def test_type(self):
+        for parse in self.parsers():
+            response = parse('<type>\nInt -&gt; String\n</type>')
+            self.assertEqual(response.types, ['Int -> String'])
+            self.assertFalse(response.has_list)
+
+    def test_pos(self):
+        for parse in self.parsers():
+            response = parse('<pos>Main.hx:1: characters 0-4</pos>')
+            self.assertEqual(response.pos, 'Main.hx:1: characters 0-4')
+
+    def test_invalid(self):
+        for parse in self.parsers():
+            response = parse('Main.hx:1: characters 0-4 : Unexpected <')
+            self.assertIsNotNone(response.error)
+
+    def test_parse_sig(self):
+        parse_sig = display_parser.parse_sig
+        self.assertEqual(parse_sig('Void -> Int'), ([], 'Int'))
+        self.assertEqual(parse_sig('Float'), (None, 'Float'))
+        self.assertEqual(parse_sig('a : (Int -> Void) -> b : Int -> Bool'),
+                         (['a : Int -> Void', 'b : Int'], 'Bool'))
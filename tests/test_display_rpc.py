@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import codecs
+import json
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from haxe_test_support import load_feature
+
+display_rpc = load_feature('haxe_display_rpc')
+
+
+def reply(result):
+    return json.dumps({'jsonrpc': '2.0', 'id': 1,
+                       'result': {'result': result}})
+
+
+class TestDisplayRequest(TestCase):
+
+    def params(self, arg):
+        return json.loads(arg)['params']
+
+    def test_offset_in_characters(self):
+        contents = u'var s = "éé"; s.'
+        offset = len(contents.encode('utf-8'))
+        arg = display_rpc.display_request(None, 'Main.hx', offset, contents)
+
+        self.assertEqual(self.params(arg)['offset'], len(contents))
+        self.assertEqual(json.loads(arg)['method'], 'display/completion')
+
+    def test_offset_in_characters_of_saved_file(self):
+        dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(dir, 'Main.hx')
+            before = u'// ünïcödé\nclass Main { var x = "€"; function f() { x.'
+            with codecs.open(path, 'w', 'utf-8') as f:
+                f.write(before + u'length; } }')
+            offset = len(before.encode('utf-8'))
+            arg = display_rpc.display_request('type', path, offset)
+        finally:
+            shutil.rmtree(dir)
+
+        self.assertEqual(self.params(arg)['offset'], len(before))
+
+    def test_signature_after_paren(self):
+        contents = u'trace('
+        arg = display_rpc.display_request(None, 'Main.hx', 6, contents)
+
+        self.assertEqual(json.loads(arg)['method'], 'display/signatureHelp')
+
+    def test_modes(self):
+        arg = display_rpc.display_request('type', 'Main.hx', 0, u'')
+        self.assertEqual(json.loads(arg)['method'], 'display/hover')
+
+
+class TestCompletionItem(TestCase):
+
+    def test_type(self):
+        item = display_rpc.completion_item({
+            'kind': 'Type',
+            'args': {'name': 'Map', 'pack': ['haxe', 'ds'],
+                     'module': 'Map', 'doc': 'A map'}})
+
+        self.assertEqual((item.name, item.kind, item.doc),
+                         ('Map', 'Type', 'A map'))
+
+    def test_module(self):
+        item = display_rpc.completion_item({
+            'kind': 'Module',
+            'args': {'path': {'pack': ['haxe'], 'moduleName': 'Json'}}})
+
+        self.assertEqual(item.name, 'Json')
+
+    def test_class_field(self):
+        item = display_rpc.completion_item({
+            'kind': 'ClassField',
+            'args': {'field': {
+                'name': 'push',
+                'type': {'kind': 'TFun', 'args': {
+                    'args': [{'name': 'x', 't': {
+                        'kind': 'TAbstract',
+                        'args': {'path': {'typeName': 'Int'}}}}],
+                    'ret': {'kind': 'TAbstract',
+                            'args': {'path': {'typeName': 'Int'}}}}}}}})
+
+        self.assertEqual(item.name, 'push')
+        self.assertEqual(item.sig, 'x : Int -> Int')
+
+    def test_package(self):
+        item = display_rpc.completion_item({
+            'kind': 'Package', 'args': {'path': {'pack': ['haxe', 'ds']}}})
+        self.assertEqual(item.name, 'ds')
+
+
+class TestParseReply(TestCase):
+
+    def test_items(self):
+        response, err = display_rpc.parse_reply(reply({'items': [
+            {'kind': 'Type', 'args': {'name': 'String'}},
+            {'kind': 'Local', 'args': {'name': 'i', 'type': None}},
+            {'kind': 'Keyword', 'args': {}},
+        ]}))
+
+        self.assertEqual(err, '')
+        self.assertTrue(response.has_list)
+        self.assertEqual([i.name for i in response.items], ['String', 'i'])
+
+    def test_definition(self):
+        response, _ = display_rpc.parse_reply(reply([{
+            'file': 'Main.hx',
+            'range': {'start': {'line': 2, 'character': 4},
+                      'end': {'line': 2, 'character': 8}}}]))
+
+        self.assertEqual(response.pos, 'Main.hx:3: characters 4-8')
+
+    def test_error(self):
+        text = json.dumps({'jsonrpc': '2.0', 'id': 1, 'error': {
+            'message': 'Compiler error',
+            'data': [{'message': 'Main.hx:1: characters 0-1 : Missing ;'}]}})
+        response, err = display_rpc.parse_reply(text)
+
+        self.assertEqual(err, 'Main.hx:1: characters 0-1 : Missing ;')
+        self.assertFalse(response.items)
+
+    def test_invalid(self):
+        response, err = display_rpc.parse_reply('not json')
+        self.assertEqual(response.error, 'invalid JSON-RPC reply')
+        self.assertEqual(err, 'not json')
@@ -0,0 +1,73 @@
+import os
+import sys
+from unittest import TestCase, skipUnless
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from haxe_test_support import load_feature, has_sublime
+
+
+@skipUnless(has_sublime, 'haxe_helper needs the Sublime Text API')
+class TestFilterCompletions(TestCase):
+
+    def setUp(self):
+        helper = load_feature('haxe_helper')
+        self.fuzzy_rank = helper.fuzzy_rank
+        self.filter_completions = helper.filter_completions
+
+    def comps(self, *names):
+        return [(n + '\tvar', n) for n in names]
+
+    def test_rank_order(self):
+        rank = self.fuzzy_rank
+        self.assertLess(rank('addChild', 'add'), rank('AddChild', 'add'))
+        self.assertLess(rank('AddChild', 'add'), rank('readData', 'add'))
+        self.assertLess(rank('readData', 'add'), rank('aDoubleD', 'add'))
+        self.assertIsNone(rank('remove', 'add'))
+
+    def test_shorter_first_within_a_rank(self):
+        rank = self.fuzzy_rank
+        self.assertLess(rank('add', 'ad'), rank('addChild', 'ad'))
+
+    def test_filter(self):
+        comps = self.comps('removeChild', 'addChild', 'AddEvent', 'x',
+                           'addChildAt')
+        self.assertEqual(
+            [c[1] for c in self.filter_completions(comps, 'addch')],
+            ['addChild', 'addChildAt'])
+        self.assertEqual(
+            [c[1] for c in self.filter_completions(comps, 'add')],
+            ['addChild', 'addChildAt', 'AddEvent'])
+
+    def test_nothing_typed(self):
+        comps = self.comps('b', 'a')
+        self.assertEqual(self.filter_completions(comps, ''), comps)
+
+    def test_display_items(self):
+        DisplayItem = load_feature('haxe_display_parser').DisplayItem
+        comps = [DisplayItem('removeChild', 'method', 'Int -> Void'),
+                 DisplayItem('addChild', 'method', 'Int -> Void'),
+                 ('add\tvar', 'add')]
+        self.assertEqual(
+            [c[1] for c in load_feature('haxe_helper').completion_entries(
+                self.filter_completions(comps, 'add'))],
+            ['add', 'addChild'])
+
+    def test_item_completion(self):
+        helper = load_feature('haxe_helper')
+        DisplayItem = load_feature('haxe_display_parser').DisplayItem
+
+        item = DisplayItem('f', 'method', 'a : Int -> b : String -> Bool')
+        self.assertEqual(helper.item_completion(item),
+                         ('f( a : Int , b : String )\tBool', 'f'))
+
+        item = DisplayItem('g', 'method', 'a : flash.display.DisplayObject '
+                           '-> flash.display.DisplayObject')
+        self.assertEqual(helper.item_completion(item),
+                         ('g(...)\tflash.display.DisplayObject', 'g'))
+        self.assertEqual(item.hint, 'g( a : flash.display.DisplayObject )'
+                         '\tflash.display.DisplayObject')
+
+        self.assertEqual(helper.item_completion(DisplayItem('Sprite')),
+                         ('Sprite\tclass', 'Sprite'))
+        self.assertEqual(helper.item_completion(DisplayItem('flash')),
+                         ('flash\tpackage', 'flash'))
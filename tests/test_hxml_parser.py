@@ -0,0 +1,122 @@
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from haxe_test_support import load_feature
+
+HxmlParser = load_feature('haxe_hxml').HxmlParser
+
+
+class TestHxmlParser(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_single_build(self):
+        path = self.write('build.hxml', '\n'.join([
+            '# comment',
+            '-cp src',
+            '-lib lime',
+            '-main Main',
+            '-js bin/main.js',
+            '-D "name=a b"',
+        ]))
+        builds = HxmlParser().parse(path)
+
+        self.assertEqual(len(builds), 1)
+        build = builds[0]
+        self.assertEqual(build.main, 'Main')
+        self.assertEqual(build.target, 'js')
+        self.assertEqual(build.output, 'bin/main.js')
+        self.assertEqual(build.classpaths, ['src'])
+        self.assertEqual(build.libs, ['lime'])
+        self.assertIn(('-D', 'name=a b'), build.args)
+
+    def test_next(self):
+        path = self.write('build.hxml', '\n'.join([
+            '-main A', '-js a.js', '--next', '-main B', '-swf b.swf',
+        ]))
+        builds = HxmlParser().parse(path)
+
+        self.assertEqual([b.main for b in builds], ['A', 'B'])
+        self.assertEqual([b.target for b in builds], ['js', 'swf'])
+        self.assertNotIn(('-main', 'A'), builds[1].args)
+
+    def test_each(self):
+        path = self.write('build.hxml', '\n'.join([
+            '-cp src', '-lib common', '--each',
+            '-main A', '-js a.js', '--next', '-main B', '-js b.js',
+        ]))
+        builds = HxmlParser().parse(path)
+
+        self.assertEqual([b.main for b in builds], ['A', 'B'])
+        for build in builds:
+            self.assertEqual(build.classpaths, ['src'])
+            self.assertEqual(build.libs, ['common'])
+        self.assertNotIn(('-main', 'A'), builds[1].args)
+
+    def test_include(self):
+        self.write('common.hxml', '-cp shared\n-lib common')
+        path = self.write('build.hxml', 'common.hxml\n-main Main\n-js a.js')
+        builds = HxmlParser().parse(path)
+
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(builds[0].classpaths, ['shared'])
+        self.assertEqual(builds[0].libs, ['common'])
+        self.assertEqual(builds[0].main, 'Main')
+
+    def test_include_cycle(self):
+        self.write('a.hxml', 'b.hxml\n-cp a')
+        self.write('b.hxml', 'a.hxml\n-cp b')
+        parser = HxmlParser()
+        builds = parser.parse(os.path.join(self.dir, 'a.hxml'))
+
+        self.assertEqual(builds[0].classpaths, ['b', 'a'])
+        self.assertEqual(len(parser.warnings), 1)
+        self.assertIn('include cycle', parser.warnings[0])
+
+    def test_cwd(self):
+        self.write('sub/inner.hxml', '-cp inner')
+        path = self.write('build.hxml', '--cwd sub\ninner.hxml\n-main Main')
+        builds = HxmlParser().parse(path)
+
+        self.assertEqual(builds[0].cwd, os.path.join(self.dir, 'sub'))
+        self.assertEqual(builds[0].classpaths, ['inner'])
+
+    def test_run(self):
+        path = self.write('build.hxml', '-cp src\n--run Main a b\nc')
+        builds = HxmlParser().parse(path)
+
+        build = builds[0]
+        self.assertEqual(build.target, '--run')
+        self.assertEqual(build.main, 'Main')
+        self.assertEqual(build.args[-3:], [('a',), ('b',), ('c',)])
+
+    def test_reparse_after_change(self):
+        path = self.write('build.hxml', '-main A\n-js a.js')
+        parser = HxmlParser()
+        self.assertEqual(parser.parse(path)[0].main, 'A')
+
+        with open(path, 'w') as f:
+            f.write('-main Other\n-js a.js')
+        st = os.stat(path)
+        os.utime(path, (st.st_atime, st.st_mtime + 10))
+        self.assertEqual(parser.parse(path)[0].main, 'Other')
+
+    def test_missing_file(self):
+        builds = HxmlParser().parse(os.path.join(self.dir, 'none.hxml'))
+        self.assertEqual(builds, [])
@@ -0,0 +1,55 @@
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase, skipUnless
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from haxe_test_support import load_feature, has_sublime
+
+
+@skipUnless(has_sublime, 'haxe_ident_index needs the Sublime Text API')
+class TestIdentifierIndex(TestCase):
+
+    def setUp(self):
+        IdentifierIndex = load_feature('haxe_ident_index').IdentifierIndex
+        self.dir = tempfile.mkdtemp()
+        self.index = IdentifierIndex(self.dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_refresh(self):
+        path = self.write('A.hx', 'class A {\n  var foo;\n}\n')
+
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(self.index.files_with('foo'), [path])
+        self.assertEqual(self.index.lines('foo', path), [2])
+        self.assertFalse(self.index.refresh())
+
+    def test_refresh_is_throttled(self):
+        self.index.refresh(60)
+        self.write('A.hx', 'class A {}')
+
+        self.assertFalse(self.index.refresh(60))
+        self.assertEqual(self.index.files_with('A'), [])
+        self.assertTrue(self.index.refresh())
+
+    def test_update_bumps_version(self):
+        self.index.refresh()
+        version = self.index.version
+        path = self.write('A.hx', 'class A { var bar; }')
+
+        self.index.update(path)
+        self.assertGreater(self.index.version, version)
+        self.assertEqual(self.index.files_with('bar'), [path])
+
+        os.remove(path)
+        self.index.update(path)
+        self.assertEqual(self.index.files_with('bar'), [])
@@ -0,0 +1,129 @@
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase, skipIf
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from haxe_test_support import load_feature
+
+project_xml = load_feature('haxe_project_xml')
+check_condition = project_xml.check_condition
+platform_defines = project_xml.platform_defines
+
+PROJECT = '''<?xml version="1.0" encoding="utf-8"?>
+<project>
+    <meta title="Game" package="com.example.game" version="1.0.0" />
+    <app main="Main" path="Export" file="Game" />
+
+    <set name="mobile_build" if="mobile" />
+
+    <source path="Source" />
+    <source path="Source/mobile" if="mobile_build" />
+    <source path="Source/desktop" if="desktop" />
+    <source path="Source/web" if="web" />
+    <source path="Source/native" unless="web" />
+    <source path="Source/flash_debug" if="flash debug" />
+
+    <haxelib name="openfl" />
+    <haxelib name="extension-ads" if="android || ios" />
+    <haxelib name="hxcpp-debug-server" if="cpp debug" />
+    <haxelib name="custom" if="use_custom" />
+
+    <haxedef name="analytics" unless="disable_analytics" />
+    <haxedef name="mobile_ui" if="mobile_build" />
+
+    <section if="html5">
+        <haxelib name="howler" />
+    </section>
+</project>
+'''
+
+
+class TestCheckCondition(TestCase):
+
+    def test_alternatives(self):
+        defines = platform_defines(['android', '-debug'])
+        self.assertTrue(check_condition('ios || android', defines))
+        self.assertFalse(check_condition('ios || html5', defines))
+
+    def test_required_terms(self):
+        defines = platform_defines(['android', '-debug'])
+        self.assertTrue(check_condition('mobile debug', defines))
+        self.assertTrue(check_condition('mobile && cpp', defines))
+        self.assertFalse(check_condition('mobile release', defines))
+        self.assertTrue(check_condition('!web', defines))
+        self.assertFalse(check_condition('!native', defines))
+
+    def test_undecided(self):
+        defines = platform_defines(['flash'])
+        self.assertIsNone(check_condition('use_custom', defines))
+        self.assertIsNone(check_condition('flash use_custom', defines))
+        self.assertFalse(check_condition('cpp use_custom', defines))
+        self.assertTrue(check_condition('use_custom || flash', defines))
+
+    def test_platform_defines(self):
+        defines = platform_defines(['linux', '-64'], 'build')
+        for name in ('linux', 'cpp', 'native', 'desktop', 'HXCPP_M64',
+                     'release', 'build'):
+            self.assertIn(name, defines)
+        self.assertNotIn('debug', defines)
+        self.assertNotIn('mobile', defines)
+
+
+@skipIf(project_xml.expat is None, 'needs expat')
+class TestProjectParser(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'project.xml')
+        with open(self.path, 'w') as f:
+            f.write(PROJECT)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def parse(self, *flags):
+        parser = project_xml.ProjectParser()
+        return parser.parse(self.path, platform_defines(flags, 'test'))
+
+    def classpaths(self, info):
+        return [os.path.relpath(cp, self.dir) for cp in info.classpaths]
+
+    def test_android(self):
+        info = self.parse('android', '-debug')
+        self.assertEqual(info.main, 'Main')
+        self.assertEqual(info.output, 'Game')
+        self.assertEqual(self.classpaths(info), [
+            'Source', os.path.join('Source', 'mobile'),
+            os.path.join('Source', 'native')])
+        self.assertEqual(info.haxelibs, [
+            'openfl', 'extension-ads', 'hxcpp-debug-server', 'custom'])
+        self.assertEqual(info.haxedefs, ['analytics', 'mobile_ui'])
+
+    def test_html5(self):
+        info = self.parse('html5')
+        self.assertEqual(self.classpaths(info), [
+            'Source', os.path.join('Source', 'web')])
+        self.assertEqual(info.haxelibs, ['openfl', 'custom', 'howler'])
+        self.assertEqual(info.haxedefs, ['analytics'])
+
+    def test_flash_debug(self):
+        info = self.parse('flash', '-debug')
+        self.assertEqual(self.classpaths(info), [
+            'Source', os.path.join('Source', 'web'),
+            os.path.join('Source', 'flash_debug')])
+
+    def test_linux(self):
+        info = self.parse('linux')
+        self.assertEqual(self.classpaths(info), [
+            'Source', os.path.join('Source', 'desktop'),
+            os.path.join('Source', 'native')])
+        self.assertEqual(info.haxelibs, ['openfl', 'custom'])
+
+    def test_not_a_project(self):
+        path = os.path.join(self.dir, 'data.xml')
+        with open(path, 'w') as f:
+            f.write('<data><project/></data>')
+        parser = project_xml.ProjectParser()
+        self.assertIsNone(parser.parse(path, platform_defines(['flash'])))
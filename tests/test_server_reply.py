@@ -0,0 +1,49 @@
+import os
+import sys
+from unittest import TestCase
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from haxe_test_support import load_feature
+
+haxe_server = load_feature('haxe_server')
+parse_server_reply = haxe_server.parse_server_reply
+strip_connect = haxe_server.strip_connect
+
+
+class TestParseServerReply(TestCase):
+
+    def test_stdout_lines(self):
+        out, err, has_error = parse_server_reply('\x01a\x01b\n\x01c\n')
+        self.assertEqual(out, 'a\nbc')
+        self.assertEqual(err, '')
+        self.assertFalse(has_error)
+
+    def test_stderr_lines(self):
+        out, err, has_error = parse_server_reply(
+            '<list>\n<i n="a"></i>\n</list>\n')
+        self.assertEqual(out, '')
+        self.assertEqual(err, '<list>\n<i n="a"></i>\n</list>\n')
+        self.assertFalse(has_error)
+
+    def test_error_flag(self):
+        out, err, has_error = parse_server_reply(
+            'Main.hx:1: characters 0-3 : Unknown identifier : foo\n\x02\n')
+        self.assertEqual(
+            err, 'Main.hx:1: characters 0-3 : Unknown identifier : foo\n')
+        self.assertTrue(has_error)
+
+    def test_empty(self):
+        self.assertEqual(parse_server_reply(''), ('', '', False))
+
+
+class TestStripConnect(TestCase):
+
+    def test_anywhere(self):
+        self.assertEqual(
+            strip_connect(['haxe', '--cwd', '/p', '--connect', '6000',
+                           '-main', 'Main']),
+            ['haxe', '--cwd', '/p', '-main', 'Main'])
+
+    def test_without_connect(self):
+        cmd = ['haxe', '-main', 'Main']
+        self.assertEqual(strip_connect(cmd), cmd)
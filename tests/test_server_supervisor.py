@@ -0,0 +1,133 @@
+import os
+import socket
+import sys
+import threading
+import time
+from unittest import TestCase
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from haxe_test_support import load_feature
+
+HaxeServerClient = load_feature('haxe_server').HaxeServerClient
+ServerSupervisor = load_feature('haxe_server_supervisor').ServerSupervisor
+
+
+class TestRequestTimeout(TestCase):
+
+    def setUp(self):
+        # accepts connections but never replies, like a hung server
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(1)
+        self.port = self.server.getsockname()[1]
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_client_times_out(self):
+        timeouts = []
+        client = HaxeServerClient(self.port, timeout=0.1,
+                                  on_timeout=lambda: timeouts.append(True))
+
+        self.assertIsNone(client.request(['--version']))
+        self.assertEqual(timeouts, [True])
+
+    def test_supervisor_client_reports_timeout(self):
+        supervisor = ServerSupervisor(None, request_timeout=0.1)
+        client = supervisor.make_client(self.port, supervisor.timed_out)
+
+        self.assertIsNone(client.request(['--version']))
+        self.assertIn('timed out', supervisor.reported)
+        self.assertTrue(supervisor.wake.is_set())
+
+
+class TestPendingRequests(TestCase):
+
+    def test_begin_end(self):
+        supervisor = ServerSupervisor(None)
+        first = supervisor.begin()
+        second = supervisor.begin()
+        self.assertEqual(supervisor.pending, 2)
+
+        supervisor.end(first)
+        supervisor.end(first)
+        self.assertEqual(supervisor.pending, 1)
+        supervisor.end(second)
+        self.assertEqual(supervisor.pending, 0)
+
+    def test_overdue(self):
+        supervisor = ServerSupervisor(None, request_timeout=10)
+        token = supervisor.begin()
+        self.assertFalse(supervisor.overdue())
+
+        supervisor.requests[token] = time.time() - 11
+        self.assertTrue(supervisor.overdue())
+
+    def test_no_deadline(self):
+        supervisor = ServerSupervisor(None)
+        token = supervisor.begin()
+        supervisor.requests[token] = time.time() - 3600
+        self.assertFalse(supervisor.overdue())
+
+    def test_first_report_is_kept(self):
+        supervisor = ServerSupervisor(None)
+        supervisor.report('timed out')
+        supervisor.report('dropped a request')
+        self.assertEqual(supervisor.reported, 'timed out')
+
+
+class FakeProcess(object):
+
+    def __init__(self):
+        self.pid = 0
+        self.terminated = threading.Event()
+
+    def poll(self):
+        return None
+
+    def terminate(self):
+        self.terminated.set()
+
+    kill = terminate
+
+    def wait(self):
+        pass
+
+
+class SlowSupervisor(ServerSupervisor):
+    # the server answers its first ping after a while
+
+    def __init__(self, *args, **kwargs):
+        ServerSupervisor.__init__(self, *args, **kwargs)
+        self.pinging = threading.Event()
+
+    def ping(self, port):
+        self.pinging.set()
+        time.sleep(0.5)
+        return True
+
+
+class TestStop(TestCase):
+
+    def test_stop_doesnt_wait_for_a_ping(self):
+        proc = FakeProcess()
+        supervisor = SlowSupervisor(lambda port: proc, startup_timeout=5)
+        supervisor.start()
+        thread = supervisor.thread
+        self.assertTrue(supervisor.pinging.wait(5))
+
+        started = time.time()
+        supervisor.stop()
+        self.assertLess(time.time() - started, 0.25)
+
+        # the server that answered meanwhile is killed
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(proc.terminated.is_set())
+        self.assertIsNone(supervisor.proc)
+
+    def test_stopped_supervisor_isnt_started(self):
+        supervisor = ServerSupervisor(None)
+        supervisor.stop()
+        supervisor.start()
+        self.assertIsNone(supervisor.thread)
@@ -0,0 +1,110 @@
+import os
+import sys
+from unittest import TestCase, skipUnless
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from haxe_test_support import load_feature, has_sublime
+
+
+class FakeIndex(object):
+    # declarations of an IdentifierIndex: (path, stat, decls, imports,
+    # package)
+
+    def __init__(self, files):
+        self.root = '/src'
+        self.files = files
+        self.version = 0
+        self.reads = 0
+
+    def set(self, path, entry):
+        self.files[path] = entry
+        self.version += 1
+
+    def declarations(self):
+        self.reads += 1
+        return [(path,) + entry for path, entry in sorted(self.files.items())]
+
+
+@skipUnless(has_sublime, 'haxe_type_graph needs the Sublime Text API')
+class TestTypeGraph(TestCase):
+
+    def setUp(self):
+        TypeGraph = load_feature('haxe_type_graph').TypeGraph
+        self.graph = TypeGraph(['/src'])
+        self.type_map = {'A': 'a', 'I': 'a', 'B': '', 'C': ''}
+        self.index = FakeIndex({
+            '/src/a/A.hx': ((1, 10), [
+                ['class', 'A', [['implements', 'I']]],
+                ['interface', 'I', []],
+            ], {}, 'a'),
+            '/src/B.hx': ((1, 10), [
+                ['class', 'B', [['extends', 'A']]],
+                ['class', 'C', [['extends', 'B']]],
+            ], {'A': 'a.A'}, ''),
+        })
+
+    def test_sync(self):
+        graph = self.graph
+        graph.sync([self.index], self.type_map)
+
+        self.assertEqual(graph.ancestors('C'), set(['B', 'a.A', 'a.I']))
+        self.assertEqual(graph.ancestors('C', ['extends']),
+                         set(['B', 'a.A']))
+        self.assertEqual(graph.descendants('a.I'), set(['a.A', 'B', 'C']))
+        self.assertEqual(graph.declaration('C'), ('class', '/src/B.hx'))
+        self.assertIsNone(graph.declaration('D'))
+
+    def test_sync_changed_file(self):
+        graph = self.graph
+        graph.sync([self.index], self.type_map)
+
+        self.index.set('/src/B.hx', ((2, 10), [
+            ['class', 'B', []],
+            ['class', 'C', [['extends', 'B']]],
+        ], {}, ''))
+        graph.sync([self.index], self.type_map)
+
+        self.assertEqual(graph.ancestors('C'), set(['B']))
+        self.assertEqual(graph.descendants('a.A'), set())
+
+    def test_sync_unchanged_stat_is_skipped(self):
+        graph = self.graph
+        graph.sync([self.index], self.type_map)
+
+        # same stat, the file isn't resolved again
+        self.index.set('/src/B.hx', ((1, 10), [], {}, ''))
+        graph.sync([self.index], self.type_map)
+        self.assertEqual(graph.ancestors('C'), set(['B', 'a.A', 'a.I']))
+
+    def test_sync_removed_file(self):
+        graph = self.graph
+        graph.sync([self.index], self.type_map)
+
+        del self.index.files['/src/B.hx']
+        self.index.version += 1
+        graph.sync([self.index], self.type_map)
+
+        self.assertIsNone(graph.declaration('B'))
+        self.assertEqual(graph.descendants('a.I'), set(['a.A']))
+
+    def test_type_map_change_resolves_again(self):
+        graph = self.graph
+        graph.sync([self.index], self.type_map)
+
+        self.type_map['A'] = ['a', 'b']
+        self.index.set('/src/B.hx', ((1, 10), [
+            ['class', 'B', [['extends', 'A']]],
+        ], {'A': 'b.A'}, ''))
+        graph.sync([self.index], self.type_map)
+
+        self.assertEqual(graph.ancestors('B'), set(['b.A']))
+
+    def test_unchanged_indexes_are_not_read(self):
+        graph = self.graph
+        graph.sync([self.index], self.type_map)
+        graph.sync([self.index], self.type_map)
+        self.assertEqual(self.index.reads, 1)
+
+        self.index.version += 1
+        graph.sync([self.index], self.type_map)
+        self.assertEqual(self.index.reads, 2)
@@ -0,0 +1,45 @@
+import codecs
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase, skipUnless
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from haxe_test_support import load_feature, has_sublime
+
+
+@skipUnless(has_sublime, 'haxe_usage needs the Sublime Text API')
+class TestUsageModule(TestCase):
+
+    def setUp(self):
+        self.usage = load_feature('haxe_usage')
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        with codecs.open(path, 'w', 'utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_module(self):
+        src = self.usage.usage_module(
+            ['a.A', 'b.B'], 'run', 'SublimeHaxeUsage_x', 'C:\\out "1".txt')
+
+        self.assertIn('class SublimeHaxeUsage_x {', src)
+        self.assertIn('public static function positions()', src)
+        self.assertIn('for (name in ["a.A", "b.B"])', src)
+        self.assertIn('f.name == "run"', src)
+        self.assertIn('saveContent("C:\\\\out \\"1\\".txt"', src)
+
+    def test_read_positions(self):
+        a = self.write('A.hx', u'// \u00e9\nclass A {\n  function run() {}\n}\n')
+        offset = len(u'// \u00e9\nclass A {\n  function '.encode('utf-8'))
+        output = self.write('positions.txt', u'%s\t%d\n\n%s\t0' % (
+            a, offset, os.path.join(self.dir, 'Gone.hx')))
+
+        self.assertEqual(self.usage.read_positions(output),
+                         [(a, 3), None, None])